@@ -0,0 +1,218 @@
+"""
+Bounce and complaint parsing
+============================
+Parses delivery status notifications (RFC 3464) and ARF feedback-loop
+complaints (RFC 5965) from a mailbox, and classifies each affected recipient
+as a hard bounce, soft bounce or spam complaint.
+
+Reports are attributed to a campaign and sending account through headers on
+the original message, which DSNs and ARF reports quote back:
+    X-WarmUp-Campaign-ID
+    X-WarmUp-Account-ID
+
+Mailbox sources are blocking (mailbox / imaplib); the server runs them in a
+worker thread. A Maildir directory doubles as the local stand-in for IMAP.
+"""
+
+import email
+import imaplib
+import mailbox
+from dataclasses import dataclass
+from email.message import Message
+from email.parser import HeaderParser
+from email.policy import compat32
+from email.utils import getaddresses
+from typing import List, Optional, Tuple
+
+CAMPAIGN_HEADER = "X-WarmUp-Campaign-ID"
+ACCOUNT_HEADER = "X-WarmUp-Account-ID"
+
+# Permanent (5.x.x) statuses that are still worth retrying later
+SOFT_PERMANENT_STATUSES = {"5.2.2"}  # mailbox full
+
+_header_parser = HeaderParser(policy=compat32)
+
+
+@dataclass
+class DeliveryReport:
+    kind: str  # hard_bounce, soft_bounce, spam_complaint
+    recipient: str
+    status: Optional[str] = None
+    diagnostic: Optional[str] = None
+    campaign_id: Optional[str] = None
+    sending_account_id: Optional[str] = None
+
+
+def classify_bounce(action: str, status: str) -> Optional[str]:
+    """hard_bounce / soft_bounce for one DSN recipient, None if it was delivered"""
+    action = action.lower()
+    if action in ("delivered", "relayed", "expanded"):
+        return None
+    if status.startswith("5") and status not in SOFT_PERMANENT_STATUSES:
+        return "hard_bounce"
+    if action == "failed" and not status:
+        return "hard_bounce"
+    return "soft_bounce"
+
+
+def _address(field: Optional[str]) -> Optional[str]:
+    """Address from an 'rfc822; user@host' DSN field or a plain header value"""
+    if not field:
+        return None
+    value = field.split(";", 1)[1] if ";" in field else field
+    addresses = getaddresses([value.strip()])
+    address = addresses[0][1] if addresses else ""
+    return address.strip("<> ").lower() or None
+
+
+def _fields(part: Message) -> List[Message]:
+    """Field blocks of a message/delivery-status or message/feedback-report part"""
+    payload = part.get_payload()
+    if isinstance(payload, list):
+        return payload
+    # Not parsed as structured by the email package: split the blocks ourselves
+    text = payload if isinstance(payload, str) else ""
+    return [_header_parser.parsestr(block) for block in text.replace("\r\n", "\n").split("\n\n") if block.strip()]
+
+
+def _original_headers(part: Message) -> Optional[Message]:
+    payload = part.get_payload()
+    if isinstance(payload, list):
+        return payload[0] if payload else None
+    if isinstance(payload, str):
+        return _header_parser.parsestr(payload)
+    return None
+
+
+def parse_report(raw: bytes) -> List[DeliveryReport]:
+    """
+    Delivery reports contained in one raw message
+
+    Returns:
+        List[DeliveryReport]: One entry per failed recipient or complaint;
+            empty for messages that are neither DSNs nor ARF reports
+    """
+    message = email.message_from_bytes(raw, policy=compat32)
+    if message.get_content_type() != "multipart/report":
+        return []
+
+    reports: List[DeliveryReport] = []
+    feedback = None
+    original = None
+    for part in message.walk():
+        content_type = part.get_content_type()
+        if content_type == "message/delivery-status":
+            # First block describes the message, the rest one recipient each
+            for block in _fields(part)[1:]:
+                recipient = _address(block.get("Final-Recipient") or block.get("Original-Recipient"))
+                status = (block.get("Status") or "").strip().split(" ")[0]
+                kind = classify_bounce((block.get("Action") or "failed").strip(), status)
+                if recipient and kind:
+                    reports.append(DeliveryReport(
+                        kind=kind,
+                        recipient=recipient,
+                        status=status or None,
+                        diagnostic=(block.get("Diagnostic-Code") or "").strip() or None
+                    ))
+        elif content_type == "message/feedback-report":
+            blocks = _fields(part)
+            feedback = blocks[0] if blocks else None
+        elif content_type in ("message/rfc822", "text/rfc822-headers") and original is None:
+            original = _original_headers(part)
+
+    if feedback is not None and (feedback.get("Feedback-Type") or "abuse").strip().lower() in ("abuse", "fraud"):
+        recipient = _address(feedback.get("Original-Rcpt-To") or feedback.get("Removal-Recipient"))
+        if recipient is None and original is not None:
+            recipient = _address(original.get("To"))
+        if recipient:
+            reports.append(DeliveryReport(kind="spam_complaint", recipient=recipient))
+
+    if original is not None:
+        campaign_id = (original.get(CAMPAIGN_HEADER) or "").strip() or None
+        account_id = (original.get(ACCOUNT_HEADER) or "").strip() or None
+        for report in reports:
+            report.campaign_id = campaign_id
+            report.sending_account_id = account_id
+
+    return reports
+
+
+class MaildirSource:
+    """Reads reports from a Maildir; processed messages are removed on ack"""
+
+    def __init__(self, path: str):
+        self.mailbox = mailbox.Maildir(path, factory=None, create=True)
+
+    def fetch(self, limit: int) -> List[Tuple[str, bytes]]:
+        messages = []
+        for key in self.mailbox.iterkeys():
+            if len(messages) >= limit:
+                break
+            try:
+                messages.append((key, self.mailbox.get_bytes(key)))
+            except KeyError:
+                continue  # removed by a concurrent consumer
+        return messages
+
+    def ack(self, keys: List[str]):
+        for key in keys:
+            try:
+                self.mailbox.remove(key)
+            except KeyError:
+                pass
+
+    def close(self):
+        pass
+
+
+class IMAPSource:
+    """Reads reports from an IMAP folder; processed messages are deleted on ack"""
+
+    def __init__(self, host: str, port: int, username: str, password: str, folder: str = "INBOX", use_ssl: bool = True):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.folder = folder
+        self.use_ssl = use_ssl
+        self._conn: Optional[imaplib.IMAP4] = None
+
+    def _connection(self) -> imaplib.IMAP4:
+        if self._conn is None:
+            conn = imaplib.IMAP4_SSL(self.host, self.port) if self.use_ssl else imaplib.IMAP4(self.host, self.port)
+            conn.login(self.username, self.password)
+            conn.select(self.folder)
+            self._conn = conn
+        return self._conn
+
+    def fetch(self, limit: int) -> List[Tuple[str, bytes]]:
+        conn = self._connection()
+        _, data = conn.uid("SEARCH", None, "UNDELETED")
+        uids = data[0].split()[:limit]
+        if not uids:
+            return []
+
+        # One FETCH for the whole batch rather than a round trip per message
+        _, data = conn.uid("FETCH", b",".join(uids), "(BODY.PEEK[])")
+        messages = []
+        for item in data:
+            if isinstance(item, tuple):
+                uid = item[0].split(b"UID ")[1].split()[0].rstrip(b")").decode()
+                messages.append((uid, item[1]))
+        return messages
+
+    def ack(self, keys: List[str]):
+        if not keys:
+            return
+        conn = self._connection()
+        conn.uid("STORE", ",".join(keys), "+FLAGS.SILENT", r"(\Deleted)")
+        conn.expunge()
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+                self._conn.logout()
+            except imaplib.IMAP4.error:
+                pass
+            self._conn = None
@@ -0,0 +1,141 @@
+"""
+Database round-trip profiler
+============================
+Counts and times every MongoDB command issued inside a request or background
+job, so N+1 query patterns show up as a round-trip count instead of hiding
+inside a slow endpoint.
+
+The active profile lives in a context variable. Motor runs pymongo on an
+executor with a copy of the caller's context, so the command listener (which
+fires on that executor thread) sees the profile of the request or job that
+issued the command.
+
+    with profile_db("progress_warmup") as profile:
+        await progress_warmup()
+    profile.round_trips, profile.total_ms, profile.slowest_shape
+"""
+
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import monitoring
+
+# Where each command keeps its filter, so the shape shows which fields were queried
+_FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "delete": "deletes",
+    "update": "updates",
+}
+
+SHAPE_MAX_LENGTH = 200
+
+
+def _mask(value: Any) -> Any:
+    """Keep field names and operators, replace literal values with '?'"""
+    if isinstance(value, dict):
+        return {key: _mask(item) for key, item in value.items()}
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        return [_mask(item) for item in value]
+    return "?"
+
+
+def query_shape(command_name: str, collection: str, command: dict) -> str:
+    """Literal-free description of a command, e.g. 'find domains {"id": "?"}'"""
+    field = _FILTER_FIELDS.get(command_name)
+    if field == "deletes" or field == "updates":
+        statements = command.get(field) or [{}]
+        detail = _mask(statements[0].get("q", {}))
+    elif field:
+        detail = _mask(command.get(field, {}))
+    elif command_name == "aggregate":
+        detail = [next(iter(stage), "?") for stage in command.get("pipeline", [])]
+    else:
+        detail = None
+
+    shape = f"{command_name} {collection}"
+    if detail is not None:
+        shape += " " + json.dumps(detail, default=str)
+    return shape[:SHAPE_MAX_LENGTH]
+
+
+class DBProfile:
+    """Round-trip totals for one request or job"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.round_trips = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_shape: Optional[str] = None
+        # Commands issued concurrently (asyncio.gather) complete on different executor threads
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, shape: str):
+        with self._lock:
+            self.round_trips += 1
+            self.total_seconds += seconds
+            if seconds >= self.slowest_seconds:
+                self.slowest_seconds = seconds
+                self.slowest_shape = shape
+
+    @property
+    def total_ms(self) -> float:
+        return round(self.total_seconds * 1000, 2)
+
+    def summary(self) -> str:
+        return (
+            f"{self.name}: {self.round_trips} DB round-trips, {self.total_ms} ms total, "
+            f"slowest {round(self.slowest_seconds * 1000, 2)} ms: {self.slowest_shape}"
+        )
+
+
+current_profile: ContextVar[Optional[DBProfile]] = ContextVar("db_profile", default=None)
+
+
+@contextmanager
+def profile_db(name: str, budget: Optional[int] = None):
+    """Profile every DB command issued in the block; warn if it exceeds the round-trip budget"""
+    profile = DBProfile(name)
+    token = current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        current_profile.reset(token)
+        if budget is not None and profile.round_trips > budget:
+            logging.warning(f"DB round-trip budget of {budget} exceeded by {profile.summary()}")
+
+
+class DBProfileListener(monitoring.CommandListener):
+    """Feeds completed commands into the profile active where they were issued"""
+
+    def __init__(self):
+        self._pending: Dict[Tuple[object, int], Tuple[DBProfile, str]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        profile = current_profile.get()
+        if profile is None:
+            return
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else event.command.get("collection", "")
+        self._pending[(event.connection_id, event.request_id)] = (
+            profile, query_shape(event.command_name, collection, event.command)
+        )
+
+    def _finish(self, event):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is not None:
+            profile, shape = pending
+            profile.record(event.duration_micros / 1e6, shape)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event)
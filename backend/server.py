@@ -1,8 +1,11 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import os
 import logging
 from pathlib import Path
@@ -16,6 +19,17 @@ from apscheduler.schedulers.background import BackgroundScheduler
 import random
 import asyncio
 import json
+import hashlib
+import hmac
+import base64
+import ssl
+import re
+import threading
+import time
+import math
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -28,14 +42,69 @@ except ImportError:
     AI_ENABLED = False
     logging.warning("emergentintegrations not available. Spam scoring disabled.")
 
+# ============= METRICS =============
+
+from metrics import CallbackGauge, Counter, Gauge, Histogram, MongoCommandMetrics, Registry
+from db_profiler import DBProfileListener, profile_db
+from bounce_processing import IMAPSource, MaildirSource, parse_report
+
+metrics_registry = Registry()
+http_request_duration = metrics_registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+))
+mongo_operations = metrics_registry.register(Counter(
+    "mongo_operations_total", "MongoDB commands by collection", ("collection", "command", "outcome")
+))
+mongo_operation_duration = metrics_registry.register(Histogram(
+    "mongo_operation_duration_seconds", "MongoDB command latency by collection", ("collection", "command"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+))
+emails_sent = metrics_registry.register(Counter(
+    "emails_sent_total", "Campaign sends by outcome", ("outcome",)
+))
+outbox_deliveries = metrics_registry.register(Counter(
+    "outbox_deliveries_total", "Transactional outbox delivery attempts by outcome", ("outcome",)
+))
+spam_llm_duration = metrics_registry.register(Histogram(
+    "spam_llm_request_duration_seconds", "LLM spam analysis latency", ("outcome",),
+    buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0)
+))
+spam_score_fallbacks = metrics_registry.register(Counter(
+    "spam_score_fallbacks_total", "AI spam analyses answered by heuristics instead", ("reason",)
+))
+job_duration = metrics_registry.register(Histogram(
+    "job_duration_seconds", "Background job run time", ("job",),
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+))
+job_items_processed = metrics_registry.register(Gauge(
+    "job_items_processed", "Entities processed by the last run of a background job", ("job",)
+))
+job_last_run = metrics_registry.register(Gauge(
+    "job_last_run_timestamp_seconds", "Completion time of the last run of a background job", ("job",)
+))
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+mongo_command_metrics = MongoCommandMetrics(mongo_operations, mongo_operation_duration)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[mongo_command_metrics, DBProfileListener()])
 db = client[os.environ['DB_NAME']]
 
 # JWT Config
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
+ACCESS_TOKEN_TTL = timedelta(minutes=int(os.environ.get('ACCESS_TOKEN_TTL_MINUTES', 15)))
+REFRESH_TOKEN_TTL = timedelta(days=int(os.environ.get('REFRESH_TOKEN_TTL_DAYS', 30)))
+# Pre-versioning tokens (user_id only) were issued with a 30-day expiry, so none
+# issued before this code first deployed can still be valid one lifetime later.
+# The cutoff is derived from the first deployment recorded in the database at
+# startup; LEGACY_TOKEN_CUTOFF overrides it. Until startup runs, this process's
+# own start bounds it from above.
+LEGACY_TOKEN_LIFETIME = timedelta(days=30)
+_legacy_cutoff_override = os.environ.get('LEGACY_TOKEN_CUTOFF')
+LEGACY_TOKEN_CUTOFF = (
+    datetime.fromisoformat(_legacy_cutoff_override) if _legacy_cutoff_override
+    else datetime.now(timezone.utc) + LEGACY_TOKEN_LIFETIME
+)
 
 # Founder account configuration (internal use only)
 FOUNDER_EMAILS = [
@@ -74,8 +143,12 @@ class UserLogin(BaseModel):
 
 class TokenResponse(BaseModel):
     token: str
+    refresh_token: Optional[str] = None
     user: User
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
 class Domain(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -118,6 +191,26 @@ class ContactCreate(BaseModel):
     company: Optional[str] = None
     tags: List[str] = []
 
+class ContactSearchResponse(BaseModel):
+    contacts: List[Contact]
+    page_size: int
+    has_more: bool
+    next_cursor: Optional[str] = None  # pass back as ?after= for the next page
+
+class Segment(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str
+    name: str
+    tags: List[str] = []  # empty = all contacts
+    tag_match: str = "any"  # any, all
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class SegmentCreate(BaseModel):
+    name: str
+    tags: List[str] = []
+    tag_match: str = "any"
+
 class Campaign(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -127,6 +220,7 @@ class Campaign(BaseModel):
     subject: str
     body: str
     recipients: List[str] = []
+    segment_id: Optional[str] = None  # resolved against contacts at send time
     status: str = "draft"  # draft, scheduled, sending, completed, paused
     sent_count: int = 0
     delivered_count: int = 0
@@ -135,13 +229,25 @@ class Campaign(BaseModel):
     reply_count: int = 0
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     scheduled_at: Optional[datetime] = None
+    # Pre-send content gate: scored once per distinct subject/body/mode
+    content_score: Optional[int] = None
+    content_risk_level: Optional[str] = None
+    content_hash: Optional[str] = None
+    content_scored_at: Optional[datetime] = None
+    last_recipient: Optional[str] = None  # where a paused send resumes
 
 class CampaignCreate(BaseModel):
     domain_id: str
     name: str
     subject: str
     body: str
-    recipients: List[str]
+    recipients: List[str] = []
+    segment_id: Optional[str] = None
+
+class CampaignUpdate(BaseModel):
+    name: Optional[str] = None
+    subject: Optional[str] = None
+    body: Optional[str] = None
 
 class SuppressedEmail(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -173,6 +279,20 @@ class PasswordResetToken(BaseModel):
     expires_at: datetime
     used: bool = False
 
+class OutboxEmail(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    to: EmailStr
+    subject: str
+    body: str
+    kind: str = "notification"  # password_reset, notification
+    status: str = "pending"  # pending, sending, sent, failed
+    attempts: int = 0
+    last_error: Optional[str] = None
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    sent_at: Optional[datetime] = None
+
 class SendingAccount(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -197,6 +317,8 @@ class SendingAccount(BaseModel):
     total_emails_sent: int = 0
     total_replies: int = 0
     total_opens: int = 0
+    total_bounces: int = 0
+    total_spam_complaints: int = 0
     last_activity: Optional[datetime] = None
     is_verified: bool = False
     is_paused: bool = False
@@ -279,6 +401,23 @@ class WarmupSettings(BaseModel):
     auto_pause_bounce_rate: float = 4.0  # %
     auto_pause_spam_threshold: int = 3  # count
 
+class BulkActionRequest(BaseModel):
+    ids: List[str]
+    action: str  # pause, resume, warmup_start, warmup_pause, settings (domains: pause, resume)
+    reason: Optional[str] = None  # pause only
+    settings: Optional[WarmupSettings] = None  # settings only
+
+class BulkActionResult(BaseModel):
+    id: str
+    success: bool
+    message: str
+
+class BulkActionResponse(BaseModel):
+    action: str
+    succeeded: int
+    failed: int
+    results: List[BulkActionResult]
+
 class WarmupLog(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -289,6 +428,11 @@ class WarmupLog(BaseModel):
     bounced: int
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class UsageResponse(BaseModel):
+    plan: str
+    usage: Dict[str, int]
+    limits: Dict[str, Any]
+
 class DashboardStats(BaseModel):
     total_domains: int
     active_campaigns: int
@@ -300,6 +444,7 @@ class SpamScoreRequest(BaseModel):
     subject: str
     body: str
     mode: str = "cold_outreach"
+    deep: bool = False  # True = LLM analysis instead of the local model
 
 class SpamScoreResponse(BaseModel):
     score: int  # 0-100, lower is better
@@ -308,6 +453,111 @@ class SpamScoreResponse(BaseModel):
     predicted_inbox_rate: int  # 0-100%
     details: Dict[str, Any]
 
+class SpamScoreBatchRequest(BaseModel):
+    items: List[SpamScoreRequest]
+    concurrency: Optional[int] = None  # capped at SPAM_SCORE_BATCH_MAX_CONCURRENCY
+
+class SpamScoreBatchItem(BaseModel):
+    index: int
+    result: SpamScoreResponse
+    timed_out: bool = False
+
+class SpamScoreBatchResponse(BaseModel):
+    results: List[SpamScoreBatchItem]
+
+# ============= RESULT CACHE =============
+
+_CACHE_MISS = object()
+
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry time-to-live"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _CACHE_MISS)
+            if entry is _CACHE_MISS or entry[0] <= now:
+                if entry is not _CACHE_MISS:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key, value, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def pop(self, key):
+        with self._lock:
+            if self._data.pop(key, _CACHE_MISS) is not _CACHE_MISS:
+                self.invalidations += 1
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+# Per-user read views (dashboard stats, domain and campaign lists). Entries are
+# dropped explicitly by every write path that changes them; the TTL only bounds
+# staleness across workers.
+user_view_cache = TTLCache(
+    maxsize=int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 10000)),
+    ttl=float(os.environ.get('RESULT_CACHE_TTL_SECONDS', 60))
+)
+USER_CACHED_VIEWS = ("dashboard_stats", "domains", "campaigns")
+
+def invalidate_user_views(user_id: str):
+    """Drop all cached read views for a user"""
+    for view in USER_CACHED_VIEWS:
+        user_view_cache.pop((user_id, view))
+
+# Resolved users for get_current_user, keyed by user_id. Short TTL bounds how
+# long another worker can serve a stale plan/role after a change.
+user_cache = TTLCache(
+    maxsize=int(os.environ.get('AUTH_USER_CACHE_MAX_ENTRIES', 10000)),
+    ttl=float(os.environ.get('AUTH_USER_CACHE_TTL_SECONDS', 30))
+)
+
+def invalidate_cached_user(user_id: str):
+    """Drop a user from the auth cache after login, password or plan changes"""
+    user_cache.pop(user_id)
+
+# Latest token version seen by this worker per user. Access tokens below it are
+# rejected immediately; entries only need to outlive the access token TTL.
+token_version_cache = TTLCache(
+    maxsize=int(os.environ.get('AUTH_USER_CACHE_MAX_ENTRIES', 10000)),
+    ttl=ACCESS_TOKEN_TTL.total_seconds()
+)
+
 # ============= AUTH HELPERS =============
 
 def hash_password(password: str) -> str:
@@ -316,9 +566,181 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+class BcryptPool:
+    """Bounded thread pool that keeps bcrypt work off the event loop"""
+    
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self.max_run_seconds = 0.0
+    
+    async def run(self, fn, *args):
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+        
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.total_wait_seconds += started - submitted
+            try:
+                return fn(*args)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                    self.total_run_seconds += elapsed
+                    self.max_run_seconds = max(self.max_run_seconds, elapsed)
+        
+        return await asyncio.get_running_loop().run_in_executor(self._executor, task)
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        completed = self.completed
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self.queued,
+            "active": self.active,
+            "completed": completed,
+            "avg_wait_ms": round(self.total_wait_seconds / completed * 1000, 2) if completed else 0.0,
+            "avg_run_ms": round(self.total_run_seconds / completed * 1000, 2) if completed else 0.0,
+            "max_run_ms": round(self.max_run_seconds * 1000, 2)
+        }
+
+# bcrypt releases the GIL, so a small thread pool gives real parallelism
+bcrypt_pool = BcryptPool(max_workers=int(os.environ.get('BCRYPT_POOL_WORKERS', min(4, os.cpu_count() or 1))))
+
+async def hash_password_async(password: str) -> str:
+    return await bcrypt_pool.run(hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await bcrypt_pool.run(verify_password, password, hashed)
+
+# ============= RATE LIMITING =============
+
+class SlidingWindowLimiter:
+    """Attempt limiter: exact in-process sliding window plus a Mongo-shared
+    sliding-window counter so the limit holds across workers"""
+    
+    def __init__(self, name: str, limit: int, window_seconds: int, max_keys: int = 100000):
+        self.name = name
+        self.limit = limit
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self._local: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+    
+    def _local_hit(self, key: str, now: float) -> Optional[int]:
+        with self._lock:
+            hits = self._local.get(key)
+            if hits is None:
+                hits = self._local[key] = deque()
+                while len(self._local) > self.max_keys:
+                    self._local.popitem(last=False)
+            self._local.move_to_end(key)
+            while hits and hits[0] <= now - self.window:
+                hits.popleft()
+            if len(hits) >= self.limit:
+                # Rejected attempts are not recorded, keeping each window bounded
+                return max(1, math.ceil(hits[0] + self.window - now))
+            hits.append(now)
+        return None
+    
+    async def _shared_hit(self, key: str, now: float) -> Optional[int]:
+        # Two fixed buckets weighted by overlap approximate a sliding window;
+        # rotation and increment happen in one atomic pipeline update.
+        start = math.floor(now / self.window) * self.window
+        doc = await db.rate_limits.find_one_and_update(
+            {"_id": f"{self.name}:{key}"},
+            [{"$set": {
+                "prev": {"$cond": [
+                    {"$eq": ["$start", start]},
+                    "$prev",
+                    {"$cond": [{"$eq": ["$start", start - self.window]}, "$curr", 0]}
+                ]},
+                "curr": {"$cond": [{"$eq": ["$start", start]}, {"$add": ["$curr", 1]}, 1]},
+                "start": start,
+                "expires_at": datetime.fromtimestamp(start + 2 * self.window, timezone.utc)
+            }}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        elapsed = now - start
+        estimate = doc.get('prev', 0) * (1 - elapsed / self.window) + doc.get('curr', 0)
+        if estimate > self.limit:
+            return max(1, math.ceil(self.window - elapsed))
+        return None
+    
+    async def hit(self, key: str) -> Optional[int]:
+        """Record an attempt; returns seconds to wait if over the limit"""
+        now = time.time()
+        retry_after = self._local_hit(key, now)
+        if retry_after is None:
+            try:
+                retry_after = await self._shared_hit(key, now)
+            except Exception as e:
+                logging.warning(f"Shared rate limit check failed for {self.name}: {e}")
+        if retry_after is not None:
+            self.rejected += 1
+        return retry_after
+
+login_ip_limiter = SlidingWindowLimiter(
+    "login_ip",
+    limit=int(os.environ.get('LOGIN_RATE_LIMIT_PER_IP', 20)),
+    window_seconds=int(os.environ.get('LOGIN_RATE_WINDOW_SECONDS', 60))
+)
+login_email_limiter = SlidingWindowLimiter(
+    "login_email",
+    limit=int(os.environ.get('LOGIN_RATE_LIMIT_PER_EMAIL', 10)),
+    window_seconds=int(os.environ.get('LOGIN_EMAIL_RATE_WINDOW_SECONDS', 900))
+)
+register_ip_limiter = SlidingWindowLimiter(
+    "register_ip",
+    limit=int(os.environ.get('REGISTER_RATE_LIMIT_PER_IP', 10)),
+    window_seconds=int(os.environ.get('REGISTER_RATE_WINDOW_SECONDS', 3600))
+)
+
+# Reverse proxies in front of the app that append to X-Forwarded-For. Hops to the
+# left of theirs are client-supplied and can't be trusted for rate limiting.
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 0))
+
+def get_client_ip(request: Request) -> str:
+    """Client IP: the X-Forwarded-For hop appended by the outermost trusted proxy"""
+    peer = request.client.host if request.client else "unknown"
+    if TRUSTED_PROXY_COUNT <= 0:
+        return peer
+    hops = [hop.strip() for hop in request.headers.get('x-forwarded-for', '').split(',') if hop.strip()]
+    if len(hops) < TRUSTED_PROXY_COUNT:
+        # Didn't pass through every trusted proxy
+        return peer
+    return hops[-TRUSTED_PROXY_COUNT]
+
+async def enforce_rate_limits(checks: List[tuple]):
+    """Reject with 429 before any expensive work if a limiter is exhausted"""
+    for limiter, key in checks:
+        retry_after = await limiter.hit(key)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many attempts. Please try again later.",
+                headers={"Retry-After": str(retry_after)}
+            )
+
 # ============= SMTP ENCRYPTION HELPERS =============
 
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 
 # Generate encryption key (in production, store in environment variable)
 ENCRYPTION_KEY = os.environ.get('SMTP_ENCRYPTION_KEY', Fernet.generate_key()).encode() if isinstance(os.environ.get('SMTP_ENCRYPTION_KEY', Fernet.generate_key()), str) else os.environ.get('SMTP_ENCRYPTION_KEY', Fernet.generate_key())
@@ -332,101 +754,385 @@ def decrypt_smtp_password(encrypted_password: str) -> str:
     """Decrypt SMTP password"""
     return cipher_suite.decrypt(encrypted_password.encode()).decode()
 
-async def verify_smtp_connection(host: str, port: int, username: str, password: str, use_tls: bool) -> tuple[bool, str]:
-    """Test SMTP connection"""
-    import smtplib
-    from email.mime.text import MIMEText
-    
+# Verification speaks SMTP over asyncio streams so an unreachable host only
+# stalls its own coroutine, never the event loop
+SMTP_VERIFY_TIMEOUT_SECONDS = float(os.environ.get('SMTP_VERIFY_TIMEOUT_SECONDS', 10))
+SMTP_VERIFY_CACHE_TTL_SECONDS = int(os.environ.get('SMTP_VERIFY_CACHE_TTL_SECONDS', 300))
+SMTP_VERIFY_PER_HOST_CONCURRENCY = int(os.environ.get('SMTP_VERIFY_PER_HOST_CONCURRENCY', 3))
+
+class SMTPVerifyError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+async def _smtp_reply(reader: asyncio.StreamReader) -> tuple[int, List[str]]:
+    """Read one (possibly multi-line) SMTP reply"""
+    lines = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        text = line.decode('utf-8', errors='replace').rstrip('\r\n')
+        lines.append(text[4:])
+        if len(text) < 4 or text[3] != '-':
+            return int(text[:3]), lines
+
+async def _smtp_command(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, command: str, expect: int) -> List[str]:
+    writer.write(command.encode('utf-8') + b"\r\n")
+    await writer.drain()
+    code, lines = await _smtp_reply(reader)
+    if code != expect:
+        raise SMTPVerifyError(code, " ".join(lines))
+    return lines
+
+async def _smtp_handshake(host: str, port: int, username: str, password: str, use_tls: bool):
+    """Greeting, EHLO, STARTTLS (or implicit TLS on 465), AUTH and QUIT"""
+    context = ssl.create_default_context()
+    implicit_tls = use_tls and port == 465
+    reader, writer = await asyncio.open_connection(
+        host, port, ssl=context if implicit_tls else None
+    )
     try:
-        if use_tls:
-            server = smtplib.SMTP(host, port, timeout=10)
-            server.starttls()
+        code, lines = await _smtp_reply(reader)
+        if code != 220:
+            raise SMTPVerifyError(code, " ".join(lines))
+        
+        capabilities = await _smtp_command(reader, writer, "EHLO warmupmaster.local", 250)
+        if use_tls and not implicit_tls:
+            await _smtp_command(reader, writer, "STARTTLS", 220)
+            await writer.start_tls(context, server_hostname=host)
+            capabilities = await _smtp_command(reader, writer, "EHLO warmupmaster.local", 250)
+        
+        mechanisms = next((line[5:].upper().split() for line in capabilities if line.upper().startswith("AUTH")), [])
+        if "PLAIN" in mechanisms or not mechanisms:
+            token = base64.b64encode(f"\0{username}\0{password}".encode('utf-8')).decode()
+            await _smtp_command(reader, writer, f"AUTH PLAIN {token}", 235)
         else:
-            server = smtplib.SMTP(host, port, timeout=10)
+            await _smtp_command(reader, writer, "AUTH LOGIN", 334)
+            await _smtp_command(reader, writer, base64.b64encode(username.encode('utf-8')).decode(), 334)
+            await _smtp_command(reader, writer, base64.b64encode(password.encode('utf-8')).decode(), 235)
         
-        server.login(username, password)
-        server.quit()
-        return True, "Connection successful"
-    except smtplib.SMTPAuthenticationError:
-        return False, "Authentication failed - invalid credentials"
-    except smtplib.SMTPConnectError:
-        return False, "Connection failed - check host and port"
-    except Exception as e:
-        return False, f"Connection error: {str(e)}"
+        try:
+            await _smtp_command(reader, writer, "QUIT", 221)
+        except (SMTPVerifyError, ConnectionError):
+            pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+smtp_verify_cache = TTLCache(maxsize=10000, ttl=SMTP_VERIFY_CACHE_TTL_SECONDS)
+_smtp_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+async def verify_smtp_connection(host: str, port: int, username: str, password: str, use_tls: bool) -> tuple[bool, str]:
+    """Test SMTP connection; definitive results are cached briefly per credential set"""
+    cache_key = hashlib.sha256(json.dumps([host.lower(), port, username, password, use_tls]).encode('utf-8')).hexdigest()
+    cached = smtp_verify_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    semaphore = _smtp_host_semaphores.setdefault(host.lower(), asyncio.Semaphore(SMTP_VERIFY_PER_HOST_CONCURRENCY))
+    async with semaphore:
+        try:
+            await asyncio.wait_for(_smtp_handshake(host, port, username, password, use_tls), timeout=SMTP_VERIFY_TIMEOUT_SECONDS)
+            result = (True, "Connection successful")
+        except SMTPVerifyError as e:
+            if e.code in (530, 534, 535):
+                result = (False, "Authentication failed - invalid credentials")
+            else:
+                return False, f"Connection error: {e.code} {e}"
+        except asyncio.TimeoutError:
+            return False, "Connection failed - check host and port"
+        except (ConnectionError, OSError) as e:
+            return False, f"Connection failed - check host and port ({e})"
+        except Exception as e:
+            return False, f"Connection error: {str(e)}"
+    
+    # Network failures are not cached so a retry after fixing the host goes through
+    smtp_verify_cache.set(cache_key, result)
+    return result
+
+def create_token(user: User, token_version: int = 0) -> str:
+    """Short-lived access token carrying every claim needed to authorize a request"""
+    payload = {
+        'type': 'access',
+        'user_id': user.id,
+        'email': user.email,
+        'name': user.full_name,
+        'plan': user.plan,
+        'role': user.role,
+        'billing_status': user.billing_status,
+        'created_at': user.created_at.isoformat(),
+        'tv': token_version,
+        'exp': datetime.now(timezone.utc) + ACCESS_TOKEN_TTL
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-def create_token(user_id: str) -> str:
+def create_refresh_token(user_id: str, token_version: int = 0) -> str:
     payload = {
+        'type': 'refresh',
         'user_id': user_id,
-        'exp': datetime.now(timezone.utc) + timedelta(days=30)
+        'tv': token_version,
+        'exp': datetime.now(timezone.utc) + REFRESH_TOKEN_TTL
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+def issue_tokens(user: User, token_version: int = 0) -> TokenResponse:
+    token_version_cache.set(user.id, token_version)
+    return TokenResponse(
+        token=create_token(user, token_version),
+        refresh_token=create_refresh_token(user.id, token_version),
+        user=user
+    )
+
+async def revoke_user_tokens(user_id: str) -> int:
+    """Bump the user's token version, revoking every token issued before now"""
+    user_doc = await db.users.find_one_and_update(
+        {"id": user_id},
+        {"$inc": {"token_version": 1}},
+        projection={"_id": 0, "token_version": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    token_version = user_doc.get('token_version', 0) if user_doc else 0
+    token_version_cache.set(user_id, token_version)
+    invalidate_cached_user(user_id)
+    return token_version
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
     try:
         token = credentials.credentials
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         user_id = payload.get('user_id')
         
-        user_doc = await db.users.find_one({'id': user_id}, {'_id': 0})
+        if payload.get('type') == 'refresh':
+            raise HTTPException(status_code=401, detail="Invalid token")
+        
+        if payload.get('type') == 'access':
+            # Self-contained claims: no database access needed to authorize
+            known_version = token_version_cache.get(user_id)
+            if known_version is not None and payload.get('tv', 0) < known_version:
+                raise HTTPException(status_code=401, detail="Token revoked")
+            return User(
+                id=user_id,
+                email=payload['email'],
+                full_name=payload['name'],
+                plan=payload.get('plan', 'free'),
+                role=payload.get('role'),
+                billing_status=payload.get('billing_status'),
+                created_at=datetime.fromisoformat(payload['created_at'])
+            )
+        
+        # Legacy tokens carry only user_id and no version. They are implicitly version 0,
+        # so any revocation (logout, password reset) since they were issued rejects them.
+        if datetime.now(timezone.utc) >= LEGACY_TOKEN_CUTOFF:
+            raise HTTPException(status_code=401, detail="Token expired")
+        if token_version_cache.get(user_id):
+            raise HTTPException(status_code=401, detail="Token revoked")
+        
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
+        user_doc = await db.users.find_one({'id': user_id}, {'_id': 0, 'password': 0})
         if not user_doc:
             raise HTTPException(status_code=401, detail="User not found")
+        if user_doc.get('token_version', 0) > 0:
+            raise HTTPException(status_code=401, detail="Token revoked")
         
         if isinstance(user_doc['created_at'], str):
             user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
         
-        return User(**user_doc)
+        user = User(**user_doc)
+        user_cache.set(user_id, user)
+        
+        return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 # ============= PLAN LIMITS =============
 
+# Built once; callers treat these as read-only entitlements
+FOUNDER_PLAN_LIMITS = {
+    "max_domains": 999,
+    "daily_limit_per_domain": 10000,
+    "warmup_required": True,
+    "modes": ["cold_outreach", "founder_outbound", "newsletter"],
+    "all_features_unlocked": True
+}
+
+PLAN_LIMITS = {
+    "free": {"max_domains": 1, "daily_limit_per_domain": 20, "warmup_required": True, "modes": ["cold_outreach"]},
+    "premium": {"max_domains": 3, "daily_limit_per_domain": 150, "warmup_required": True, "modes": ["cold_outreach", "founder_outbound"]},
+    "pro": {"max_domains": 10, "daily_limit_per_domain": 300, "warmup_required": True, "modes": ["cold_outreach", "founder_outbound", "newsletter"]},
+    "enterprise": {"max_domains": 50, "daily_limit_per_domain": 1000, "warmup_required": True, "modes": ["cold_outreach", "founder_outbound", "newsletter"]},
+    "enterprise_internal": {"max_domains": 999, "daily_limit_per_domain": 10000, "warmup_required": True, "modes": ["cold_outreach", "founder_outbound", "newsletter"], "all_features_unlocked": True}
+}
+
 def get_plan_limits(plan: str, user_email: str = None) -> Dict[str, Any]:
     # Founder account gets unlimited access
     if user_email and is_founder_email(user_email):
-        return {
-            "max_domains": 999,
-            "daily_limit_per_domain": 10000,
-            "warmup_required": True,
-            "modes": ["cold_outreach", "founder_outbound", "newsletter"],
-            "all_features_unlocked": True
-        }
+        return FOUNDER_PLAN_LIMITS
     
-    limits = {
-        "free": {"max_domains": 1, "daily_limit_per_domain": 20, "warmup_required": True, "modes": ["cold_outreach"]},
-        "premium": {"max_domains": 3, "daily_limit_per_domain": 150, "warmup_required": True, "modes": ["cold_outreach", "founder_outbound"]},
-        "pro": {"max_domains": 10, "daily_limit_per_domain": 300, "warmup_required": True, "modes": ["cold_outreach", "founder_outbound", "newsletter"]},
-        "enterprise": {"max_domains": 50, "daily_limit_per_domain": 1000, "warmup_required": True, "modes": ["cold_outreach", "founder_outbound", "newsletter"]},
-        "enterprise_internal": {"max_domains": 999, "daily_limit_per_domain": 10000, "warmup_required": True, "modes": ["cold_outreach", "founder_outbound", "newsletter"], "all_features_unlocked": True}
+    return PLAN_LIMITS.get(plan, PLAN_LIMITS["free"])
+
+# ============= USAGE COUNTERS =============
+
+# Usage counter -> collection it tracks
+USAGE_RESOURCES = {
+    "domains": "domains",
+    "sending_accounts": "sending_accounts",
+    "contacts": "contacts"
+}
+
+async def seed_usage(user_id: str):
+    """Create the user's usage document from actual counts (first use only)"""
+    counts = {
+        resource: await db[collection].count_documents({"user_id": user_id})
+        for resource, collection in USAGE_RESOURCES.items()
     }
-    return limits.get(plan, limits["free"])
+    try:
+        await db.usage.update_one(
+            {"user_id": user_id},
+            {"$setOnInsert": {"user_id": user_id, **counts}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        pass  # Seeded concurrently
+
+async def reserve_usage(user_id: str, resource: str, limit: Optional[int] = None) -> bool:
+    """Atomically increment a usage counter, refusing if it would exceed limit"""
+    query: Dict[str, Any] = {"user_id": user_id}
+    if limit is not None:
+        query[resource] = {"$lt": limit}
+    
+    for _ in range(2):
+        doc = await db.usage.find_one_and_update(
+            query,
+            {"$inc": {resource: 1}},
+            projection={"_id": 0, resource: 1}
+        )
+        if doc is not None:
+            return True
+        if await db.usage.find_one({"user_id": user_id}, {"_id": 1}):
+            return False  # At the limit
+        await seed_usage(user_id)
+    return False
+
+async def release_usage(user_id: str, resource: str):
+    """Give back a reserved unit after a failed insert or a delete"""
+    await db.usage.update_one(
+        {"user_id": user_id, resource: {"$gt": 0}},
+        {"$inc": {resource: -1}}
+    )
 
 # ============= AI SPAM SCORING =============
 
-async def analyze_spam_score(subject: str, body: str, mode: str = "cold_outreach") -> SpamScoreResponse:
-    """Analyze email content for spam risk using AI"""
-    
-    if not AI_ENABLED:
-        # Fallback to basic heuristics if AI is not available
-        return _basic_spam_heuristics(subject, body, mode)
-    
+SPAM_LLM_TIMEOUT_SECONDS = float(os.environ.get('SPAM_LLM_TIMEOUT_SECONDS', 10))
+
+# Local classifier trained by scripts/train_spam_classifier.py; scores the
+# default path in-process, leaving the LLM for on-demand deep analysis
+from spam_classifier import SpamClassifier
+
+SPAM_MODEL_PATH = Path(os.environ.get('SPAM_MODEL_PATH', ROOT_DIR / 'models' / 'spam_classifier'))
+
+def load_spam_classifier() -> Optional[SpamClassifier]:
+    if not (SPAM_MODEL_PATH / 'meta.json').exists():
+        logging.info(f"No spam classifier at {SPAM_MODEL_PATH}; default scoring uses the LLM")
+        return None
     try:
-        api_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not api_key:
-            return _basic_spam_heuristics(subject, body, mode)
-        
-        # Create AI chat instance
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"spam-analysis-{uuid.uuid4()}",
-            system_message="""You are an expert email deliverability analyst specializing in cold outreach and email marketing. 
+        return SpamClassifier.load(SPAM_MODEL_PATH)
+    except Exception as e:
+        logging.error(f"Failed to load spam classifier from {SPAM_MODEL_PATH}: {e}")
+        return None
+
+spam_classifier = load_spam_classifier()
+
+SPAM_LLM_SYSTEM_MESSAGE = """You are an expert email deliverability analyst specializing in cold outreach and email marketing. 
 Analyze emails for spam indicators and provide actionable recommendations. 
 Focus on: spam trigger words, formatting issues, link density, call-to-action clarity, personalization, and compliance."""
-        ).with_model("openai", "gpt-4o")
-        
-        # Prepare analysis prompt
-        prompt = f"""Analyze this {mode.replace('_', ' ')} email for spam risk:
+
+class CircuitBreaker:
+    """Stops calling a failing dependency after repeated failures.
+    
+    While open, callers skip the call entirely. Once reset_timeout has passed,
+    the next caller schedules a single background probe; its success closes
+    the breaker, its failure keeps it open for another reset_timeout."""
+    
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"  # closed, open, half_open
+        self.failures = 0
+        self.opened_at = 0.0
+        self.skipped = 0
+        self._probe_task: Optional[asyncio.Task] = None
+    
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        self.skipped += 1
+        return False
+    
+    def record_success(self):
+        self.failures = 0
+        self.state = "closed"
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold and self.state != "open":
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            logging.warning(f"Circuit breaker '{self.name}' opened after {self.failures} failures")
+    
+    def maybe_probe(self, probe):
+        """Schedule a background recovery probe if the open period has elapsed"""
+        if self.state != "open" or time.monotonic() - self.opened_at < self.reset_timeout:
+            return
+        self.state = "half_open"
+        self._probe_task = asyncio.create_task(self._run_probe(probe))
+    
+    async def _run_probe(self, probe):
+        try:
+            await probe()
+        except Exception as e:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            logging.warning(f"Circuit breaker '{self.name}' probe failed: {e}")
+            return
+        logging.info(f"Circuit breaker '{self.name}' closed after successful probe")
+        self.record_success()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, "skipped_calls": self.skipped}
+
+spam_llm_breaker = CircuitBreaker(
+    "spam_llm",
+    failure_threshold=int(os.environ.get('SPAM_LLM_BREAKER_FAILURES', 5)),
+    reset_timeout=float(os.environ.get('SPAM_LLM_BREAKER_RESET_SECONDS', 30))
+)
+
+async def _llm_spam_analysis(subject: str, body: str, mode: str, api_key: str) -> Optional[SpamScoreResponse]:
+    """One LLM round-trip under the deadline.
+    
+    Raises on transport failures and timeouts (these count against the
+    breaker); returns None if the model answered with unparseable output."""
+    # Fresh session per analysis: a reused session would carry earlier drafts
+    # along as conversation history
+    chat = LlmChat(
+        api_key=api_key,
+        session_id=f"spam-analysis-{uuid.uuid4()}",
+        system_message=SPAM_LLM_SYSTEM_MESSAGE
+    ).with_model("openai", "gpt-4o")
+    
+    # Prepare analysis prompt
+    prompt = f"""Analyze this {mode.replace('_', ' ')} email for spam risk:
 
 SUBJECT: {subject}
 
@@ -441,132 +1147,311 @@ Provide a JSON response with:
 5. predicted_inbox_rate: 0-100% estimated inbox placement
 
 Format: {{"spam_score": int, "risk_factors": [str], "positive_factors": [str], "recommendations": [str], "predicted_inbox_rate": int}}"""
-        
-        # Get AI analysis
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
-        
-        # Parse AI response
-        try:
-            # Try to extract JSON from response
-            response_text = response.strip()
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-            
-            analysis = json.loads(response_text)
-            
-            spam_score = min(100, max(0, analysis.get('spam_score', 50)))
-            
-            # Determine risk level
-            if spam_score < 20:
-                risk_level = "low"
-            elif spam_score < 50:
-                risk_level = "medium"
-            elif spam_score < 75:
-                risk_level = "high"
-            else:
-                risk_level = "critical"
-            
-            return SpamScoreResponse(
-                score=spam_score,
-                risk_level=risk_level,
-                recommendations=analysis.get('recommendations', [])[:5],
-                predicted_inbox_rate=min(100, max(0, analysis.get('predicted_inbox_rate', 70))),
-                details={
-                    "risk_factors": analysis.get('risk_factors', []),
-                    "positive_factors": analysis.get('positive_factors', [])
-                }
-            )
-            
-        except json.JSONDecodeError:
-            # If JSON parsing fails, use basic heuristics
-            return _basic_spam_heuristics(subject, body, mode)
-            
-    except Exception as e:
-        logging.error(f"AI spam analysis failed: {e}")
-        return _basic_spam_heuristics(subject, body, mode)
-
-def _basic_spam_heuristics(subject: str, body: str, mode: str) -> SpamScoreResponse:
-    """Fallback basic spam scoring without AI"""
-    score = 0
-    risk_factors = []
-    recommendations = []
     
-    # Check subject line
-    spam_words = ['free', 'guarantee', 'no obligation', 'winner', 'cash', 'prize', 'urgent', 'act now', 'limited time']
-    subject_lower = subject.lower()
+    # Get AI analysis, bounded by the deadline
+    user_message = UserMessage(text=prompt)
+    response = await asyncio.wait_for(chat.send_message(user_message), timeout=SPAM_LLM_TIMEOUT_SECONDS)
     
-    if len(subject) > 60:
-        score += 10
-        risk_factors.append("Subject line too long")
-        recommendations.append("Keep subject under 60 characters")
+    # Parse AI response
+    try:
+        # Try to extract JSON from response
+        response_text = response.strip()
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0].strip()
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0].strip()
+        
+        analysis = json.loads(response_text)
+    except json.JSONDecodeError:
+        return None
     
-    if any(word in subject_lower for word in spam_words):
-        score += 15
-        risk_factors.append("Spam trigger words in subject")
-        recommendations.append("Remove spam trigger words")
+    spam_score = min(100, max(0, analysis.get('spam_score', 50)))
     
-    if subject.isupper():
-        score += 20
-        risk_factors.append("All caps subject line")
-        recommendations.append("Use sentence case")
+    return SpamScoreResponse(
+        score=spam_score,
+        risk_level=spam_risk_level(spam_score),
+        recommendations=analysis.get('recommendations', [])[:5],
+        predicted_inbox_rate=min(100, max(0, analysis.get('predicted_inbox_rate', 70))),
+        details={
+            "risk_factors": analysis.get('risk_factors', []),
+            "positive_factors": analysis.get('positive_factors', []),
+            "source": "ai"
+        }
+    )
+
+def _local_spam_score(subject: str, body: str, mode: str) -> SpamScoreResponse:
+    """Score with the local classifier; the rule engine supplies the explanations"""
+    probability = spam_classifier.predict_proba(subject, body, mode)
+    score = int(round(100 * probability))
+    rules = spam_rule_engine.evaluate(subject, body, mode)
     
-    # Check body
-    body_lower = body.lower()
-    link_count = body.count('http://') + body.count('https://')
+    return SpamScoreResponse(
+        score=score,
+        risk_level=spam_risk_level(score),
+        recommendations=rules.recommendations,
+        predicted_inbox_rate=max(30, 100 - score),
+        details={
+            "risk_factors": rules.details.get('risk_factors', []),
+            "positive_factors": rules.details.get('positive_factors', []),
+            "spam_probability": round(probability, 4),
+            "source": "local_model"
+        }
+    )
+
+async def analyze_spam_score(subject: str, body: str, mode: str = "cold_outreach", deep: bool = False) -> SpamScoreResponse:
+    """Analyze email content for spam risk: local model by default, AI when deep"""
     
-    if link_count > 3:
-        score += 15
-        risk_factors.append(f"Too many links ({link_count})")
-        recommendations.append("Reduce links to 1-2 for cold outreach")
+    if not deep and spam_classifier is not None:
+        return _local_spam_score(subject, body, mode)
     
-    if any(word in body_lower for word in spam_words):
-        score += 10
-        risk_factors.append("Spam trigger words in body")
+    if not AI_ENABLED:
+        # Fallback to basic heuristics if AI is not available
+        spam_score_fallbacks.inc("ai_disabled")
+        return _basic_spam_heuristics(subject, body, mode)
     
-    if len(body) < 50:
-        score += 10
-        risk_factors.append("Email too short")
-        recommendations.append("Add more context (aim for 100-200 words)")
+    api_key = os.environ.get('EMERGENT_LLM_KEY')
+    if not api_key:
+        spam_score_fallbacks.inc("no_api_key")
+        return _basic_spam_heuristics(subject, body, mode)
     
-    # Positive factors
-    if '{{' in body or '{%' in body:
-        score -= 10
-        recommendations.append("Good: Using personalization tokens")
+    if not spam_llm_breaker.allow():
+        # Upstream is degraded: answer from heuristics now, probe recovery in the background
+        spam_llm_breaker.maybe_probe(
+            lambda: _llm_spam_analysis("Quick question", "Hi, are you free for a short call next week?", "cold_outreach", api_key)
+        )
+        spam_score_fallbacks.inc("breaker_open")
+        return _basic_spam_heuristics(subject, body, mode)
     
-    if mode == "cold_outreach" and link_count <= 1:
-        score -= 5
+    started = time.perf_counter()
+    try:
+        result = await _llm_spam_analysis(subject, body, mode, api_key)
+    except asyncio.TimeoutError:
+        logging.error(f"AI spam analysis timed out after {SPAM_LLM_TIMEOUT_SECONDS}s")
+        spam_llm_breaker.record_failure()
+        spam_llm_duration.observe(time.perf_counter() - started, "timeout")
+        spam_score_fallbacks.inc("timeout")
+        return _basic_spam_heuristics(subject, body, mode)
+    except Exception as e:
+        logging.error(f"AI spam analysis failed: {e}")
+        spam_llm_breaker.record_failure()
+        spam_llm_duration.observe(time.perf_counter() - started, "error")
+        spam_score_fallbacks.inc("error")
+        return _basic_spam_heuristics(subject, body, mode)
     
-    score = min(100, max(0, score))
+    spam_llm_breaker.record_success()
+    spam_llm_duration.observe(time.perf_counter() - started, "success")
     
+    # If JSON parsing fails, use basic heuristics
+    if result is None:
+        spam_score_fallbacks.inc("invalid_response")
+        return _basic_spam_heuristics(subject, body, mode)
+    return result
+
+def _basic_spam_heuristics(subject: str, body: str, mode: str) -> SpamScoreResponse:
+    """Fallback basic spam scoring without AI"""
+    return spam_rule_engine.evaluate(subject, body, mode)
+
+def spam_risk_level(score: int) -> str:
     if score < 20:
-        risk_level = "low"
+        return "low"
     elif score < 50:
-        risk_level = "medium"
+        return "medium"
     elif score < 75:
-        risk_level = "high"
-    else:
-        risk_level = "critical"
+        return "high"
+    return "critical"
+
+# ============= SPAM RULE ENGINE =============
+
+SPAM_TRIGGER_PHRASES = ['free', 'guarantee', 'no obligation', 'winner', 'cash', 'prize', 'urgent', 'act now', 'limited time']
+
+# Each rule fires on one feature of the subject or body scan. "weight" applies to
+# every mode unless "mode_weights" overrides it; {count} in "factor" is the
+# measured value. Negative weights reward good practice.
+SPAM_RULES: List[Dict[str, Any]] = [
+    {"id": "subject_too_long", "field": "subject", "check": "min_length", "threshold": 61, "weight": 10,
+     "factor": "Subject line too long", "recommendation": "Keep subject under 60 characters"},
+    {"id": "subject_trigger_words", "field": "subject", "check": "phrases", "phrases": SPAM_TRIGGER_PHRASES, "weight": 15,
+     "factor": "Spam trigger words in subject", "recommendation": "Remove spam trigger words"},
+    {"id": "subject_all_caps", "field": "subject", "check": "all_caps", "weight": 20,
+     "factor": "All caps subject line", "recommendation": "Use sentence case"},
+    {"id": "too_many_links", "field": "body", "check": "min_links", "threshold": 4, "weight": 15,
+     "factor": "Too many links ({count})", "recommendation": "Reduce links to 1-2 for cold outreach"},
+    {"id": "body_trigger_words", "field": "body", "check": "phrases", "phrases": SPAM_TRIGGER_PHRASES, "weight": 10,
+     "factor": "Spam trigger words in body"},
+    {"id": "body_too_short", "field": "body", "check": "max_length", "threshold": 49, "weight": 10,
+     "factor": "Email too short", "recommendation": "Add more context (aim for 100-200 words)"},
+    {"id": "personalization", "field": "body", "check": "personalization", "weight": -10,
+     "recommendation": "Good: Using personalization tokens"},
+    {"id": "few_links_cold_outreach", "field": "body", "check": "max_links", "threshold": 1, "weight": 0,
+     "mode_weights": {"cold_outreach": -5}},
+]
+
+class SpamRuleEngine:
+    """Data-driven spam rules evaluated from a single regex scan per text.
+    
+    All trigger phrases, link prefixes and personalization tokens are compiled
+    into one alternation, so each text is scanned exactly once regardless of
+    how many rules exist."""
+    
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = rules
+        phrases = {" ".join(p.lower().split()) for rule in rules for p in rule.get('phrases', [])}
+        # Longest first so multi-word phrases win over their prefixes
+        alternation = "|".join(
+            r"\s+".join(re.escape(word) for word in phrase.split())
+            for phrase in sorted(phrases, key=len, reverse=True)
+        ) or r"(?!)"
+        # Runs on lowercased text. Every branch starts with a literal (no leading
+        # \b or groups) so the regex engine can skip non-candidate positions; the
+        # left word boundary of phrases is checked on the rare match instead.
+        self._pattern = re.compile(rf"https?://|\{{\{{|\{{%|(?:{alternation})\b")
+        self._phrase_sets = {
+            rule['id']: {" ".join(p.lower().split()) for p in rule['phrases']}
+            for rule in rules if rule['check'] == 'phrases'
+        }
+    
+    def scan(self, text: str) -> Dict[str, Any]:
+        lowered = text.lower()
+        links = 0
+        personalized = False
+        phrases = set()
+        for match in self._pattern.finditer(lowered):
+            found = match.group()
+            if found[0] == '{':
+                personalized = True
+            elif found.endswith('://'):
+                links += 1
+            else:
+                start = match.start()
+                if start and (lowered[start - 1].isalnum() or lowered[start - 1] == '_'):
+                    continue  # Inside a longer word, e.g. "carefree"
+                phrases.add(" ".join(found.split()))
+        return {
+            "length": len(text),
+            "all_caps": text.isupper(),
+            "links": links,
+            "personalized": personalized,
+            "phrases": phrases
+        }
+    
+    def _measure(self, rule: Dict[str, Any], features: Dict[str, Any]) -> Optional[int]:
+        """Value the rule fired on, or None if it did not fire"""
+        check = rule['check']
+        if check == 'phrases':
+            return len(features['phrases'] & self._phrase_sets[rule['id']]) or None
+        if check == 'min_length':
+            return features['length'] if features['length'] >= rule['threshold'] else None
+        if check == 'max_length':
+            return features['length'] if features['length'] <= rule['threshold'] else None
+        if check == 'min_links':
+            return features['links'] if features['links'] >= rule['threshold'] else None
+        if check == 'max_links':
+            return features['links'] if features['links'] <= rule['threshold'] else None
+        if check == 'all_caps':
+            return 1 if features['all_caps'] else None
+        if check == 'personalization':
+            return 1 if features['personalized'] else None
+        raise ValueError(f"Unknown spam rule check: {check}")
+    
+    def evaluate(self, subject: str, body: str, mode: str) -> SpamScoreResponse:
+        features = {"subject": self.scan(subject), "body": self.scan(body)}
+        score = 0
+        risk_factors = []
+        recommendations = []
+        
+        for rule in self.rules:
+            weight = rule.get('mode_weights', {}).get(mode, rule['weight'])
+            if weight == 0:
+                continue
+            count = self._measure(rule, features[rule['field']])
+            if count is None:
+                continue
+            score += weight
+            if rule.get('factor'):
+                risk_factors.append(rule['factor'].format(count=count))
+            if rule.get('recommendation'):
+                recommendations.append(rule['recommendation'])
+        
+        score = min(100, max(0, score))
+        
+        if not recommendations:
+            recommendations = ["Your email looks good overall"]
+        
+        return SpamScoreResponse(
+            score=score,
+            risk_level=spam_risk_level(score),
+            recommendations=recommendations,
+            predicted_inbox_rate=max(30, 100 - score),
+            details={"risk_factors": risk_factors, "positive_factors": [], "source": "heuristic"}
+        )
+
+spam_rule_engine = SpamRuleEngine(SPAM_RULES)
+
+# ============= SPAM SCORE CACHE =============
+
+SPAM_SCORE_CACHE_TTL_SECONDS = float(os.environ.get('SPAM_SCORE_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+
+spam_score_cache = TTLCache(
+    maxsize=int(os.environ.get('SPAM_SCORE_CACHE_MAX_ENTRIES', 5000)),
+    ttl=SPAM_SCORE_CACHE_TTL_SECONDS
+)
+
+def spam_content_hash(subject: str, body: str, mode: str) -> str:
+    """Hash of whitespace-normalized content; case is kept since it affects the score"""
+    normalized = [" ".join(subject.split()), " ".join(body.split()), mode]
+    return hashlib.sha256(json.dumps(normalized).encode('utf-8')).hexdigest()
+
+async def get_spam_score(subject: str, body: str, mode: str = "cold_outreach", deep: bool = False) -> SpamScoreResponse:
+    """analyze_spam_score behind an in-memory LRU and a persistent Mongo cache"""
+    if not deep and spam_classifier is not None:
+        # Local scoring is cheaper than a cache lookup
+        return await analyze_spam_score(subject, body, mode)
     
-    inbox_rate = max(30, 100 - score)
+    key = spam_content_hash(subject, body, mode)
     
-    if not recommendations:
-        recommendations = ["Your email looks good overall"]
+    cached = spam_score_cache.get(key)
+    if cached is not None:
+        return cached
     
-    return SpamScoreResponse(
-        score=score,
-        risk_level=risk_level,
-        recommendations=recommendations,
-        predicted_inbox_rate=inbox_rate,
-        details={"risk_factors": risk_factors, "positive_factors": []}
-    )
+    try:
+        cache_doc = await db.spam_score_cache.find_one({"_id": key})
+    except Exception as e:
+        logging.warning(f"Spam score cache lookup failed: {e}")
+        cache_doc = None
+    if cache_doc:
+        result = SpamScoreResponse(**cache_doc['result'])
+        spam_score_cache.set(key, result)
+        return result
+    
+    result = await analyze_spam_score(subject, body, mode, deep=True)
+    
+    # Heuristic fallbacks are cheap and may reflect a transient AI outage; don't pin them
+    if result.details.get('source') == 'ai':
+        spam_score_cache.set(key, result)
+        try:
+            await db.spam_score_cache.update_one(
+                {"_id": key},
+                {"$set": {
+                    "result": result.model_dump(),
+                    "expires_at": datetime.now(timezone.utc) + timedelta(seconds=SPAM_SCORE_CACHE_TTL_SECONDS)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logging.warning(f"Spam score cache write failed: {e}")
+    
+    return result
 
 # ============= WARMUP ENGINE =============
 
+def record_job_run(job: str, started: float, items: int):
+    job_duration.observe(time.perf_counter() - started, job)
+    job_items_processed.set(items, job)
+    job_last_run.set(time.time(), job)
+
 async def progress_warmup():
     """Daily cron job to progress all domains in warmup"""
+    started = time.perf_counter()
     domains = await db.domains.find({"warmup_completed": False}, {"_id": 0}).to_list(None)
     
     for domain_doc in domains:
@@ -617,6 +1502,9 @@ async def progress_warmup():
         ).model_dump()
         log_dict['timestamp'] = log_dict['timestamp'].isoformat()
         await db.warmup_logs.insert_one(log_dict)
+        invalidate_user_views(domain.user_id)
+    
+    record_job_run("domain_warmup", started, len(domains))
 
 # ============= AUTO-PAUSE ENGINE =============
 
@@ -634,7 +1522,10 @@ async def check_domain_health(domain_id: str):
     domain = Domain(**domain_doc)
     
     # Get campaign stats for this domain
-    campaigns = await db.campaigns.find({"domain_id": domain_id}, {"_id": 0}).to_list(None)
+    campaigns = await db.campaigns.find(
+        {"domain_id": domain_id},
+        {"_id": 0, "sent_count": 1, "bounce_count": 1, "spam_count": 1}
+    ).to_list(None)
     
     total_sent = sum(c.get('sent_count', 0) for c in campaigns)
     total_bounced = sum(c.get('bounce_count', 0) for c in campaigns)
@@ -665,13 +1556,18 @@ async def check_domain_health(domain_id: str):
                     "health_score": new_health_score
                 }}
             )
+            invalidate_user_views(domain.user_id)
 
 # ============= MOCK EMAIL SENDER =============
 
-async def send_email_mock(domain_id: str, to: str, subject: str, body: str, campaign_id: str):
+# Benchmarks set both to 0 to measure the send path without the simulated latency
+MOCK_SEND_DELAY_MIN_SECONDS = float(os.environ.get('MOCK_SEND_DELAY_MIN_SECONDS', 0.1))
+MOCK_SEND_DELAY_MAX_SECONDS = float(os.environ.get('MOCK_SEND_DELAY_MAX_SECONDS', 0.3))
+
+async def send_email_mock(domain_id: str, to: str, subject: str, body: str, campaign_id: str, user_id: Optional[str] = None):
     """Mock email sender with realistic delays"""
     # Simulate sending delay (7-45 seconds in production)
-    await asyncio.sleep(random.uniform(0.1, 0.3))  # Shortened for demo
+    await asyncio.sleep(random.uniform(MOCK_SEND_DELAY_MIN_SECONDS, MOCK_SEND_DELAY_MAX_SECONDS))  # Shortened for demo
     
     # Simulate delivery outcomes (realistic distribution)
     outcome = random.choices(
@@ -679,8 +1575,8 @@ async def send_email_mock(domain_id: str, to: str, subject: str, body: str, camp
         weights=[96, 3, 1]  # 96% delivered, 3% bounced, 1% spam
     )[0]
     
-    # Update campaign stats
-    update_dict = {"$inc": {"sent_count": 1}}
+    # Update campaign stats; last_recipient is where a paused send picks up again
+    update_dict = {"$inc": {"sent_count": 1}, "$set": {"last_recipient": to}}
     
     if outcome == 'delivered':
         update_dict["$inc"]["delivered_count"] = 1
@@ -688,19 +1584,412 @@ async def send_email_mock(domain_id: str, to: str, subject: str, body: str, camp
         update_dict["$inc"]["bounce_count"] = 1
     elif outcome == 'spam':
         update_dict["$inc"]["spam_count"] = 1
+    emails_sent.inc(outcome)
     
     await db.campaigns.update_one({"id": campaign_id}, update_dict)
     
     # Update domain sent count
     await db.domains.update_one({"id": domain_id}, {"$inc": {"sent_today": 1}})
     
+    if user_id:
+        invalidate_user_views(user_id)
+    
     # Check domain health after send
     await check_domain_health(domain_id)
 
+# ============= TRANSACTIONAL EMAIL OUTBOX =============
+
+import smtplib
+import queue
+
+OUTBOX_SMTP_HOST = os.environ.get('OUTBOX_SMTP_HOST')
+OUTBOX_SMTP_PORT = int(os.environ.get('OUTBOX_SMTP_PORT', 587))
+OUTBOX_SMTP_USERNAME = os.environ.get('OUTBOX_SMTP_USERNAME')
+OUTBOX_SMTP_PASSWORD = os.environ.get('OUTBOX_SMTP_PASSWORD')
+OUTBOX_SMTP_USE_TLS = os.environ.get('OUTBOX_SMTP_USE_TLS', 'true').lower() == 'true'
+OUTBOX_FROM_EMAIL = os.environ.get('OUTBOX_FROM_EMAIL', 'no-reply@warmupmaster.com')
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 50))
+OUTBOX_POLL_SECONDS = float(os.environ.get('OUTBOX_POLL_SECONDS', 5))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+OUTBOX_LEASE_SECONDS = 300
+
+class SMTPConnectionPool:
+    """Keeps authenticated SMTP connections open across outbox batches"""
+    
+    def __init__(self, host: str, port: int, username: Optional[str], password: Optional[str],
+                 use_tls: bool, size: int = 2):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self._idle: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue(maxsize=size)
+    
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server
+    
+    def _acquire(self) -> smtplib.SMTP:
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except smtplib.SMTPException:
+                pass
+            self._close(server)
+    
+    def _release(self, server: smtplib.SMTP):
+        try:
+            self._idle.put_nowait(server)
+        except queue.Full:
+            self._close(server)
+    
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            pass
+    
+    def send_batch(self, messages: List[EmailMessage]) -> List[Optional[str]]:
+        """Send messages over one pooled connection; returns an error (or None) per message"""
+        errors: List[Optional[str]] = []
+        server = None
+        for message in messages:
+            try:
+                if server is None:
+                    server = self._acquire()
+                server.send_message(message)
+                errors.append(None)
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                # Connection-level failure: drop it and reconnect for the rest
+                if server is not None:
+                    self._close(server)
+                server = None
+                errors.append(f"Connection error: {e}")
+            except smtplib.SMTPException as e:
+                errors.append(str(e))
+        if server is not None:
+            self._release(server)
+        return errors
+    
+    def close(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+outbox_smtp_pool = SMTPConnectionPool(
+    OUTBOX_SMTP_HOST, OUTBOX_SMTP_PORT, OUTBOX_SMTP_USERNAME, OUTBOX_SMTP_PASSWORD, OUTBOX_SMTP_USE_TLS
+) if OUTBOX_SMTP_HOST else None
+
+async def enqueue_email(to: str, subject: str, body: str, kind: str = "notification") -> OutboxEmail:
+    """Queue a transactional email; delivery happens in the outbox worker"""
+    email = OutboxEmail(to=to, subject=subject, body=body, kind=kind)
+    
+    email_dict = email.model_dump()
+    email_dict['next_attempt_at'] = email_dict['next_attempt_at'].isoformat()
+    email_dict['created_at'] = email_dict['created_at'].isoformat()
+    
+    await db.email_outbox.insert_one(email_dict)
+    
+    return email
+
+def _outbox_message(email_doc: dict) -> EmailMessage:
+    message = EmailMessage()
+    message['From'] = OUTBOX_FROM_EMAIL
+    message['To'] = email_doc['to']
+    message['Subject'] = email_doc['subject']
+    message.set_content(email_doc['body'])
+    return message
+
+async def deliver_outbox_batch() -> int:
+    """Claim a batch of due outbox emails, send them, and record outcomes"""
+    now = datetime.now(timezone.utc)
+    due = {"$or": [
+        {"status": "pending", "next_attempt_at": {"$lte": now.isoformat()}},
+        # Reclaim batches whose worker died mid-send
+        {"status": "sending", "lease_expires_at": {"$lt": now.isoformat()}}
+    ]}
+    
+    candidates = await db.email_outbox.find(due, {"_id": 0, "id": 1}).limit(OUTBOX_BATCH_SIZE).to_list(OUTBOX_BATCH_SIZE)
+    if not candidates:
+        return 0
+    
+    lease = str(uuid.uuid4())
+    await db.email_outbox.update_many(
+        {"$and": [due, {"id": {"$in": [c['id'] for c in candidates]}}]},
+        {"$set": {
+            "status": "sending",
+            "lease": lease,
+            "lease_expires_at": (now + timedelta(seconds=OUTBOX_LEASE_SECONDS)).isoformat()
+        }}
+    )
+    batch = await db.email_outbox.find({"lease": lease, "status": "sending"}, {"_id": 0}).to_list(None)
+    if not batch:
+        return 0
+    
+    errors = await asyncio.to_thread(outbox_smtp_pool.send_batch, [_outbox_message(doc) for doc in batch])
+    
+    updates = []
+    for email_doc, error in zip(batch, errors):
+        if error is None:
+            updates.append(UpdateOne({"id": email_doc['id']}, {
+                "$set": {"status": "sent", "sent_at": datetime.now(timezone.utc).isoformat(), "last_error": None},
+                "$inc": {"attempts": 1},
+                "$unset": {"lease": "", "lease_expires_at": ""}
+            }))
+            outbox_deliveries.inc("sent")
+            continue
+        
+        attempts = email_doc.get('attempts', 0) + 1
+        outbox_deliveries.inc("failed" if attempts >= OUTBOX_MAX_ATTEMPTS else "retry")
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=min(3600, 30 * 2 ** attempts))
+        updates.append(UpdateOne({"id": email_doc['id']}, {
+            "$set": {
+                "status": "failed" if attempts >= OUTBOX_MAX_ATTEMPTS else "pending",
+                "attempts": attempts,
+                "last_error": error,
+                "next_attempt_at": retry_at.isoformat()
+            },
+            "$unset": {"lease": "", "lease_expires_at": ""}
+        }))
+        logging.warning(f"Outbox delivery to {email_doc['to']} failed (attempt {attempts}): {error}")
+    
+    await db.email_outbox.bulk_write(updates, ordered=False)
+    
+    return len(batch)
+
+async def run_outbox_worker():
+    """Background loop draining the email outbox"""
+    while True:
+        try:
+            delivered = await deliver_outbox_batch()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Outbox worker error: {e}")
+            delivered = 0
+        if delivered < OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(OUTBOX_POLL_SECONDS)
+
+# ============= BOUNCE & COMPLAINT INGESTION =============
+
+BOUNCE_MAILDIR = os.environ.get('BOUNCE_MAILDIR')
+BOUNCE_IMAP_HOST = os.environ.get('BOUNCE_IMAP_HOST')
+BOUNCE_IMAP_PORT = int(os.environ.get('BOUNCE_IMAP_PORT', 993))
+BOUNCE_IMAP_USERNAME = os.environ.get('BOUNCE_IMAP_USERNAME')
+BOUNCE_IMAP_PASSWORD = os.environ.get('BOUNCE_IMAP_PASSWORD')
+BOUNCE_IMAP_FOLDER = os.environ.get('BOUNCE_IMAP_FOLDER', 'INBOX')
+BOUNCE_IMAP_USE_SSL = os.environ.get('BOUNCE_IMAP_USE_SSL', 'true').lower() == 'true'
+BOUNCE_INGEST_BATCH_SIZE = int(os.environ.get('BOUNCE_INGEST_BATCH_SIZE', 1000))
+BOUNCE_INGEST_INTERVAL_SECONDS = int(os.environ.get('BOUNCE_INGEST_INTERVAL_SECONDS', 60))
+
+def bounce_source():
+    """Configured report mailbox; a local Maildir takes precedence over IMAP"""
+    if BOUNCE_MAILDIR:
+        return MaildirSource(BOUNCE_MAILDIR)
+    if BOUNCE_IMAP_HOST:
+        return IMAPSource(
+            BOUNCE_IMAP_HOST, BOUNCE_IMAP_PORT, BOUNCE_IMAP_USERNAME, BOUNCE_IMAP_PASSWORD,
+            BOUNCE_IMAP_FOLDER, BOUNCE_IMAP_USE_SSL
+        )
+    return None
+
+def _parse_reports(messages: List[tuple]) -> List:
+    reports = []
+    for _, raw in messages:
+        try:
+            reports.extend(parse_report(raw))
+        except Exception as e:
+            logging.warning(f"Unparseable bounce report skipped: {e}")
+    return reports
+
+async def apply_delivery_reports(reports: List) -> Dict[str, int]:
+    """
+    Fold a batch of parsed reports into counters and the suppression list.
+    
+    Every collection is touched with one read and one bulk_write per batch, no
+    matter how many reports it holds.
+    """
+    stats = {"hard_bounce": 0, "soft_bounce": 0, "spam_complaint": 0, "unattributed": 0}
+    if not reports:
+        return stats
+    
+    campaign_ids = {r.campaign_id for r in reports if r.campaign_id}
+    account_ids = {r.sending_account_id for r in reports if r.sending_account_id}
+    campaigns = {
+        c['id']: c for c in await db.campaigns.find(
+            {"id": {"$in": list(campaign_ids)}}, {"_id": 0, "id": 1, "user_id": 1, "domain_id": 1}
+        ).to_list(None)
+    } if campaign_ids else {}
+    accounts = {
+        a['id']: a for a in await db.sending_accounts.find(
+            {"id": {"$in": list(account_ids)}}, {"_id": 0, "id": 1, "user_id": 1}
+        ).to_list(None)
+    } if account_ids else {}
+    
+    # Reports without usable headers (stripped by the remote MTA, or mail sent without them)
+    # fall back to the tenants whose sent campaigns listed the recipient. Anyone can mail a
+    # report in, so merely having the address as a contact is not enough to suppress it.
+    unresolved = {
+        r.recipient for r in reports
+        if r.kind != "soft_bounce" and r.campaign_id not in campaigns and r.sending_account_id not in accounts
+    }
+    recipient_senders: Dict[str, set] = {}
+    if unresolved:
+        async for sent in db.campaigns.find(
+            {"recipients": {"$in": list(unresolved)}, "status": {"$ne": "draft"}},
+            {"_id": 0, "user_id": 1, "recipients": 1}
+        ):
+            for address in unresolved.intersection(r.lower() for r in sent['recipients']):
+                recipient_senders.setdefault(address, set()).add(sent['user_id'])
+    
+    campaign_incs: Dict[str, Dict[str, int]] = {}
+    account_incs: Dict[str, Dict[str, int]] = {}
+    suppressions: Dict[tuple, tuple] = {}  # (user_id, email) -> (reason, source)
+    
+    for report in reports:
+        stats[report.kind] += 1
+        if report.kind == "soft_bounce":
+            continue  # transient; the recipient stays mailable
+        
+        campaign = campaigns.get(report.campaign_id)
+        account = accounts.get(report.sending_account_id)
+        user_id = (campaign or account or {}).get('user_id')
+        user_ids = [user_id] if user_id else sorted(recipient_senders.get(report.recipient, ()))
+        if not user_ids:
+            stats["unattributed"] += 1
+            continue
+        
+        if campaign:
+            counter = "bounce_count" if report.kind == "hard_bounce" else "spam_count"
+            incs = campaign_incs.setdefault(campaign['id'], {})
+            incs[counter] = incs.get(counter, 0) + 1
+        if account:
+            counter = "total_bounces" if report.kind == "hard_bounce" else "total_spam_complaints"
+            incs = account_incs.setdefault(account['id'], {})
+            incs[counter] = incs.get(counter, 0) + 1
+        
+        # A complaint outranks a bounce for the same address
+        for owner_id in user_ids:
+            key = (owner_id, report.recipient)
+            if key not in suppressions or report.kind == "spam_complaint":
+                suppressions[key] = (report.kind, report.campaign_id or report.sending_account_id)
+    
+    if campaign_incs:
+        await db.campaigns.bulk_write([
+            UpdateOne({"id": campaign_id}, {"$inc": incs}) for campaign_id, incs in campaign_incs.items()
+        ], ordered=False)
+    
+    if account_incs:
+        # Rates are recomputed from the totals in the same write
+        total = lambda field, inc: {"$add": [{"$ifNull": [f"${field}", 0]}, inc]}
+        rate = lambda rate_field, field, inc: {"$cond": [
+            {"$gt": [{"$ifNull": ["$total_emails_sent", 0]}, 0]},
+            {"$round": [{"$multiply": [{"$divide": [total(field, inc), "$total_emails_sent"]}, 100]}, 2]},
+            {"$ifNull": [f"${rate_field}", 0]}
+        ]}
+        now = datetime.now(timezone.utc).isoformat()
+        await db.sending_accounts.bulk_write([
+            UpdateOne({"id": account_id}, [{"$set": {
+                "total_bounces": total("total_bounces", incs.get("total_bounces", 0)),
+                "total_spam_complaints": total("total_spam_complaints", incs.get("total_spam_complaints", 0)),
+                "bounce_rate": rate("bounce_rate", "total_bounces", incs.get("total_bounces", 0)),
+                "spam_rate": rate("spam_rate", "total_spam_complaints", incs.get("total_spam_complaints", 0)),
+                "updated_at": now
+            }}])
+            for account_id, incs in account_incs.items()
+        ], ordered=False)
+    
+    if suppressions:
+        now = datetime.now(timezone.utc).isoformat()
+        try:
+            await db.suppressed_emails.bulk_write([
+                UpdateOne(
+                    {"user_id": user_id, "email": email_address},
+                    {"$setOnInsert": {
+                        "id": str(uuid.uuid4()),
+                        "user_id": user_id,
+                        "email": email_address,
+                        "reason": reason,
+                        "source": source,
+                        "created_at": now
+                    }},
+                    upsert=True
+                )
+                for (user_id, email_address), (reason, source) in suppressions.items()
+            ], ordered=False)
+        except BulkWriteError as e:
+            # Another worker upserted the same address first; the unique index kept one row
+            if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+                raise
+        
+        emails_by_user: Dict[str, List[str]] = {}
+        for user_id, email_address in suppressions:
+            emails_by_user.setdefault(user_id, []).append(email_address)
+        await db.contacts.bulk_write([
+            UpdateMany({"user_id": user_id, "email": {"$in": emails}}, {"$set": {"is_suppressed": True}})
+            for user_id, emails in emails_by_user.items()
+        ], ordered=False)
+        for user_id in emails_by_user:
+            invalidate_user_views(user_id)
+    
+    # Re-evaluate auto-pause only for what this batch touched
+    domain_ids = {campaigns[campaign_id]['domain_id'] for campaign_id in campaign_incs}
+    await asyncio.gather(
+        *(check_domain_health(domain_id) for domain_id in domain_ids),
+        *(check_sending_account_health(account_id) for account_id in account_incs)
+    )
+    
+    return stats
+
+async def ingest_bounce_reports() -> Dict[str, int]:
+    """Drain the report mailbox in batches; messages are acked only after their batch is applied"""
+    source = bounce_source()
+    if source is None:
+        return {}
+    
+    started = time.perf_counter()
+    totals = {"messages": 0, "hard_bounce": 0, "soft_bounce": 0, "spam_complaint": 0, "unattributed": 0}
+    try:
+        while True:
+            messages = await asyncio.to_thread(source.fetch, BOUNCE_INGEST_BATCH_SIZE)
+            if not messages:
+                break
+            
+            reports = await asyncio.to_thread(_parse_reports, messages)
+            stats = await apply_delivery_reports(reports)
+            await asyncio.to_thread(source.ack, [key for key, _ in messages])
+            
+            totals["messages"] += len(messages)
+            for kind, count in stats.items():
+                totals[kind] += count
+            if len(messages) < BOUNCE_INGEST_BATCH_SIZE:
+                break
+    finally:
+        await asyncio.to_thread(source.close)
+    
+    record_job_run("bounce_ingestion", started, totals["messages"])
+    if totals["messages"]:
+        logging.info(f"Bounce ingestion: {totals}")
+    return totals
+
 # ============= API ROUTES =============
 
 @api_router.post("/auth/register", response_model=TokenResponse)
-async def register(user_input: UserCreate):
+async def register(user_input: UserCreate, request: Request):
+    await enforce_rate_limits([(register_ip_limiter, get_client_ip(request))])
+    
     # Check if user exists
     existing = await db.users.find_one({"email": user_input.email}, {"_id": 0})
     if existing:
@@ -719,21 +2008,25 @@ async def register(user_input: UserCreate):
     )
     
     user_dict = user.model_dump()
-    user_dict['password'] = hash_password(user_input.password)
+    user_dict['password'] = await hash_password_async(user_input.password)
     user_dict['created_at'] = user_dict['created_at'].isoformat()
     
     await db.users.insert_one(user_dict)
     
-    token = create_token(user.id)
-    return TokenResponse(token=token, user=user)
+    return issue_tokens(user)
 
 @api_router.post("/auth/login", response_model=TokenResponse)
-async def login(credentials: UserLogin):
+async def login(credentials: UserLogin, request: Request):
+    await enforce_rate_limits([
+        (login_ip_limiter, get_client_ip(request)),
+        (login_email_limiter, credentials.email.lower())
+    ])
+    
     user_doc = await db.users.find_one({"email": credentials.email}, {"_id": 0})
     if not user_doc:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not verify_password(credentials.password, user_doc['password']):
+    if not await verify_password_async(credentials.password, user_doc['password']):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Auto-upgrade founder account if needed
@@ -750,14 +2043,48 @@ async def login(credentials: UserLogin):
             user_doc['plan'] = 'enterprise_internal'
             user_doc['role'] = 'founder'
             user_doc['billing_status'] = 'exempt'
+            # Plan changed: tokens carrying the old plan claim must not be honoured
+            user_doc['token_version'] = await revoke_user_tokens(user_doc['id'])
     
     if isinstance(user_doc['created_at'], str):
         user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
     
     user = User(**{k: v for k, v in user_doc.items() if k != 'password'})
-    token = create_token(user.id)
+    invalidate_cached_user(user.id)
+    
+    return issue_tokens(user, user_doc.get('token_version', 0))
+
+@api_router.post("/auth/refresh", response_model=TokenResponse)
+async def refresh_token(request: RefreshTokenRequest):
+    """Exchange a refresh token for a new access token"""
+    try:
+        payload = jwt.decode(request.refresh_token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    
+    if payload.get('type') != 'refresh':
+        raise HTTPException(status_code=401, detail="Invalid token")
+    
+    user_doc = await db.users.find_one({"id": payload.get('user_id')}, {"_id": 0, "password": 0})
+    if not user_doc:
+        raise HTTPException(status_code=401, detail="User not found")
     
-    return TokenResponse(token=token, user=user)
+    token_version = user_doc.get('token_version', 0)
+    if payload.get('tv', 0) != token_version:
+        raise HTTPException(status_code=401, detail="Token revoked")
+    
+    if isinstance(user_doc['created_at'], str):
+        user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
+    
+    return issue_tokens(User(**user_doc), token_version)
+
+@api_router.post("/auth/logout")
+async def logout(current_user: User = Depends(get_current_user)):
+    """Sign out: revokes every access and refresh token issued to the user so far"""
+    await revoke_user_tokens(current_user.id)
+    return {"message": "Logged out"}
 
 @api_router.get("/auth/me", response_model=User)
 async def get_me(current_user: User = Depends(get_current_user)):
@@ -765,27 +2092,84 @@ async def get_me(current_user: User = Depends(get_current_user)):
 
 @api_router.get("/dashboard/stats", response_model=DashboardStats)
 async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
-    # Get all domains for user
-    domains = await db.domains.find({"user_id": current_user.id}, {"_id": 0}).to_list(None)
+    cached = user_view_cache.get((current_user.id, "dashboard_stats"))
+    if cached is not None:
+        return cached
+    
+    # Single aggregation: domain docs plus active campaigns (unioned in), summarised
+    # server-side with $facet so only the five numbers cross the wire
+    pipeline = [
+        {"$match": {"user_id": current_user.id}},
+        {"$project": {
+            "_id": 0,
+            "kind": "domain",
+            "sent_today": {"$ifNull": ["$sent_today", 0]},
+            "warmup_completed": {"$ifNull": ["$warmup_completed", False]},
+            "health_score": {"$ifNull": ["$health_score", 100]}
+        }},
+        {"$unionWith": {
+            "coll": "campaigns",
+            "pipeline": [
+                {"$match": {"user_id": current_user.id, "status": {"$in": ["scheduled", "sending"]}}},
+                {"$project": {"_id": 0, "kind": "campaign"}}
+            ]
+        }},
+        {"$facet": {
+            "domains": [
+                {"$match": {"kind": "domain"}},
+                {"$group": {
+                    "_id": None,
+                    "total_domains": {"$sum": 1},
+                    "emails_sent_today": {"$sum": "$sent_today"},
+                    "domains_in_warmup": {"$sum": {"$cond": ["$warmup_completed", 0, 1]}},
+                    "average_health_score": {"$avg": "$health_score"}
+                }}
+            ],
+            "campaigns": [
+                {"$match": {"kind": "campaign"}},
+                {"$count": "active_campaigns"}
+            ]
+        }}
+    ]
+    
+    result = await db.domains.aggregate(pipeline).to_list(1)
+    facets = result[0] if result else {}
+    domain_stats = facets.get('domains') or [{}]
+    campaign_stats = facets.get('campaigns') or [{}]
+    domain_stats = domain_stats[0]
+    # No domains -> 100; a real average of 0 must stay 0
+    average_health = domain_stats.get('average_health_score')
+    
+    stats = DashboardStats(
+        total_domains=domain_stats.get('total_domains', 0),
+        active_campaigns=campaign_stats[0].get('active_campaigns', 0),
+        emails_sent_today=domain_stats.get('emails_sent_today', 0),
+        domains_in_warmup=domain_stats.get('domains_in_warmup', 0),
+        average_health_score=round(average_health if average_health is not None else 100, 1)
+    )
+    user_view_cache.set((current_user.id, "dashboard_stats"), stats)
     
-    # Get all campaigns
-    campaigns = await db.campaigns.find({"user_id": current_user.id}, {"_id": 0}).to_list(None)
+    return stats
+
+@api_router.get("/usage", response_model=UsageResponse)
+async def get_usage(current_user: User = Depends(get_current_user)):
+    usage_doc = await db.usage.find_one({"user_id": current_user.id}, {"_id": 0, "user_id": 0})
+    if not usage_doc:
+        await seed_usage(current_user.id)
+        usage_doc = await db.usage.find_one({"user_id": current_user.id}, {"_id": 0, "user_id": 0}) or {}
     
-    total_sent_today = sum(d.get('sent_today', 0) for d in domains)
-    domains_in_warmup = sum(1 for d in domains if not d.get('warmup_completed', False))
-    active_campaigns = sum(1 for c in campaigns if c.get('status') in ['scheduled', 'sending'])
-    avg_health = sum(d.get('health_score', 100) for d in domains) / len(domains) if domains else 100
-    
-    return DashboardStats(
-        total_domains=len(domains),
-        active_campaigns=active_campaigns,
-        emails_sent_today=total_sent_today,
-        domains_in_warmup=domains_in_warmup,
-        average_health_score=round(avg_health, 1)
+    return UsageResponse(
+        plan=current_user.plan,
+        usage={resource: usage_doc.get(resource, 0) for resource in USAGE_RESOURCES},
+        limits=get_plan_limits(current_user.plan, current_user.email)
     )
 
 @api_router.get("/domains", response_model=List[Domain])
 async def get_domains(current_user: User = Depends(get_current_user)):
+    cached = user_view_cache.get((current_user.id, "domains"))
+    if cached is not None:
+        return cached
+    
     domains = await db.domains.find({"user_id": current_user.id}, {"_id": 0}).to_list(None)
     
     for domain in domains:
@@ -794,19 +2178,13 @@ async def get_domains(current_user: User = Depends(get_current_user)):
         if isinstance(domain.get('last_reset'), str):
             domain['last_reset'] = datetime.fromisoformat(domain['last_reset'])
     
+    user_view_cache.set((current_user.id, "domains"), domains)
+    
     return domains
 
 @api_router.post("/domains", response_model=Domain)
 async def create_domain(domain_input: DomainCreate, current_user: User = Depends(get_current_user)):
-    # Check plan limits
     plan_limits = get_plan_limits(current_user.plan, current_user.email)
-    existing_domains = await db.domains.count_documents({"user_id": current_user.id})
-    
-    if existing_domains >= plan_limits['max_domains']:
-        raise HTTPException(
-            status_code=403,
-            detail=f"Plan limit reached. Upgrade to add more domains. Current limit: {plan_limits['max_domains']}"
-        )
     
     # Check if mode is allowed for plan
     if domain_input.mode not in plan_limits['modes']:
@@ -820,6 +2198,13 @@ async def create_domain(domain_input: DomainCreate, current_user: User = Depends
     if existing:
         raise HTTPException(status_code=400, detail="Domain already added")
     
+    # Check plan limits: reserve a slot atomically so concurrent creates cannot both pass
+    if not await reserve_usage(current_user.id, "domains", plan_limits['max_domains']):
+        raise HTTPException(
+            status_code=403,
+            detail=f"Plan limit reached. Upgrade to add more domains. Current limit: {plan_limits['max_domains']}"
+        )
+    
     # Create domain with warmup
     domain = Domain(
         user_id=current_user.id,
@@ -833,7 +2218,12 @@ async def create_domain(domain_input: DomainCreate, current_user: User = Depends
     domain_dict['created_at'] = domain_dict['created_at'].isoformat()
     domain_dict['last_reset'] = domain_dict['last_reset'].isoformat()
     
-    await db.domains.insert_one(domain_dict)
+    try:
+        await db.domains.insert_one(domain_dict)
+    except Exception:
+        await release_usage(current_user.id, "domains")
+        raise
+    invalidate_user_views(current_user.id)
     
     return domain
 
@@ -866,12 +2256,88 @@ async def validate_domain(domain_id: str, current_user: User = Depends(get_curre
             "dmarc_valid": True
         }}
     )
+    invalidate_user_views(current_user.id)
     
     return {"message": "Domain validated successfully", "spf": True, "dkim": True, "dmarc": True}
 
-@api_router.get("/contacts", response_model=List[Contact])
-async def get_contacts(current_user: User = Depends(get_current_user)):
-    contacts = await db.contacts.find({"user_id": current_user.id}, {"_id": 0}).to_list(None)
+def contact_search_keys(contact: Contact) -> List[str]:
+    """Lowercased values a contact can be prefix-searched by (stored, indexed)"""
+    full_name = " ".join(part.strip() for part in (contact.first_name, contact.last_name) if part and part.strip())
+    values = [contact.email, contact.first_name, contact.last_name, full_name, contact.company]
+    return sorted({v.strip().lower() for v in values if v and v.strip()})
+
+# Serves the user_id equality, the (email, id) order and the search_keys prefix
+# (checked on index keys, before any fetch) for every search
+CONTACT_SEARCH_INDEX = [("user_id", 1), ("email", 1), ("id", 1), ("search_keys", 1)]
+
+def encode_contact_cursor(contact: Dict[str, Any]) -> str:
+    raw = json.dumps([contact['email'], contact['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_contact_cursor(after: str) -> tuple:
+    try:
+        email, contact_id = json.loads(base64.urlsafe_b64decode(after + "=" * (-len(after) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(email, str) or not isinstance(contact_id, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return email, contact_id
+
+@api_router.get("/contacts/search", response_model=ContactSearchResponse)
+async def search_contacts(
+    q: Optional[str] = None,
+    tags: List[str] = Query(default=[]),
+    is_suppressed: Optional[bool] = None,
+    after: Optional[str] = None,
+    page_size: int = Query(default=25, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """Prefix search on email, name and company with exact tag/suppression filters.
+
+    Pages are keyset-paginated on (email, id): pass the previous page's
+    next_cursor as ``after``, so each page costs the same however deep it is.
+    """
+    query: Dict[str, Any] = {"user_id": current_user.id}
+    
+    term = (q or "").strip().lower()
+    if term:
+        # Anchored, case-sensitive regex on pre-lowercased keys -> index bounds on search_keys
+        query["search_keys"] = {"$regex": f"^{re.escape(term)}"}
+    if tags:
+        query["tags"] = {"$all": tags}
+    if is_suppressed is not None:
+        query["is_suppressed"] = is_suppressed
+    if after:
+        after_email, after_id = decode_contact_cursor(after)
+        # A range on email keeps the index walk ordered; id breaks ties on the boundary email
+        query["email"] = {"$gte": after_email}
+        query["$nor"] = [{"email": after_email, "id": {"$lte": after_id}}]
+    
+    cursor = (
+        db.contacts.find(query, {"_id": 0, "search_keys": 0})
+        .sort([("email", 1), ("id", 1)])
+        .hint(CONTACT_SEARCH_INDEX)
+    )
+    
+    # Fetch one extra document to know whether another page exists without counting
+    contacts = await cursor.limit(page_size + 1).to_list(page_size + 1)
+    has_more = len(contacts) > page_size
+    contacts = contacts[:page_size]
+    
+    for contact in contacts:
+        if isinstance(contact.get('created_at'), str):
+            contact['created_at'] = datetime.fromisoformat(contact['created_at'])
+    
+    return ContactSearchResponse(
+        contacts=contacts,
+        page_size=page_size,
+        has_more=has_more,
+        next_cursor=encode_contact_cursor(contacts[-1]) if has_more else None
+    )
+
+@api_router.get("/contacts", response_model=List[Contact])
+async def get_contacts(current_user: User = Depends(get_current_user)):
+    contacts = await db.contacts.find({"user_id": current_user.id}, {"_id": 0}).to_list(None)
     
     for contact in contacts:
         if isinstance(contact.get('created_at'), str):
@@ -893,13 +2359,71 @@ async def create_contact(contact_input: ContactCreate, current_user: User = Depe
     
     contact_dict = contact.model_dump()
     contact_dict['created_at'] = contact_dict['created_at'].isoformat()
+    contact_dict['search_keys'] = contact_search_keys(contact)
     
-    await db.contacts.insert_one(contact_dict)
+    # Reserve before inserting: seeding a missing usage document counts existing rows
+    await reserve_usage(current_user.id, "contacts")
+    try:
+        await db.contacts.insert_one(contact_dict)
+    except Exception:
+        await release_usage(current_user.id, "contacts")
+        raise
     
     return contact
 
+def segment_contact_query(user_id: str, segment: dict) -> Dict[str, Any]:
+    """Mongo filter selecting the sendable contacts of a segment"""
+    query: Dict[str, Any] = {"user_id": user_id, "is_suppressed": {"$ne": True}}
+    tags = segment.get('tags') or []
+    if tags:
+        query["tags"] = {"$all": tags} if segment.get('tag_match') == "all" else {"$in": tags}
+    return query
+
+@api_router.get("/segments", response_model=List[Segment])
+async def get_segments(current_user: User = Depends(get_current_user)):
+    segments = await db.segments.find({"user_id": current_user.id}, {"_id": 0}).to_list(None)
+    
+    for segment in segments:
+        if isinstance(segment.get('created_at'), str):
+            segment['created_at'] = datetime.fromisoformat(segment['created_at'])
+    
+    return segments
+
+@api_router.post("/segments", response_model=Segment)
+async def create_segment(segment_input: SegmentCreate, current_user: User = Depends(get_current_user)):
+    if segment_input.tag_match not in ("any", "all"):
+        raise HTTPException(status_code=400, detail="tag_match must be 'any' or 'all'")
+    
+    segment = Segment(
+        user_id=current_user.id,
+        **segment_input.model_dump()
+    )
+    
+    segment_dict = segment.model_dump()
+    segment_dict['created_at'] = segment_dict['created_at'].isoformat()
+    
+    await db.segments.insert_one(segment_dict)
+    
+    return segment
+
+@api_router.delete("/segments/{segment_id}")
+async def delete_segment(segment_id: str, current_user: User = Depends(get_current_user)):
+    result = await db.segments.delete_one({
+        "id": segment_id,
+        "user_id": current_user.id
+    })
+    
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Segment not found")
+    
+    return {"message": "Segment deleted successfully"}
+
 @api_router.get("/campaigns", response_model=List[Campaign])
 async def get_campaigns(current_user: User = Depends(get_current_user)):
+    cached = user_view_cache.get((current_user.id, "campaigns"))
+    if cached is not None:
+        return cached
+    
     campaigns = await db.campaigns.find({"user_id": current_user.id}, {"_id": 0}).to_list(None)
     
     for campaign in campaigns:
@@ -907,9 +2431,42 @@ async def get_campaigns(current_user: User = Depends(get_current_user)):
             campaign['created_at'] = datetime.fromisoformat(campaign['created_at'])
         if campaign.get('scheduled_at') and isinstance(campaign['scheduled_at'], str):
             campaign['scheduled_at'] = datetime.fromisoformat(campaign['scheduled_at'])
+        if campaign.get('content_scored_at') and isinstance(campaign['content_scored_at'], str):
+            campaign['content_scored_at'] = datetime.fromisoformat(campaign['content_scored_at'])
+    
+    user_view_cache.set((current_user.id, "campaigns"), campaigns)
     
     return campaigns
 
+# Sends at or above the block threshold are refused; at or above the throttle
+# threshold they go out with an extra delay between recipients
+CONTENT_BLOCK_THRESHOLD = int(os.environ.get('CONTENT_BLOCK_THRESHOLD', 75))
+CONTENT_THROTTLE_THRESHOLD = int(os.environ.get('CONTENT_THROTTLE_THRESHOLD', 50))
+CONTENT_THROTTLE_DELAY_SECONDS = float(os.environ.get('CONTENT_THROTTLE_DELAY_SECONDS', 2))
+
+def score_campaign_content(subject: str, body: str, mode: str) -> Dict[str, Any]:
+    """Content gate fields to persist on a campaign.
+
+    Scored in-process (local classifier, else the rule engine) so creating,
+    editing or sending a campaign never waits on the LLM; the deep AI analysis
+    stays available on demand through /spam-score.
+    """
+    try:
+        if spam_classifier is not None:
+            result = _local_spam_score(subject, body, mode)
+        else:
+            result = _basic_spam_heuristics(subject, body, mode)
+    except Exception as e:
+        logging.error(f"Campaign content scoring failed: {e}")
+        result = _basic_spam_heuristics(subject, body, mode)
+    
+    return {
+        "content_score": result.score,
+        "content_risk_level": result.risk_level,
+        "content_hash": spam_content_hash(subject, body, mode),
+        "content_scored_at": datetime.now(timezone.utc).isoformat()
+    }
+
 @api_router.post("/campaigns", response_model=Campaign)
 async def create_campaign(campaign_input: CampaignCreate, current_user: User = Depends(get_current_user)):
     # Verify domain ownership
@@ -928,28 +2485,100 @@ async def create_campaign(campaign_input: CampaignCreate, current_user: User = D
     if domain.is_paused:
         raise HTTPException(status_code=403, detail=f"Domain is paused: {domain.pause_reason}")
     
+    if bool(campaign_input.recipients) == bool(campaign_input.segment_id):
+        raise HTTPException(status_code=400, detail="Provide either recipients or a segment_id")
+    
+    if campaign_input.segment_id:
+        segment_doc = await db.segments.find_one({"id": campaign_input.segment_id, "user_id": current_user.id}, {"_id": 0})
+        if not segment_doc:
+            raise HTTPException(status_code=404, detail="Segment not found")
+        recipient_count = await db.contacts.count_documents(segment_contact_query(current_user.id, segment_doc))
+    else:
+        recipient_count = len(campaign_input.recipients)
+    
     # Check daily limit
     remaining = domain.daily_limit - domain.sent_today
-    if len(campaign_input.recipients) > remaining:
+    if recipient_count > remaining:
         raise HTTPException(
             status_code=403,
             detail=f"Daily limit would be exceeded. Remaining today: {remaining}"
         )
     
+    content_fields = score_campaign_content(campaign_input.subject, campaign_input.body, domain.mode)
+    
     campaign = Campaign(
         user_id=current_user.id,
-        **campaign_input.model_dump()
+        **campaign_input.model_dump(),
+        **content_fields
     )
     
     campaign_dict = campaign.model_dump()
     campaign_dict['created_at'] = campaign_dict['created_at'].isoformat()
+    campaign_dict['content_scored_at'] = campaign_dict['content_scored_at'].isoformat()
     if campaign_dict.get('scheduled_at'):
         campaign_dict['scheduled_at'] = campaign_dict['scheduled_at'].isoformat()
     
     await db.campaigns.insert_one(campaign_dict)
+    invalidate_user_views(current_user.id)
     
     return campaign
 
+@api_router.patch("/campaigns/{campaign_id}", response_model=Campaign)
+async def update_campaign(campaign_id: str, update: CampaignUpdate, current_user: User = Depends(get_current_user)):
+    """Edit a draft; content is rescored only when subject or body actually changed"""
+    campaign_doc = await db.campaigns.find_one({"id": campaign_id, "user_id": current_user.id}, {"_id": 0})
+    if not campaign_doc:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    if campaign_doc.get('status') != "draft":
+        raise HTTPException(status_code=400, detail="Only draft campaigns can be edited")
+    
+    update_fields = update.model_dump(exclude_none=True)
+    if not update_fields:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    
+    if 'subject' in update_fields or 'body' in update_fields:
+        domain_doc = await db.domains.find_one({"id": campaign_doc['domain_id']}, {"_id": 0, "mode": 1})
+        mode = (domain_doc or {}).get('mode', "cold_outreach")
+        subject = update_fields.get('subject', campaign_doc['subject'])
+        body = update_fields.get('body', campaign_doc['body'])
+        if spam_content_hash(subject, body, mode) != campaign_doc.get('content_hash'):
+            update_fields.update(score_campaign_content(subject, body, mode))
+    
+    updated_doc = await db.campaigns.find_one_and_update(
+        {"id": campaign_id, "user_id": current_user.id, "status": "draft"},
+        {"$set": update_fields},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated_doc:
+        raise HTTPException(status_code=409, detail="Campaign is no longer a draft")
+    invalidate_user_views(current_user.id)
+    
+    for field in ('created_at', 'scheduled_at', 'content_scored_at'):
+        if updated_doc.get(field) and isinstance(updated_doc[field], str):
+            updated_doc[field] = datetime.fromisoformat(updated_doc[field])
+    
+    return Campaign(**updated_doc)
+
+async def iter_campaign_recipients(campaign: Campaign, segment_doc: Optional[dict] = None):
+    """Yield recipient emails after campaign.last_recipient, streaming segment members from a cursor"""
+    if segment_doc is None:
+        start = 0
+        if campaign.last_recipient in campaign.recipients:
+            start = campaign.recipients.index(campaign.last_recipient) + 1
+        for recipient in campaign.recipients[start:]:
+            yield recipient
+        return
+    
+    # Email order makes the last recipient sent a stable resume point
+    query = segment_contact_query(campaign.user_id, segment_doc)
+    if campaign.last_recipient:
+        query["email"] = {"$gt": campaign.last_recipient}
+    cursor = db.contacts.find(query, {"_id": 0, "email": 1}).sort("email", 1).batch_size(1000)
+    async for contact in cursor:
+        yield contact['email']
+
 @api_router.post("/campaigns/{campaign_id}/send")
 async def send_campaign(campaign_id: str, current_user: User = Depends(get_current_user)):
     campaign_doc = await db.campaigns.find_one({"id": campaign_id, "user_id": current_user.id}, {"_id": 0})
@@ -963,27 +2592,83 @@ async def send_campaign(campaign_id: str, current_user: User = Depends(get_curre
     
     campaign = Campaign(**campaign_doc)
     
-    if campaign.status != "draft":
+    # A paused campaign (stopped by a failed or throttled send) resumes after its last recipient
+    if campaign.status not in ("draft", "paused"):
         raise HTTPException(status_code=400, detail="Campaign already sent or in progress")
     
-    # Update campaign status
-    await db.campaigns.update_one({"id": campaign_id}, {"$set": {"status": "sending"}})
-    
-    # Send emails asynchronously
-    for recipient in campaign.recipients:
-        await send_email_mock(
-            domain_id=campaign.domain_id,
-            to=recipient,
-            subject=campaign.subject,
-            body=campaign.body,
-            campaign_id=campaign_id
+    # Content gate: reuse the stored score unless the content (or the domain's mode) changed
+    # since it was computed; campaigns created before the gate are scored here once
+    domain_doc = await db.domains.find_one({"id": campaign.domain_id}, {"_id": 0, "mode": 1})
+    mode = (domain_doc or {}).get('mode', "cold_outreach")
+    if campaign.content_score is None or campaign.content_hash != spam_content_hash(campaign.subject, campaign.body, mode):
+        content_fields = score_campaign_content(campaign.subject, campaign.body, mode)
+        await db.campaigns.update_one({"id": campaign_id}, {"$set": content_fields})
+        invalidate_user_views(current_user.id)
+        campaign.content_score = content_fields['content_score']
+    
+    if campaign.content_score >= CONTENT_BLOCK_THRESHOLD:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Campaign content spam score {campaign.content_score} is at or above {CONTENT_BLOCK_THRESHOLD}. Revise the content before sending."
         )
+    throttle_delay = CONTENT_THROTTLE_DELAY_SECONDS if campaign.content_score >= CONTENT_THROTTLE_THRESHOLD else 0
+    
+    segment_doc = None
+    if campaign.segment_id:
+        segment_doc = await db.segments.find_one({"id": campaign.segment_id, "user_id": current_user.id}, {"_id": 0})
+        if not segment_doc:
+            raise HTTPException(status_code=400, detail="Campaign segment no longer exists")
+    
+    # Update campaign status; the status filter keeps two requests from both starting the send
+    claimed = await db.campaigns.update_one(
+        {"id": campaign_id, "status": campaign.status},
+        {"$set": {"status": "sending"}}
+    )
+    if claimed.modified_count == 0:
+        raise HTTPException(status_code=409, detail="Campaign already sent or in progress")
+    invalidate_user_views(current_user.id)
+    
+    if throttle_delay:
+        # Throttled sends take recipients x delay; never hold the request open that long
+        task = asyncio.create_task(deliver_campaign(campaign, segment_doc, current_user.id, throttle_delay))
+        campaign_send_tasks.add(task)
+        task.add_done_callback(campaign_send_tasks.discard)
+        return {
+            "message": "Campaign queued with throttling due to content risk",
+            "content_score": campaign.content_score,
+            "status": "sending"
+        }
     
-    # Update campaign status to completed
-    await db.campaigns.update_one({"id": campaign_id}, {"$set": {"status": "completed"}})
-    
+    await deliver_campaign(campaign, segment_doc, current_user.id)
     return {"message": "Campaign sent successfully"}
 
+# Throttled campaign sends running in the background (referenced so they aren't collected)
+campaign_send_tasks: set = set()
+
+async def deliver_campaign(campaign: Campaign, segment_doc: Optional[dict], user_id: str, throttle_delay: float = 0):
+    """Send a campaign to every recipient, then mark it completed (paused if sending stops early)"""
+    status = "paused"
+    try:
+        async for recipient in iter_campaign_recipients(campaign, segment_doc):
+            await send_email_mock(
+                domain_id=campaign.domain_id,
+                to=recipient,
+                subject=campaign.subject,
+                body=campaign.body,
+                campaign_id=campaign.id,
+                user_id=user_id
+            )
+            if throttle_delay:
+                await asyncio.sleep(throttle_delay)
+        status = "completed"
+    except Exception as e:
+        logging.error(f"Sending campaign {campaign.id} failed: {e}")
+        if not throttle_delay:
+            raise
+    finally:
+        await db.campaigns.update_one({"id": campaign.id}, {"$set": {"status": status}})
+        invalidate_user_views(user_id)
+
 @api_router.get("/warmup-logs/{domain_id}", response_model=List[WarmupLog])
 async def get_warmup_logs(domain_id: str, current_user: User = Depends(get_current_user)):
     # Verify domain ownership
@@ -1028,7 +2713,10 @@ async def add_suppressed_email(email_input: SuppressedEmailCreate, current_user:
     suppressed_dict = suppressed.model_dump()
     suppressed_dict['created_at'] = suppressed_dict['created_at'].isoformat()
     
-    await db.suppressed_emails.insert_one(suppressed_dict)
+    try:
+        await db.suppressed_emails.insert_one(suppressed_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already suppressed")
     
     return suppressed
 
@@ -1074,13 +2762,24 @@ async def forgot_password(request: ForgotPasswordRequest):
     
     await db.password_reset_tokens.insert_one(token_data)
     
-    # In production, send actual email here
-    # For now, log the reset link
     reset_link = f"{os.environ.get('FRONTEND_URL', 'http://localhost:3000')}/reset-password?token={reset_token}"
-    logger.info(f"Password reset link for {request.email}: {reset_link}")
     
-    # TODO: Send actual email with template
-    # await send_password_reset_email(user_doc["email"], user_doc["full_name"], reset_link)
+    # Queued in the outbox; the background worker delivers it so we never wait on SMTP
+    await enqueue_email(
+        to=user_doc["email"],
+        subject="Reset your WarmUp Master password",
+        body=(
+            f"Hi {user_doc.get('full_name', '')},\n\n"
+            f"We received a request to reset your password. Use the link below within 1 hour:\n\n"
+            f"{reset_link}\n\n"
+            f"If you didn't request this, you can ignore this email."
+        ),
+        kind="password_reset"
+    )
+    
+    if outbox_smtp_pool is None:
+        # No SMTP configured (local dev): the log is the only way to get the link
+        logger.info(f"Password reset link for {request.email}: {reset_link}")
     
     return {"success": True, "message": "If that email exists, we sent a reset link"}
 
@@ -1133,7 +2832,7 @@ async def reset_password(request: ResetPasswordRequest):
         raise HTTPException(status_code=400, detail="Reset token has expired")
     
     # Hash new password
-    password_hash = hash_password(request.new_password)
+    password_hash = await hash_password_async(request.new_password)
     
     # Update user password
     await db.users.update_one(
@@ -1143,6 +2842,7 @@ async def reset_password(request: ResetPasswordRequest):
             "password_changed_at": datetime.now(timezone.utc).isoformat()
         }}
     )
+    await revoke_user_tokens(token_doc["user_id"])
     
     # Mark token as used
     await db.password_reset_tokens.update_one(
@@ -1156,12 +2856,111 @@ async def reset_password(request: ResetPasswordRequest):
 async def check_spam_score(request: SpamScoreRequest, current_user: User = Depends(get_current_user)):
     """Analyze email content for spam risk using AI"""
     try:
-        result = await analyze_spam_score(request.subject, request.body, request.mode)
+        result = await get_spam_score(request.subject, request.body, request.mode, request.deep)
         return result
     except Exception as e:
         logging.error(f"Spam score analysis failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to analyze spam score")
 
+def _sse_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+@api_router.post("/spam-score/stream")
+async def stream_spam_score(request: SpamScoreRequest, current_user: User = Depends(get_current_user)):
+    """Server-Sent Events: instant local score first, then the AI-refined score"""
+    async def events():
+        if spam_classifier is not None:
+            heuristic = _local_spam_score(request.subject, request.body, request.mode)
+        else:
+            heuristic = _basic_spam_heuristics(request.subject, request.body, request.mode)
+        yield _sse_event("heuristic", heuristic.model_dump_json())
+        
+        try:
+            refined = await get_spam_score(request.subject, request.body, request.mode, deep=True)
+            yield _sse_event("refined", refined.model_dump_json())
+        except Exception as e:
+            logging.error(f"Spam score analysis failed: {e}")
+            yield _sse_event("error", json.dumps({"detail": "Failed to analyze spam score"}))
+        
+        yield _sse_event("done", "{}")
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+SPAM_SCORE_BATCH_MAX_ITEMS = int(os.environ.get('SPAM_SCORE_BATCH_MAX_ITEMS', 50))
+SPAM_SCORE_BATCH_MAX_CONCURRENCY = int(os.environ.get('SPAM_SCORE_BATCH_MAX_CONCURRENCY', 5))
+SPAM_SCORE_ITEM_TIMEOUT_SECONDS = float(os.environ.get('SPAM_SCORE_ITEM_TIMEOUT_SECONDS', 20))
+
+async def _score_batch_item(index: int, item: SpamScoreRequest, semaphore: asyncio.Semaphore) -> SpamScoreBatchItem:
+    """Score one variant; a timeout or failure falls back to heuristics for that item only"""
+    async with semaphore:
+        try:
+            result = await asyncio.wait_for(
+                get_spam_score(item.subject, item.body, item.mode, item.deep),
+                timeout=SPAM_SCORE_ITEM_TIMEOUT_SECONDS
+            )
+            return SpamScoreBatchItem(index=index, result=result)
+        except asyncio.TimeoutError:
+            return SpamScoreBatchItem(
+                index=index,
+                result=_basic_spam_heuristics(item.subject, item.body, item.mode),
+                timed_out=True
+            )
+        except Exception as e:
+            logging.error(f"Spam score analysis failed for batch item {index}: {e}")
+            return SpamScoreBatchItem(index=index, result=_basic_spam_heuristics(item.subject, item.body, item.mode))
+
+@api_router.post("/spam-score/batch", response_model=SpamScoreBatchResponse)
+async def check_spam_score_batch(request: SpamScoreBatchRequest, stream: bool = False, current_user: User = Depends(get_current_user)):
+    """Score many variants concurrently; stream=true returns NDJSON lines as each completes"""
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No items to score")
+    if len(request.items) > SPAM_SCORE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {SPAM_SCORE_BATCH_MAX_ITEMS} items per batch")
+    
+    concurrency = min(request.concurrency or SPAM_SCORE_BATCH_MAX_CONCURRENCY, SPAM_SCORE_BATCH_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tasks = [
+        asyncio.create_task(_score_batch_item(index, item, semaphore))
+        for index, item in enumerate(request.items)
+    ]
+    
+    if stream:
+        async def stream_results():
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    item = await next_done
+                    yield item.model_dump_json() + "\n"
+            finally:
+                for task in tasks:
+                    task.cancel()
+        
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+    
+    return SpamScoreBatchResponse(results=await asyncio.gather(*tasks))
+
+@api_router.get("/system/stats")
+async def get_system_stats(current_user: User = Depends(get_current_user)):
+    """Internal cache and engine metrics (founder/admin only)"""
+    if current_user.role not in ("founder", "admin"):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    return {
+        "result_cache": user_view_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "bcrypt_pool": bcrypt_pool.stats(),
+        "spam_score_cache": spam_score_cache.stats(),
+        "smtp_verify_cache": smtp_verify_cache.stats(),
+        "spam_llm_breaker": spam_llm_breaker.stats(),
+        "rate_limit_rejections": {
+            limiter.name: limiter.rejected
+            for limiter in (login_ip_limiter, login_email_limiter, register_ip_limiter)
+        }
+    }
+
 # ============= SENDING ACCOUNTS API =============
 
 def parse_datetime_fields(doc: dict, fields: List[str]) -> dict:
@@ -1171,6 +2970,21 @@ def parse_datetime_fields(doc: dict, fields: List[str]) -> dict:
             doc[field] = datetime.fromisoformat(doc[field].replace('Z', '+00:00'))
     return doc
 
+def masked_sending_account(account_doc: dict) -> SendingAccount:
+    """API view of a stored account: parsed datetimes, SMTP password masked"""
+    parse_datetime_fields(account_doc, ['created_at', 'updated_at', 'last_activity'])
+    account_doc['smtp_password_encrypted'] = '********' if account_doc.get('smtp_password_encrypted') else None
+    return SendingAccount(**account_doc)
+
+async def update_sending_account_doc(account_id: str, user_id: str, update, extra_filter: Optional[dict] = None) -> Optional[dict]:
+    """One conditional find_one_and_update scoped to the owner; returns the updated document"""
+    return await db.sending_accounts.find_one_and_update(
+        {"id": account_id, "user_id": user_id, **(extra_filter or {})},
+        update,
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
 @api_router.get("/sending-accounts", response_model=List[SendingAccount])
 async def get_sending_accounts(current_user: User = Depends(get_current_user)):
     """Get all sending accounts for the current user"""
@@ -1221,7 +3035,13 @@ async def create_sending_account(account_input: SendingAccountCreate, current_us
     if account_dict.get('last_activity'):
         account_dict['last_activity'] = account_dict['last_activity'].isoformat()
     
-    await db.sending_accounts.insert_one(account_dict)
+    # Reserve before inserting: seeding a missing usage document counts existing rows
+    await reserve_usage(current_user.id, "sending_accounts")
+    try:
+        await db.sending_accounts.insert_one(account_dict)
+    except Exception:
+        await release_usage(current_user.id, "sending_accounts")
+        raise
     
     # Mask password in response
     account.smtp_password_encrypted = '********' if account.smtp_password_encrypted else None
@@ -1239,22 +3059,11 @@ async def get_sending_account(account_id: str, current_user: User = Depends(get_
     if not account_doc:
         raise HTTPException(status_code=404, detail="Sending account not found")
     
-    parse_datetime_fields(account_doc, ['created_at', 'updated_at', 'last_activity'])
-    account_doc['smtp_password_encrypted'] = '********' if account_doc.get('smtp_password_encrypted') else None
-    
-    return SendingAccount(**account_doc)
+    return masked_sending_account(account_doc)
 
 @api_router.patch("/sending-accounts/{account_id}", response_model=SendingAccount)
 async def update_sending_account(account_id: str, updates: SendingAccountUpdate, current_user: User = Depends(get_current_user)):
     """Update a sending account"""
-    account_doc = await db.sending_accounts.find_one({
-        "id": account_id, 
-        "user_id": current_user.id
-    }, {"_id": 0})
-    
-    if not account_doc:
-        raise HTTPException(status_code=404, detail="Sending account not found")
-    
     # Build update dict
     update_dict = {"updated_at": datetime.now(timezone.utc).isoformat()}
     
@@ -1264,17 +3073,11 @@ async def update_sending_account(account_id: str, updates: SendingAccountUpdate,
         elif value is not None:
             update_dict[field] = value
     
-    await db.sending_accounts.update_one(
-        {"id": account_id},
-        {"$set": update_dict}
-    )
-    
-    # Fetch updated account
-    updated_doc = await db.sending_accounts.find_one({"id": account_id}, {"_id": 0})
-    parse_datetime_fields(updated_doc, ['created_at', 'updated_at', 'last_activity'])
-    updated_doc['smtp_password_encrypted'] = '********' if updated_doc.get('smtp_password_encrypted') else None
+    updated_doc = await update_sending_account_doc(account_id, current_user.id, {"$set": update_dict})
+    if not updated_doc:
+        raise HTTPException(status_code=404, detail="Sending account not found")
     
-    return SendingAccount(**updated_doc)
+    return masked_sending_account(updated_doc)
 
 @api_router.delete("/sending-accounts/{account_id}")
 async def delete_sending_account(account_id: str, current_user: User = Depends(get_current_user)):
@@ -1287,51 +3090,95 @@ async def delete_sending_account(account_id: str, current_user: User = Depends(g
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Sending account not found")
     
+    await release_usage(current_user.id, "sending_accounts")
+    
     # Also delete warmup logs for this account
     await db.sending_account_warmup_logs.delete_many({"sending_account_id": account_id})
     
     return {"message": "Sending account deleted successfully"}
 
-@api_router.post("/sending-accounts/{account_id}/verify")
-async def verify_sending_account(account_id: str, current_user: User = Depends(get_current_user)):
-    """Verify SMTP connection for a sending account"""
-    account_doc = await db.sending_accounts.find_one({
-        "id": account_id, 
-        "user_id": current_user.id
-    }, {"_id": 0})
-    
-    if not account_doc:
-        raise HTTPException(status_code=404, detail="Sending account not found")
-    
+async def _verify_account_connection(account_doc: dict) -> tuple[bool, str]:
+    """Connection check for one account; raises ValueError on incomplete configuration"""
     # For OAuth providers, we'd verify tokens differently
     if account_doc['provider'] in ['gmail', 'outlook']:
         # Mock OAuth verification - in production, verify OAuth tokens
-        await db.sending_accounts.update_one(
-            {"id": account_id},
-            {"$set": {
-                "is_verified": True,
-                "updated_at": datetime.now(timezone.utc).isoformat()
-            }}
-        )
-        return {"success": True, "message": "OAuth connection verified"}
+        return True, "OAuth connection verified"
     
     # SMTP verification
     if not account_doc.get('smtp_host') or not account_doc.get('smtp_port'):
-        raise HTTPException(status_code=400, detail="SMTP configuration incomplete")
+        raise ValueError("SMTP configuration incomplete")
     
     # Decrypt password
-    password = decrypt_smtp_password(account_doc['smtp_password_encrypted']) if account_doc.get('smtp_password_encrypted') else None
+    try:
+        password = decrypt_smtp_password(account_doc['smtp_password_encrypted']) if account_doc.get('smtp_password_encrypted') else None
+    except InvalidToken:
+        raise ValueError("Stored SMTP password cannot be decrypted. Re-enter the password.")
     
     if not password:
-        raise HTTPException(status_code=400, detail="SMTP password not configured")
+        raise ValueError("SMTP password not configured")
     
-    success, message = await verify_smtp_connection(
+    return await verify_smtp_connection(
         host=account_doc['smtp_host'],
         port=account_doc['smtp_port'],
         username=account_doc.get('smtp_username', account_doc['email']),
         password=password,
         use_tls=account_doc.get('smtp_use_tls', True)
     )
+
+VERIFY_ACCOUNT_PROJECTION = {
+    "_id": 0, "id": 1, "email": 1, "provider": 1, "smtp_host": 1, "smtp_port": 1,
+    "smtp_username": 1, "smtp_password_encrypted": 1, "smtp_use_tls": 1
+}
+
+@api_router.post("/sending-accounts/verify-all")
+async def verify_all_sending_accounts(current_user: User = Depends(get_current_user)):
+    """Verify every sending account concurrently (bounded per SMTP host) and store the results"""
+    accounts = await db.sending_accounts.find({"user_id": current_user.id}, VERIFY_ACCOUNT_PROJECTION).to_list(None)
+    
+    async def verify(account_doc: dict) -> Dict[str, Any]:
+        # One broken account must not fail the whole batch
+        try:
+            success, message = await _verify_account_connection(account_doc)
+        except ValueError as e:
+            success, message = False, str(e)
+        except Exception as e:
+            logging.error(f"Verifying sending account {account_doc['id']} failed: {e}")
+            success, message = False, f"Verification error: {e}"
+        return {"account_id": account_doc['id'], "email": account_doc['email'], "success": success, "message": message}
+    
+    results = await asyncio.gather(*(verify(account_doc) for account_doc in accounts))
+    
+    if results:
+        now = datetime.now(timezone.utc).isoformat()
+        await db.sending_accounts.bulk_write([
+            UpdateOne(
+                {"id": result['account_id'], "user_id": current_user.id},
+                {"$set": {"is_verified": result['success'], "updated_at": now}}
+            )
+            for result in results
+        ], ordered=False)
+    
+    return {
+        "results": results,
+        "verified": sum(1 for result in results if result['success']),
+        "failed": sum(1 for result in results if not result['success'])
+    }
+
+@api_router.post("/sending-accounts/{account_id}/verify")
+async def verify_sending_account(account_id: str, current_user: User = Depends(get_current_user)):
+    """Verify SMTP connection for a sending account"""
+    account_doc = await db.sending_accounts.find_one({
+        "id": account_id, 
+        "user_id": current_user.id
+    }, VERIFY_ACCOUNT_PROJECTION)
+    
+    if not account_doc:
+        raise HTTPException(status_code=404, detail="Sending account not found")
+    
+    try:
+        success, message = await _verify_account_connection(account_doc)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Update verification status
     await db.sending_accounts.update_one(
@@ -1347,111 +3194,123 @@ async def verify_sending_account(account_id: str, current_user: User = Depends(g
     else:
         raise HTTPException(status_code=400, detail=message)
 
+SENDING_ACCOUNT_ACTIONS = ("pause", "resume", "warmup_start", "warmup_pause", "settings")
+
+def sending_account_action_update(action: str, reason: Optional[str] = None, settings: Optional[WarmupSettings] = None) -> tuple[Any, dict]:
+    """Update document and extra filter for a state transition, shared by single and bulk endpoints"""
+    now = datetime.now(timezone.utc).isoformat()
+    
+    if action == "pause":
+        # Pipeline updates so the warmup status is derived from the stored document atomically
+        return [{"$set": {
+            "is_paused": True,
+            "pause_reason": {"$literal": reason or "Manually paused"},
+            "warmup_status": {"$cond": [
+                {"$eq": ["$warmup_enabled", True]},
+                "paused",
+                {"$ifNull": ["$warmup_status", "inactive"]}
+            ]},
+            "updated_at": now
+        }}], {}
+    
+    if action == "resume":
+        # Warmup resumes where it was unless it has completed; accounts without warmup go inactive
+        return [{"$set": {
+            "is_paused": False,
+            "pause_reason": None,
+            "warmup_status": {"$cond": [
+                {"$eq": ["$warmup_enabled", True]},
+                {"$cond": [{"$eq": ["$warmup_completed", True]}, "completed", "active"]},
+                "inactive"
+            ]},
+            "updated_at": now
+        }}], {}
+    
+    if action == "warmup_start":
+        return [{"$set": {
+            "warmup_enabled": True,
+            "warmup_status": "active",
+            "warmup_day": {"$ifNull": ["$warmup_day", 0]},
+            "updated_at": now
+        }}], {"is_verified": True, "is_paused": {"$ne": True}}
+    
+    if action == "warmup_pause":
+        return {"$set": {"warmup_status": "paused", "updated_at": now}}, {}
+    
+    if action == "settings":
+        return {"$set": {
+            "warmup_daily_volume": settings.daily_volume,
+            "warmup_ramp_up": settings.ramp_up,
+            "warmup_reply_rate": settings.reply_rate,
+            "warmup_random_delay_min": settings.random_delay_min,
+            "warmup_random_delay_max": settings.random_delay_max,
+            "warmup_weekend_sending": settings.weekend_sending,
+            "warmup_auto_pause_bounce_rate": settings.auto_pause_bounce_rate,
+            "warmup_auto_pause_spam_threshold": settings.auto_pause_spam_threshold,
+            "updated_at": now
+        }}, {}
+    
+    raise ValueError(f"Unknown action: {action}")
+
+def warmup_start_precondition_error(account_doc: dict) -> Optional[str]:
+    if not account_doc.get('is_verified'):
+        return "Please verify the account before starting warmup"
+    if account_doc.get('is_paused'):
+        return "Account is paused. Resume it first."
+    return None
+
 @api_router.post("/sending-accounts/{account_id}/pause")
 async def pause_sending_account(account_id: str, reason: Optional[str] = None, current_user: User = Depends(get_current_user)):
     """Pause a sending account"""
-    account_doc = await db.sending_accounts.find_one({
-        "id": account_id, 
-        "user_id": current_user.id
-    }, {"_id": 0})
+    update, _ = sending_account_action_update("pause", reason=reason)
+    updated_doc = await update_sending_account_doc(account_id, current_user.id, update)
     
-    if not account_doc:
+    if not updated_doc:
         raise HTTPException(status_code=404, detail="Sending account not found")
     
-    await db.sending_accounts.update_one(
-        {"id": account_id},
-        {"$set": {
-            "is_paused": True,
-            "pause_reason": reason or "Manually paused",
-            "warmup_status": "paused" if account_doc.get('warmup_enabled') else account_doc.get('warmup_status', 'inactive'),
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
-    
-    return {"success": True, "message": "Sending account paused"}
+    return {"success": True, "message": "Sending account paused", "account": masked_sending_account(updated_doc)}
 
 @api_router.post("/sending-accounts/{account_id}/resume")
 async def resume_sending_account(account_id: str, current_user: User = Depends(get_current_user)):
     """Resume a paused sending account"""
-    account_doc = await db.sending_accounts.find_one({
-        "id": account_id, 
-        "user_id": current_user.id
-    }, {"_id": 0})
+    update, _ = sending_account_action_update("resume")
+    updated_doc = await update_sending_account_doc(account_id, current_user.id, update)
     
-    if not account_doc:
+    if not updated_doc:
         raise HTTPException(status_code=404, detail="Sending account not found")
     
-    # Determine warmup status on resume
-    warmup_status = "inactive"
-    if account_doc.get('warmup_enabled'):
-        if account_doc.get('warmup_completed'):
-            warmup_status = "completed"
-        else:
-            warmup_status = "active"
-    
-    await db.sending_accounts.update_one(
-        {"id": account_id},
-        {"$set": {
-            "is_paused": False,
-            "pause_reason": None,
-            "warmup_status": warmup_status,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
-    
-    return {"success": True, "message": "Sending account resumed"}
+    return {"success": True, "message": "Sending account resumed", "account": masked_sending_account(updated_doc)}
 
 # ============= WARMUP API ENDPOINTS =============
 
 @api_router.post("/sending-accounts/{account_id}/warmup/start")
 async def start_warmup(account_id: str, current_user: User = Depends(get_current_user)):
     """Start warmup for a sending account"""
-    account_doc = await db.sending_accounts.find_one({
-        "id": account_id, 
-        "user_id": current_user.id
-    }, {"_id": 0})
-    
-    if not account_doc:
-        raise HTTPException(status_code=404, detail="Sending account not found")
-    
-    if not account_doc.get('is_verified'):
-        raise HTTPException(status_code=400, detail="Please verify the account before starting warmup")
-    
-    if account_doc.get('is_paused'):
-        raise HTTPException(status_code=400, detail="Account is paused. Resume it first.")
-    
-    await db.sending_accounts.update_one(
-        {"id": account_id},
-        {"$set": {
-            "warmup_enabled": True,
-            "warmup_status": "active",
-            "warmup_day": account_doc.get('warmup_day', 0),
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
+    update, extra_filter = sending_account_action_update("warmup_start")
+    updated_doc = await update_sending_account_doc(account_id, current_user.id, update, extra_filter)
+    
+    if not updated_doc:
+        # Only the failure path pays for a second read, to explain which precondition failed
+        account_doc = await db.sending_accounts.find_one(
+            {"id": account_id, "user_id": current_user.id},
+            {"_id": 0, "is_verified": 1, "is_paused": 1}
+        )
+        if not account_doc:
+            raise HTTPException(status_code=404, detail="Sending account not found")
+        raise HTTPException(status_code=400, detail=warmup_start_precondition_error(account_doc) or "Warmup could not be started")
     
-    return {"success": True, "message": "Warmup started successfully"}
+    return {"success": True, "message": "Warmup started successfully", "account": masked_sending_account(updated_doc)}
 
 @api_router.post("/sending-accounts/{account_id}/warmup/pause")
 async def pause_warmup(account_id: str, current_user: User = Depends(get_current_user)):
     """Pause warmup for a sending account"""
-    account_doc = await db.sending_accounts.find_one({
-        "id": account_id, 
-        "user_id": current_user.id
-    }, {"_id": 0})
+    update, _ = sending_account_action_update("warmup_pause")
+    updated_doc = await update_sending_account_doc(account_id, current_user.id, update)
     
-    if not account_doc:
+    if not updated_doc:
         raise HTTPException(status_code=404, detail="Sending account not found")
     
-    await db.sending_accounts.update_one(
-        {"id": account_id},
-        {"$set": {
-            "warmup_status": "paused",
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
-    
-    return {"success": True, "message": "Warmup paused"}
+    return {"success": True, "message": "Warmup paused", "account": masked_sending_account(updated_doc)}
 
 @api_router.get("/sending-accounts/{account_id}/warmup/stats", response_model=WarmupStats)
 async def get_warmup_stats(account_id: str, current_user: User = Depends(get_current_user)):
@@ -1512,30 +3371,136 @@ async def get_warmup_stats(account_id: str, current_user: User = Depends(get_cur
 @api_router.patch("/sending-accounts/{account_id}/warmup/settings")
 async def update_warmup_settings(account_id: str, settings: WarmupSettings, current_user: User = Depends(get_current_user)):
     """Update warmup settings for a sending account"""
-    account_doc = await db.sending_accounts.find_one({
-        "id": account_id, 
-        "user_id": current_user.id
-    }, {"_id": 0})
+    update, _ = sending_account_action_update("settings", settings=settings)
+    updated_doc = await update_sending_account_doc(account_id, current_user.id, update)
     
-    if not account_doc:
+    if not updated_doc:
         raise HTTPException(status_code=404, detail="Sending account not found")
     
-    await db.sending_accounts.update_one(
-        {"id": account_id},
-        {"$set": {
-            "warmup_daily_volume": settings.daily_volume,
-            "warmup_ramp_up": settings.ramp_up,
-            "warmup_reply_rate": settings.reply_rate,
-            "warmup_random_delay_min": settings.random_delay_min,
-            "warmup_random_delay_max": settings.random_delay_max,
-            "warmup_weekend_sending": settings.weekend_sending,
-            "warmup_auto_pause_bounce_rate": settings.auto_pause_bounce_rate,
-            "warmup_auto_pause_spam_threshold": settings.auto_pause_spam_threshold,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
+    return {"success": True, "message": "Warmup settings updated", "account": masked_sending_account(updated_doc)}
+
+# ============= BULK ACTIONS =============
+
+BULK_ACTION_MAX_IDS = int(os.environ.get('BULK_ACTION_MAX_IDS', 1000))
+
+async def run_bulk_action(collection, ids: List[str], ops_for: Dict[str, Any], failures: Dict[str, str], not_found: str,
+                          match_filter: Dict[str, Any], unmatched: str) -> List[BulkActionResult]:
+    """
+    Apply prepared per-id updates in one unordered bulk_write and report each id
+    
+    The bulk result only counts matches, so when fewer updates matched than were
+    sent the affected ids are re-read with match_filter (the part of each update's
+    filter beyond its id); ids that no longer match it are reported as unmatched.
+    """
+    ops = list(ops_for.values())
+    op_ids = list(ops_for.keys())
+    if ops:
+        try:
+            result = await collection.bulk_write(ops, ordered=False)
+            matched = result.matched_count
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                failures[op_ids[error['index']]] = error.get('errmsg', "Update failed")
+            matched = e.details.get('nMatched', 0)
+        
+        pending = [item_id for item_id in op_ids if item_id not in failures]
+        if matched < len(pending):
+            still_matching = {
+                doc['id'] for doc in await collection.find(
+                    {"id": {"$in": pending}, **match_filter}, {"_id": 0, "id": 1}
+                ).to_list(None)
+            }
+            for item_id in pending:
+                if item_id not in still_matching:
+                    failures[item_id] = unmatched
+    
+    results = []
+    for item_id in ids:
+        if item_id in failures:
+            results.append(BulkActionResult(id=item_id, success=False, message=failures[item_id]))
+        elif item_id in ops_for:
+            results.append(BulkActionResult(id=item_id, success=True, message="Updated"))
+        else:
+            results.append(BulkActionResult(id=item_id, success=False, message=not_found))
+    return results
+
+def validate_bulk_request(request: BulkActionRequest, allowed_actions: tuple) -> List[str]:
+    if request.action not in allowed_actions:
+        raise HTTPException(status_code=400, detail=f"Unsupported action. Use one of: {', '.join(allowed_actions)}")
+    if not request.ids:
+        raise HTTPException(status_code=400, detail="No ids provided")
+    if len(request.ids) > BULK_ACTION_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_ACTION_MAX_IDS} ids per request")
+    if request.action == "settings" and request.settings is None:
+        raise HTTPException(status_code=400, detail="settings is required for the settings action")
+    # Preserve request order, drop duplicates
+    return list(dict.fromkeys(request.ids))
+
+def bulk_action_response(action: str, results: List[BulkActionResult]) -> BulkActionResponse:
+    succeeded = sum(1 for result in results if result.success)
+    return BulkActionResponse(action=action, succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+@api_router.post("/sending-accounts/bulk", response_model=BulkActionResponse)
+async def bulk_sending_account_action(request: BulkActionRequest, current_user: User = Depends(get_current_user)):
+    """Apply one action to many sending accounts with a single ownership-filtered bulk_write"""
+    ids = validate_bulk_request(request, SENDING_ACCOUNT_ACTIONS)
+    update, extra_filter = sending_account_action_update(request.action, reason=request.reason, settings=request.settings)
+    
+    # One read resolves ownership and preconditions for every id
+    owned = await db.sending_accounts.find(
+        {"id": {"$in": ids}, "user_id": current_user.id},
+        {"_id": 0, "id": 1, "is_verified": 1, "is_paused": 1}
+    ).to_list(None)
+    
+    ops_for: Dict[str, Any] = {}
+    failures: Dict[str, str] = {}
+    for account_doc in owned:
+        if request.action == "warmup_start":
+            error = warmup_start_precondition_error(account_doc)
+            if error:
+                failures[account_doc['id']] = error
+                continue
+        # The filter repeats ownership and preconditions; an account changed since the read
+        # matches nothing and is reported as a failure by run_bulk_action
+        ops_for[account_doc['id']] = UpdateOne(
+            {"id": account_doc['id'], "user_id": current_user.id, **extra_filter},
+            update
+        )
+    
+    results = await run_bulk_action(
+        db.sending_accounts, ids, ops_for, failures, "Sending account not found",
+        match_filter={"user_id": current_user.id, **extra_filter},
+        unmatched="Sending account changed during the update and no longer qualifies"
     )
+    return bulk_action_response(request.action, results)
+
+@api_router.post("/domains/bulk", response_model=BulkActionResponse)
+async def bulk_domain_action(request: BulkActionRequest, current_user: User = Depends(get_current_user)):
+    """Pause or resume many domains with a single ownership-filtered bulk_write"""
+    ids = validate_bulk_request(request, ("pause", "resume"))
+    
+    if request.action == "pause":
+        update = {"$set": {"is_paused": True, "pause_reason": request.reason or "Manually paused"}}
+    else:
+        update = {"$set": {"is_paused": False, "pause_reason": None}}
+    
+    owned = await db.domains.find(
+        {"id": {"$in": ids}, "user_id": current_user.id},
+        {"_id": 0, "id": 1}
+    ).to_list(None)
+    ops_for = {
+        domain_doc['id']: UpdateOne({"id": domain_doc['id'], "user_id": current_user.id}, update)
+        for domain_doc in owned
+    }
     
-    return {"success": True, "message": "Warmup settings updated"}
+    results = await run_bulk_action(
+        db.domains, ids, ops_for, {}, "Domain not found",
+        match_filter={"user_id": current_user.id},
+        unmatched="Domain not found"
+    )
+    if ops_for:
+        invalidate_user_views(current_user.id)
+    return bulk_action_response(request.action, results)
 
 # ============= SENDING ACCOUNT HEALTH CHECK =============
 
@@ -1580,6 +3545,7 @@ async def check_sending_account_health(account_id: str):
 
 async def progress_sending_account_warmup():
     """Daily job to progress warmup for all active sending accounts"""
+    started = time.perf_counter()
     accounts = await db.sending_accounts.find({
         "warmup_enabled": True,
         "warmup_status": "active",
@@ -1650,9 +3616,91 @@ async def progress_sending_account_warmup():
         
         # Check health after update
         await check_sending_account_health(account['id'])
+    
+    record_job_run("sending_account_warmup", started, len(accounts))
 
 app.include_router(api_router)
 
+def _cache_gauges() -> Dict[tuple, float]:
+    caches = {
+        "result_cache": user_view_cache,
+        "user_cache": user_cache,
+        "spam_score_cache": spam_score_cache,
+        "smtp_verify_cache": smtp_verify_cache
+    }
+    values = {}
+    for name, cache in caches.items():
+        stats = cache.stats()
+        for stat in ("size", "hits", "misses", "evictions", "invalidations"):
+            values[(name, stat)] = stats[stat]
+    return values
+
+def _bcrypt_pool_gauges() -> Dict[tuple, float]:
+    stats = bcrypt_pool.stats()
+    return {(stat,): stats[stat] for stat in ("queue_depth", "active", "completed", "avg_wait_ms", "avg_run_ms")}
+
+metrics_registry.register(CallbackGauge("cache_stat", "In-process cache counters", ("cache", "stat"), _cache_gauges))
+metrics_registry.register(CallbackGauge("bcrypt_pool_stat", "Password hashing pool state", ("stat",), _bcrypt_pool_gauges))
+metrics_registry.register(CallbackGauge(
+    "spam_llm_breaker_open", "1 while the LLM circuit breaker is not closed", (),
+    lambda: {(): 0 if spam_llm_breaker.state == "closed" else 1}
+))
+
+# DB round-trip budgets: a default per request, overridable per route template
+# (or background job name) with a JSON object, e.g. {"/api/domains/bulk": 10};
+# null exempts a route
+DB_ROUNDTRIP_BUDGET = int(os.environ.get('DB_ROUNDTRIP_BUDGET', 25))
+DB_ROUNDTRIP_BUDGETS: Dict[str, Optional[int]] = {
+    # An inline send costs a few round-trips per recipient; there is no fixed bound
+    "/api/campaigns/{campaign_id}/send": None,
+    # Bounded by their item caps rather than the per-request default
+    "/api/sending-accounts/bulk": 50,
+    "/api/domains/bulk": 50,
+    "/api/spam-score/batch": 2 * SPAM_SCORE_BATCH_MAX_ITEMS + 5,
+    **json.loads(os.environ.get('DB_ROUNDTRIP_BUDGETS', '{}'))
+}
+DB_PROFILE_HEADERS = os.environ.get('DB_PROFILE_HEADERS', 'true').lower() == 'true'
+
+@app.middleware("http")
+async def instrument_request(request: Request, call_next):
+    """Latency metrics and DB round-trip profiling for every request.
+    
+    For streaming responses only the work done before the first byte is
+    profiled; the body is produced after this middleware returns."""
+    started = time.perf_counter()
+    status_code = 500
+    route_path = "unmatched"
+    with profile_db(f"{request.method} {request.url.path}") as profile:
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            # Route template, not the raw path, keeps label cardinality bounded
+            route = request.scope.get("route")
+            if route is not None:
+                route_path = route.path
+            http_request_duration.observe(time.perf_counter() - started, request.method, route_path, str(status_code))
+    
+    budget = DB_ROUNDTRIP_BUDGETS.get(route_path, DB_ROUNDTRIP_BUDGET)
+    if budget is not None and profile.round_trips > budget:
+        logging.warning(f"DB round-trip budget of {budget} exceeded by {profile.summary()}")
+    if DB_PROFILE_HEADERS:
+        response.headers["X-DB-Roundtrips"] = str(profile.round_trips)
+        response.headers["X-DB-Time-Ms"] = str(profile.total_ms)
+    return response
+
+# Metrics expose per-tenant operational data: the endpoint stays disabled until a token is set
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape endpoint (Authorization: Bearer METRICS_TOKEN)"""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -1667,25 +3715,129 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize scheduler for warmup progression
+async def run_profiled_job(name: str, job):
+    """Run a background job under the DB profiler and log its round-trip summary"""
+    with profile_db(name, DB_ROUNDTRIP_BUDGETS.get(name)) as profile:
+        result = await job()
+    logging.info(profile.summary())
+    return result
+
+# Initialize scheduler for warmup progression. ENABLE_SCHEDULER=false keeps
+# jobs from firing in processes that import the app (benchmarks, CLIs)
+ENABLE_SCHEDULER = os.environ.get('ENABLE_SCHEDULER', 'true').lower() == 'true'
 scheduler = BackgroundScheduler()
 scheduler.add_job(
-    lambda: asyncio.run(progress_warmup()),
+    lambda: asyncio.run(run_profiled_job("domain_warmup", progress_warmup)),
     'cron',
     hour=0,  # Run at midnight
     minute=0,
     id='domain_warmup'
 )
 scheduler.add_job(
-    lambda: asyncio.run(progress_sending_account_warmup()),
+    lambda: asyncio.run(run_profiled_job("sending_account_warmup", progress_sending_account_warmup)),
     'cron',
     hour=0,
     minute=5,  # Run 5 mins after domain warmup
     id='sending_account_warmup'
 )
-scheduler.start()
+if BOUNCE_MAILDIR or BOUNCE_IMAP_HOST:
+    scheduler.add_job(
+        lambda: asyncio.run(run_profiled_job("bounce_ingestion", ingest_bounce_reports)),
+        'interval',
+        seconds=BOUNCE_INGEST_INTERVAL_SECONDS,
+        max_instances=1,
+        id='bounce_ingestion'
+    )
+if ENABLE_SCHEDULER:
+    scheduler.start()
+
+@app.on_event("startup")
+async def create_indexes():
+    """Ensure the indexes backing per-user queries exist"""
+    await db.domains.create_index([("user_id", 1)])
+    await db.campaigns.create_index([("user_id", 1), ("status", 1)])
+    
+    # Contact search: one index walk for the prefix filter and the keyset order
+    await db.contacts.create_index(CONTACT_SEARCH_INDEX)
+    for superseded in ("user_id_1_email_1_id_1", "user_id_1_search_keys_1"):
+        try:
+            await db.contacts.drop_index(superseded)
+        except OperationFailure:
+            pass  # already gone
+    await db.contacts.create_index([("user_id", 1), ("tags", 1)])
+    await db.contacts.create_index([("user_id", 1), ("is_suppressed", 1)])
+    await db.segments.create_index([("user_id", 1)])
+    await db.rate_limits.create_index([("expires_at", 1)], expireAfterSeconds=0)
+    await db.usage.create_index([("user_id", 1)], unique=True)
+    await db.email_outbox.create_index([("status", 1), ("next_attempt_at", 1)])
+    await db.email_outbox.create_index([("lease", 1)])
+    await db.spam_score_cache.create_index([("expires_at", 1)], expireAfterSeconds=0)
+    try:
+        await db.suppressed_emails.create_index([("user_id", 1), ("email", 1)], unique=True)
+    except OperationFailure:
+        # Rows upserted before the index was unique may repeat an address; keep one of each
+        async for group in db.suppressed_emails.aggregate([
+            {"$group": {"_id": {"user_id": "$user_id", "email": "$email"}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}}
+        ], allowDiskUse=True):
+            await db.suppressed_emails.delete_many({"_id": {"$in": group['ids'][1:]}})
+        await db.suppressed_emails.drop_index([("user_id", 1), ("email", 1)])
+        await db.suppressed_emails.create_index([("user_id", 1), ("email", 1)], unique=True)
+    # Bounce reports without attribution headers are matched to the campaigns that listed the address
+    await db.campaigns.create_index([("recipients", 1)])
+    try:
+        await db.contacts.drop_index("email_1")  # served the old contact-owner fallback
+    except OperationFailure:
+        pass
+    
+    # Backfill search keys for contacts created before search existed
+    lower = lambda field: {"$toLower": {"$ifNull": [field, ""]}}
+    await db.contacts.update_many(
+        {"search_keys": {"$exists": False}},
+        [{"$set": {"search_keys": {"$filter": {
+            "input": {"$setUnion": [[
+                lower("$email"),
+                lower("$first_name"),
+                lower("$last_name"),
+                {"$trim": {"input": {"$concat": [lower("$first_name"), " ", lower("$last_name")]}}},
+                lower("$company")
+            ]]},
+            "cond": {"$ne": ["$$this", ""]}
+        }}}}]
+    )
+
+@app.on_event("startup")
+async def resolve_legacy_token_cutoff():
+    global LEGACY_TOKEN_CUTOFF
+    if _legacy_cutoff_override:
+        return
+    # The first deployment to record itself fixes the cutoff; restarts keep it
+    now = datetime.now(timezone.utc)
+    doc = await db.app_state.find_one_and_update(
+        {"id": "token_versioning_deployed"},
+        {"$setOnInsert": {"id": "token_versioning_deployed", "deployed_at": now.isoformat()}},
+        projection={"_id": 0, "deployed_at": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    LEGACY_TOKEN_CUTOFF = datetime.fromisoformat(doc['deployed_at']) + LEGACY_TOKEN_LIFETIME
+    logging.info(f"Legacy tokens are refused from {LEGACY_TOKEN_CUTOFF.isoformat()}")
+
+@app.on_event("startup")
+async def start_outbox_worker():
+    if outbox_smtp_pool is None:
+        logging.warning("OUTBOX_SMTP_HOST not set. Transactional emails will stay queued.")
+        return
+    app.state.outbox_worker = asyncio.create_task(run_outbox_worker())
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    scheduler.shutdown()
+    if scheduler.running:
+        scheduler.shutdown()
+    bcrypt_pool.shutdown()
+    outbox_worker = getattr(app.state, 'outbox_worker', None)
+    if outbox_worker:
+        outbox_worker.cancel()
+    if outbox_smtp_pool:
+        outbox_smtp_pool.close()
     client.close()
@@ -0,0 +1,136 @@
+"""
+Local spam classifier
+=====================
+Logistic regression over hashed n-gram features, used as the fast default
+spam-scoring path in the API. Shared by the server (scoring) and
+scripts/train_spam_classifier.py (training) so both hash features the same way.
+
+A saved model is a directory holding:
+    weights.npy  - float32 weight per hashed feature (loaded memory-mapped)
+    meta.json    - bias, feature count and training metadata
+"""
+
+import json
+import math
+import re
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_N_FEATURES = 2 ** 18
+
+_TOKEN_RE = re.compile(r"https?://|[a-z0-9']+|[!$%]")
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def feature_indices(subject: str, body: str, mode: str, n_features: int = DEFAULT_N_FEATURES) -> np.ndarray:
+    """
+    Hashed binary features for an email
+
+    Unigrams and bigrams are prefixed with their field so the same word in
+    the subject and the body are separate features. crc32 is used instead of
+    hash() because Python's string hash is salted per process.
+
+    Returns:
+        np.ndarray: Unique feature indices
+    """
+    features = [f"m:{mode}"]
+    for prefix, text in (("s", subject), ("b", body)):
+        tokens = _tokens(text)
+        features.extend(f"{prefix}:{token}" for token in tokens)
+        features.extend(f"{prefix}:{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+        # Coarse shape features: link count and share of upper-case letters
+        links = tokens.count("http://") + tokens.count("https://")
+        letters = sum(map(str.isalpha, text))
+        caps_ratio = sum(map(str.isupper, text)) / letters if letters else 0.0
+        features.append(f"{prefix}#links:{min(links, 5)}")
+        features.append(f"{prefix}#caps:{int(caps_ratio * 4)}")
+
+    return np.unique(np.fromiter(
+        (zlib.crc32(f.encode("utf-8")) % n_features for f in features),
+        dtype=np.int64,
+        count=len(features)
+    ))
+
+
+class SpamClassifier:
+    """Logistic regression scorer over hashed features"""
+
+    def __init__(self, weights: np.ndarray, bias: float, meta: Optional[dict] = None):
+        self.weights = weights
+        self.bias = bias
+        self.n_features = len(weights)
+        self.meta = meta or {}
+
+    def predict_proba(self, subject: str, body: str, mode: str) -> float:
+        """Probability that the email is spam"""
+        z = self.bias + float(self.weights[feature_indices(subject, body, mode, self.n_features)].sum())
+        return 1.0 / (1.0 + math.exp(-max(min(z, 500.0), -500.0)))
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "weights.npy", self.weights.astype(np.float32))
+        (path / "meta.json").write_text(json.dumps({**self.meta, "bias": self.bias, "n_features": self.n_features}, indent=2))
+
+    @classmethod
+    def load(cls, path: Path) -> "SpamClassifier":
+        """Load a saved model; weights are memory-mapped rather than read into memory"""
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        weights = np.load(path / "weights.npy", mmap_mode="r")
+        return cls(weights, float(meta["bias"]), meta)
+
+
+def train(
+    examples: Iterable[Tuple[str, str, str, int]],
+    n_features: int = DEFAULT_N_FEATURES,
+    epochs: int = 5,
+    learning_rate: float = 0.1,
+    l2: float = 1e-5,
+    seed: int = 0
+) -> SpamClassifier:
+    """
+    Fit a classifier with SGD on (subject, body, mode, label) examples
+
+    Args:
+        examples: Labelled emails, label 1 = spam, 0 = legitimate
+        n_features: Hash space size
+        epochs: Passes over the data (shuffled each epoch)
+        learning_rate: SGD step size
+        l2: L2 regularization strength
+        seed: Shuffle seed
+
+    Returns:
+        SpamClassifier: Trained model
+    """
+    rows = [(feature_indices(subject, body, mode, n_features), float(label)) for subject, body, mode, label in examples]
+    if not rows:
+        raise ValueError("No training examples")
+
+    weights = np.zeros(n_features, dtype=np.float64)
+    bias = 0.0
+    rng = np.random.default_rng(seed)
+
+    for _ in range(epochs):
+        for i in rng.permutation(len(rows)):
+            indices, label = rows[i]
+            z = bias + weights[indices].sum()
+            gradient = 1.0 / (1.0 + math.exp(-max(min(z, 500.0), -500.0))) - label
+            weights[indices] -= learning_rate * (gradient + l2 * weights[indices])
+            bias -= learning_rate * gradient
+
+    positives = int(sum(label for _, label in rows))
+    return SpamClassifier(weights.astype(np.float32), bias, {
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "n_examples": len(rows),
+        "n_spam": positives,
+        "epochs": epochs
+    })
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Backend Benchmark Suite
+=======================
+Runs the FastAPI app in-process (httpx ASGI transport, no network hop)
+against a local MongoDB, seeds realistic volumes into a throwaway database
+and measures latency percentiles and throughput for:
+
+- login (bcrypt-bound)
+- list endpoints with a 100k-contact tenant: /contacts, /contacts/search,
+  /campaigns, /domains
+- /dashboard/stats
+- send_campaign to a 10k-recipient segment
+- the nightly progress_warmup / progress_sending_account_warmup jobs
+
+Per-user read caches are invalidated before each timed request, so list
+numbers reflect the database path rather than cache hits. DB round-trips per
+request come from the X-DB-Roundtrips profiler header.
+
+Results are written to test_reports/benchmark_results_<timestamp>.json. With
+a baseline file present, scenarios whose p95 regressed beyond the tolerance
+are reported and the script exits non-zero.
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python backend_benchmark.py
+    python backend_benchmark.py --contacts 100000 --recipients 10000 --warmup-entities 10000
+    python backend_benchmark.py --save-baseline
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+REPORTS_DIR = ROOT_DIR / "test_reports"
+DEFAULT_BASELINE = REPORTS_DIR / "benchmark_baseline.json"
+
+
+def configure_environment(db_name: str):
+    """Must run before the server module is imported: it reads its config at import time"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ["DB_NAME"] = db_name
+    os.environ["ENABLE_SCHEDULER"] = "false"
+    os.environ["MOCK_SEND_DELAY_MIN_SECONDS"] = "0"
+    os.environ["MOCK_SEND_DELAY_MAX_SECONDS"] = "0"
+    os.environ["DB_PROFILE_HEADERS"] = "true"
+    # The benchmark logs in repeatedly from one address
+    for name in ("LOGIN_RATE_LIMIT_PER_IP", "LOGIN_RATE_LIMIT_PER_EMAIL", "REGISTER_RATE_LIMIT_PER_IP"):
+        os.environ[name] = str(10 ** 9)
+    sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(name: str, latencies, wall_seconds: float, round_trips=None, items: int = None) -> dict:
+    latencies = sorted(latencies)
+    result = {
+        "scenario": name,
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "throughput_per_s": round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+    }
+    if round_trips:
+        result["db_roundtrips_mean"] = round(sum(round_trips) / len(round_trips), 1)
+    if items is not None:
+        result["items"] = items
+        result["items_per_s"] = round(items / wall_seconds, 1) if wall_seconds else 0.0
+    return result
+
+
+class Benchmark:
+    def __init__(self, server, client, args):
+        self.server = server
+        self.db = server.db
+        self.client = client
+        self.args = args
+        self.headers = {}
+        self.user_id = None
+        self.results = []
+
+    # ---------- seeding ----------
+
+    async def insert_chunked(self, collection, docs, chunk_size: int = 5000):
+        chunks = [docs[i:i + chunk_size] for i in range(0, len(docs), chunk_size)]
+        await asyncio.gather(*(collection.insert_many(chunk, ordered=False) for chunk in chunks))
+
+    async def seed(self):
+        server = self.server
+        email = f"bench-{uuid.uuid4().hex[:8]}@bench.example.com"
+        self.password = "BenchPassword123!"
+        response = await self.client.post("/api/auth/register", json={
+            "email": email, "password": self.password, "full_name": "Bench User"
+        })
+        response.raise_for_status()
+        self.email = email
+        self.user_id = response.json()["user"]["id"]
+        self.headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+        print(f"Seeding {self.args.contacts} contacts...")
+        contacts = []
+        for i in range(self.args.contacts):
+            contact = server.Contact(
+                user_id=self.user_id,
+                email=f"contact{i}@example{i % 500}.com",
+                first_name=f"First{i}",
+                last_name=f"Last{i % 1000}",
+                company=f"Company {i % 2000}",
+                tags=["bench-send"] if i < self.args.recipients else ["other"]
+            )
+            doc = contact.model_dump()
+            doc["created_at"] = doc["created_at"].isoformat()
+            doc["search_keys"] = server.contact_search_keys(contact)
+            contacts.append(doc)
+        await self.insert_chunked(self.db.contacts, contacts)
+
+        domain = server.Domain(
+            user_id=self.user_id, domain="bench.example.com", warmup_completed=True,
+            warmup_day=30, daily_limit=10 ** 9
+        )
+        self.domain_id = domain.id
+        domain_doc = domain.model_dump()
+        domain_doc["created_at"] = domain_doc["created_at"].isoformat()
+        domain_doc["last_reset"] = domain_doc["last_reset"].isoformat()
+        await self.db.domains.insert_one(domain_doc)
+
+        campaigns = []
+        for i in range(self.args.campaigns):
+            campaign = server.Campaign(
+                user_id=self.user_id, domain_id=self.domain_id, name=f"Campaign {i}",
+                subject="Quick question", body="Hi there, " * 20, recipients=[f"r{i}@example.com"],
+                status="completed", sent_count=1000, delivered_count=960, bounce_count=30, spam_count=10
+            )
+            doc = campaign.model_dump()
+            doc["created_at"] = doc["created_at"].isoformat()
+            campaigns.append(doc)
+        if campaigns:
+            await self.insert_chunked(self.db.campaigns, campaigns)
+
+        print(f"Seeding {self.args.warmup_entities} warmup domains and sending accounts...")
+        owner_ids = [str(uuid.uuid4()) for _ in range(max(1, self.args.warmup_entities // 10))]
+        warmup_domains, warmup_accounts = [], []
+        for i in range(self.args.warmup_entities):
+            owner = owner_ids[i % len(owner_ids)]
+            warmup_domain = server.Domain(user_id=owner, domain=f"warm{i}.bench.example.com", warmup_day=i % 14)
+            doc = warmup_domain.model_dump()
+            doc["created_at"] = doc["created_at"].isoformat()
+            doc["last_reset"] = doc["last_reset"].isoformat()
+            warmup_domains.append(doc)
+
+            account = server.SendingAccount(
+                user_id=owner, email=f"sender{i}@warm{i}.bench.example.com", provider="smtp",
+                warmup_enabled=True, warmup_status="active", warmup_day=i % 29, is_verified=True
+            )
+            doc = account.model_dump()
+            doc["created_at"] = doc["created_at"].isoformat()
+            doc["updated_at"] = doc["updated_at"].isoformat()
+            warmup_accounts.append(doc)
+        await self.insert_chunked(self.db.domains, warmup_domains)
+        await self.insert_chunked(self.db.sending_accounts, warmup_accounts)
+
+    # ---------- measurement ----------
+
+    async def measure_requests(self, name: str, method: str, path: str, iterations: int, concurrency: int, **kwargs):
+        latencies, round_trips = [], []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                self.server.invalidate_user_views(self.user_id)
+                started = time.perf_counter()
+                response = await self.client.request(method, path, **kwargs)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{name}: {response.status_code} {response.text[:200]}")
+                if "x-db-roundtrips" in response.headers:
+                    round_trips.append(int(response.headers["x-db-roundtrips"]))
+
+        wall = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(iterations)))
+        result = summarize(name, latencies, time.perf_counter() - wall, round_trips)
+        self.report(result)
+
+    async def measure_once(self, name: str, coro_factory, items: int):
+        started = time.perf_counter()
+        await coro_factory()
+        elapsed = time.perf_counter() - started
+        self.report(summarize(name, [elapsed], elapsed, items=items))
+
+    def report(self, result: dict):
+        self.results.append(result)
+        line = f"  {result['scenario']:<28} p50 {result['p50_ms']:>9} ms  p95 {result['p95_ms']:>9} ms  p99 {result['p99_ms']:>9} ms"
+        if "items_per_s" in result:
+            line += f"  {result['items_per_s']} items/s"
+        else:
+            line += f"  {result['throughput_per_s']} req/s"
+        if "db_roundtrips_mean" in result:
+            line += f"  {result['db_roundtrips_mean']} DB trips"
+        print(line)
+
+    async def run(self):
+        args = self.args
+        n, c = args.iterations, args.concurrency
+        print("Running scenarios...")
+
+        await self.measure_requests(
+            "login", "POST", "/api/auth/login", n, c,
+            json={"email": self.email, "password": self.password}
+        )
+        await self.measure_requests("dashboard_stats", "GET", "/api/dashboard/stats", n, c, headers=self.headers)
+        await self.measure_requests("list_campaigns", "GET", "/api/campaigns", n, c, headers=self.headers)
+        await self.measure_requests("list_domains", "GET", "/api/domains", n, c, headers=self.headers)
+        await self.measure_requests(
+            "search_contacts", "GET", "/api/contacts/search", n, c,
+            headers=self.headers, params={"q": "first12", "page_size": 50}
+        )
+        # The full list returns every contact; fewer iterations keep the run short
+        await self.measure_requests(
+            "list_contacts", "GET", "/api/contacts", max(1, n // 10), 1, headers=self.headers
+        )
+
+        segment = await self.client.post("/api/segments", headers=self.headers, json={
+            "name": "Bench recipients", "tags": ["bench-send"]
+        })
+        segment.raise_for_status()
+        campaign = await self.client.post("/api/campaigns", headers=self.headers, json={
+            "domain_id": self.domain_id,
+            "name": "Bench send",
+            "subject": "Quick question about your team",
+            "body": "Hi {{first_name}}, I noticed your team is growing and wanted to share how others "
+                    "approach onboarding. Would a short call next week be useful?",
+            "segment_id": segment.json()["id"]
+        })
+        campaign.raise_for_status()
+        campaign_id = campaign.json()["id"]
+
+        async def send():
+            response = await self.client.post(f"/api/campaigns/{campaign_id}/send", headers=self.headers)
+            response.raise_for_status()
+        await self.measure_once("send_campaign", send, args.recipients)
+
+        await self.measure_once("progress_warmup", self.server.progress_warmup, args.warmup_entities)
+        await self.measure_once(
+            "progress_sending_account_warmup", self.server.progress_sending_account_warmup, args.warmup_entities
+        )
+
+
+def compare_with_baseline(results, baseline_path: Path, tolerance: float) -> list:
+    if not baseline_path.exists():
+        return []
+    baseline = {r["scenario"]: r for r in json.loads(baseline_path.read_text())["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["scenario"])
+        if previous and previous["p95_ms"] > 0 and result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{result['scenario']}: p95 {result['p95_ms']} ms vs baseline {previous['p95_ms']} ms"
+            )
+    return regressions
+
+
+async def main_async(args) -> int:
+    import httpx
+    import server
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # The ASGI transport doesn't send lifespan events; create the indexes ourselves
+        await server.create_indexes()
+        benchmark = Benchmark(server, client, args)
+        try:
+            await benchmark.seed()
+            await benchmark.run()
+        finally:
+            if not args.keep_db:
+                await server.client.drop_database(os.environ["DB_NAME"])
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "parameters": {
+            "contacts": args.contacts,
+            "recipients": args.recipients,
+            "campaigns": args.campaigns,
+            "warmup_entities": args.warmup_entities,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+        },
+        "results": benchmark.results,
+    }
+    REPORTS_DIR.mkdir(exist_ok=True)
+    output = REPORTS_DIR / f"benchmark_results_{int(time.time())}.json"
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+
+    regressions = compare_with_baseline(benchmark.results, baseline_path, args.tolerance)
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%} of baseline p95:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the backend in-process against a local MongoDB")
+    parser.add_argument("--contacts", type=int, default=100_000)
+    parser.add_argument("--recipients", type=int, default=10_000)
+    parser.add_argument("--campaigns", type=int, default=200)
+    parser.add_argument("--warmup-entities", type=int, default=10_000)
+    parser.add_argument("--iterations", type=int, default=50, help="Timed requests per HTTP scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 regression vs baseline (0.2 = 20%%)")
+    parser.add_argument("--keep-db", action="store_true", help="Keep the seeded database after the run")
+    args = parser.parse_args()
+
+    if args.recipients > args.contacts:
+        parser.error("--recipients cannot exceed --contacts")
+
+    configure_environment(f"benchmark_{int(time.time())}")
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -33,10 +33,55 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// Set by App so a failed refresh can drop the signed-in user and show the login page
+let onAuthExpired = () => {};
+
+const clearStoredTokens = () => {
+  localStorage.removeItem('token');
+  localStorage.removeItem('refresh_token');
+};
+
+// Access tokens are short-lived: on a 401, trade the refresh token for a new
+// access token once and replay the request.
+api.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (
+      error.response?.status === 401 &&
+      refreshToken &&
+      original &&
+      !original._retried &&
+      !original.url?.startsWith('/auth/')
+    ) {
+      original._retried = true;
+      try {
+        const res = await axios.post(`${API}/auth/refresh`, { refresh_token: refreshToken });
+        localStorage.setItem('token', res.data.token);
+        localStorage.setItem('refresh_token', res.data.refresh_token);
+        original.headers.Authorization = `Bearer ${res.data.token}`;
+        return api(original);
+      } catch (refreshError) {
+        clearStoredTokens();
+        onAuthExpired();
+      }
+    }
+    return Promise.reject(error);
+  }
+);
+
 function App() {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
 
+  useEffect(() => {
+    onAuthExpired = () => setUser(null);
+    return () => {
+      onAuthExpired = () => {};
+    };
+  }, []);
+
   useEffect(() => {
     const token = localStorage.getItem('token');
     if (token) {
@@ -46,7 +91,7 @@ function App() {
           setLoading(false);
         })
         .catch(() => {
-          localStorage.removeItem('token');
+          clearStoredTokens();
           setLoading(false);
         });
     } else {
@@ -54,8 +99,14 @@ function App() {
     }
   }, []);
 
-  const handleLogout = () => {
-    localStorage.removeItem('token');
+  const handleLogout = async () => {
+    try {
+      // Revoke server-side too, so a copied access or refresh token stops working
+      await api.post('/auth/logout');
+    } catch (error) {
+      console.error('Error logging out:', error);
+    }
+    clearStoredTokens();
     setUser(null);
   };
 
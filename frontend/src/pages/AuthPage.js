@@ -29,6 +29,7 @@ export default function AuthPage({ setUser }) {
       const res = await api.post(endpoint, formData);
       
       localStorage.setItem('token', res.data.token);
+      localStorage.setItem('refresh_token', res.data.refresh_token);
       setUser(res.data.user);
       toast.success(isLogin ? 'Welcome back!' : 'Account created successfully!');
     } catch (error) {
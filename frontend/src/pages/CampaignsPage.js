@@ -11,12 +11,12 @@ import { Badge } from '../components/ui/badge';
 import { Alert, AlertDescription } from '../components/ui/alert';
 import { Progress } from '../components/ui/progress';
 import { toast } from 'sonner';
-import { Plus, Send, Mail, TrendingUp, TrendingDown, AlertTriangle, CheckCircle, Sparkles } from 'lucide-react';
+import { Plus, Send, Mail, TrendingUp, TrendingDown, AlertTriangle, CheckCircle, Sparkles, Users } from 'lucide-react';
 
 export default function CampaignsPage() {
   const [campaigns, setCampaigns] = useState([]);
   const [domains, setDomains] = useState([]);
-  const [contacts, setContacts] = useState([]);
+  const [segments, setSegments] = useState([]);
   const [loading, setLoading] = useState(true);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [spamScore, setSpamScore] = useState(null);
@@ -26,8 +26,12 @@ export default function CampaignsPage() {
     name: '',
     subject: '',
     body: '',
-    recipients: []
+    recipients: [],
+    segment_id: ''
   });
+  const [recipientMode, setRecipientMode] = useState('addresses');
+  const [segmentFormOpen, setSegmentFormOpen] = useState(false);
+  const [segmentForm, setSegmentForm] = useState({ name: '', tags: '', tag_match: 'any' });
 
   useEffect(() => {
     loadData();
@@ -35,14 +39,14 @@ export default function CampaignsPage() {
 
   const loadData = async () => {
     try {
-      const [campaignsRes, domainsRes, contactsRes] = await Promise.all([
+      const [campaignsRes, domainsRes, segmentsRes] = await Promise.all([
         api.get('/campaigns'),
         api.get('/domains'),
-        api.get('/contacts')
+        api.get('/segments')
       ]);
       setCampaigns(campaignsRes.data);
       setDomains(domainsRes.data);
-      setContacts(contactsRes.data);
+      setSegments(segmentsRes.data);
     } catch (error) {
       console.error('Error loading data:', error);
     } finally {
@@ -57,37 +61,109 @@ export default function CampaignsPage() {
     }
 
     setAnalyzingSpam(true);
+    const domain = domains.find(d => d.id === formData.domain_id);
+    const payload = {
+      subject: formData.subject,
+      body: formData.body,
+      mode: domain?.mode || 'cold_outreach'
+    };
     try {
-      const domain = domains.find(d => d.id === formData.domain_id);
-      const res = await api.post('/spam-score', {
-        subject: formData.subject,
-        body: formData.body,
-        mode: domain?.mode || 'cold_outreach'
+      // Stream: the instant local score renders first, the AI-refined one replaces it
+      const response = await fetch(`${api.defaults.baseURL}/spam-score/stream`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          Authorization: `Bearer ${localStorage.getItem('token')}`
+        },
+        body: JSON.stringify(payload)
       });
-      setSpamScore(res.data);
-      toast.success('Spam analysis complete!');
-    } catch (error) {
-      toast.error('Failed to analyze spam score');
+      if (!response.ok || !response.body) {
+        throw new Error(`Stream unavailable: ${response.status}`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let refined = false;
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const frames = buffer.split('\n\n');
+        buffer = frames.pop();
+        for (const frame of frames) {
+          const event = frame.match(/^event: (.*)$/m)?.[1];
+          const data = frame.match(/^data: (.*)$/m)?.[1];
+          if (event === 'heuristic' || event === 'refined') {
+            setSpamScore(JSON.parse(data));
+            refined = refined || event === 'refined';
+          }
+        }
+      }
+      if (refined) {
+        toast.success('Spam analysis complete!');
+      } else {
+        toast.error('AI analysis unavailable, showing quick check');
+      }
+    } catch (streamError) {
+      try {
+        const res = await api.post('/spam-score', { ...payload, deep: true });
+        setSpamScore(res.data);
+        toast.success('Spam analysis complete!');
+      } catch (error) {
+        toast.error('Failed to analyze spam score');
+      }
     } finally {
       setAnalyzingSpam(false);
     }
   };
 
+  const handleCreateSegment = async () => {
+    try {
+      const res = await api.post('/segments', {
+        name: segmentForm.name.trim(),
+        tags: segmentForm.tags
+          .split(',')
+          .map(tag => tag.trim())
+          .filter(tag => tag),
+        tag_match: segmentForm.tag_match
+      });
+      toast.success('Segment created');
+      setSegments([...segments, res.data]);
+      setFormData({ ...formData, segment_id: res.data.id });
+      setSegmentForm({ name: '', tags: '', tag_match: 'any' });
+      setSegmentFormOpen(false);
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Failed to create segment');
+    }
+  };
+
   const handleCreateCampaign = async (e) => {
     e.preventDefault();
+    if (recipientMode === 'segment' && !formData.segment_id) {
+      toast.error('Choose a segment to send to');
+      return;
+    }
     try {
-      const recipientEmails = formData.recipients
-        .split(',')
-        .map(email => email.trim())
-        .filter(email => email);
-      
+      // A campaign targets either explicit addresses or a segment, never both
+      const target = recipientMode === 'segment'
+        ? { recipients: [], segment_id: formData.segment_id }
+        : {
+            recipients: formData.recipients
+              .split(',')
+              .map(email => email.trim())
+              .filter(email => email),
+            segment_id: null
+          };
+
       await api.post('/campaigns', {
         ...formData,
-        recipients: recipientEmails
+        ...target
       });
       toast.success('Campaign created successfully');
       setDialogOpen(false);
-      setFormData({ domain_id: '', name: '', subject: '', body: '', recipients: [] });
+      setFormData({ domain_id: '', name: '', subject: '', body: '', recipients: [], segment_id: '' });
+      setRecipientMode('addresses');
       setSpamScore(null);
       loadData();
     } catch (error) {
@@ -97,8 +173,8 @@ export default function CampaignsPage() {
 
   const handleSendCampaign = async (campaignId) => {
     try {
-      await api.post(`/campaigns/${campaignId}/send`);
-      toast.success('Campaign sent successfully');
+      const res = await api.post(`/campaigns/${campaignId}/send`);
+      toast.success(res.data.message || 'Campaign sent successfully');
       loadData();
     } catch (error) {
       toast.error(error.response?.data?.detail || 'Failed to send campaign');
@@ -280,18 +356,114 @@ export default function CampaignsPage() {
                 </div>
 
                 <div className="space-y-2">
-                  <Label htmlFor="recipients">Recipients *</Label>
-                  <Textarea
-                    id="recipients"
-                    data-testid="recipients-textarea"
-                    placeholder="email1@company.com, email2@company.com"
-                    value={formData.recipients}
-                    onChange={(e) => setFormData({ ...formData, recipients: e.target.value })}
-                    rows={3}
-                    required
-                  />
-                  <p className="text-xs text-slate-500">Comma-separated email addresses</p>
+                  <Label>Recipients *</Label>
+                  <Select value={recipientMode} onValueChange={setRecipientMode}>
+                    <SelectTrigger data-testid="recipient-mode-select">
+                      <SelectValue />
+                    </SelectTrigger>
+                    <SelectContent>
+                      <SelectItem value="addresses">Specific email addresses</SelectItem>
+                      <SelectItem value="segment">A contact segment</SelectItem>
+                    </SelectContent>
+                  </Select>
                 </div>
+
+                {recipientMode === 'addresses' ? (
+                  <div className="space-y-2">
+                    <Textarea
+                      id="recipients"
+                      data-testid="recipients-textarea"
+                      placeholder="email1@company.com, email2@company.com"
+                      value={formData.recipients}
+                      onChange={(e) => setFormData({ ...formData, recipients: e.target.value })}
+                      rows={3}
+                      required
+                    />
+                    <p className="text-xs text-slate-500">Comma-separated email addresses</p>
+                  </div>
+                ) : (
+                  <div className="space-y-2">
+                    <div className="flex items-center gap-2">
+                      <Select
+                        value={formData.segment_id}
+                        onValueChange={(value) => setFormData({ ...formData, segment_id: value })}
+                      >
+                        <SelectTrigger data-testid="segment-select">
+                          <SelectValue placeholder="Choose a segment" />
+                        </SelectTrigger>
+                        <SelectContent>
+                          {segments.map((segment) => (
+                            <SelectItem key={segment.id} value={segment.id}>
+                              {segment.name} ({segment.tags.length ? `${segment.tag_match} of: ${segment.tags.join(', ')}` : 'all contacts'})
+                            </SelectItem>
+                          ))}
+                        </SelectContent>
+                      </Select>
+                      <Button
+                        type="button"
+                        data-testid="new-segment-button"
+                        variant="outline"
+                        size="sm"
+                        onClick={() => setSegmentFormOpen(!segmentFormOpen)}
+                      >
+                        <Users className="w-4 h-4 mr-2" />
+                        New Segment
+                      </Button>
+                    </div>
+
+                    {segmentFormOpen && (
+                      <div data-testid="segment-form" className="space-y-3 p-4 bg-slate-50 rounded-lg">
+                        <div className="space-y-2">
+                          <Label htmlFor="segment-name">Segment Name</Label>
+                          <Input
+                            id="segment-name"
+                            data-testid="segment-name-input"
+                            placeholder="Newsletter subscribers"
+                            value={segmentForm.name}
+                            onChange={(e) => setSegmentForm({ ...segmentForm, name: e.target.value })}
+                          />
+                        </div>
+                        <div className="grid grid-cols-3 gap-4">
+                          <div className="col-span-2 space-y-2">
+                            <Label htmlFor="segment-tags">Contact Tags</Label>
+                            <Input
+                              id="segment-tags"
+                              data-testid="segment-tags-input"
+                              placeholder="newsletter, customers"
+                              value={segmentForm.tags}
+                              onChange={(e) => setSegmentForm({ ...segmentForm, tags: e.target.value })}
+                            />
+                          </div>
+                          <div className="space-y-2">
+                            <Label>Match</Label>
+                            <Select
+                              value={segmentForm.tag_match}
+                              onValueChange={(value) => setSegmentForm({ ...segmentForm, tag_match: value })}
+                            >
+                              <SelectTrigger data-testid="segment-match-select">
+                                <SelectValue />
+                              </SelectTrigger>
+                              <SelectContent>
+                                <SelectItem value="any">Any tag</SelectItem>
+                                <SelectItem value="all">All tags</SelectItem>
+                              </SelectContent>
+                            </Select>
+                          </div>
+                        </div>
+                        <p className="text-xs text-slate-500">Leave tags empty to include every contact. Suppressed contacts are always skipped.</p>
+                        <Button
+                          type="button"
+                          data-testid="create-segment-button"
+                          size="sm"
+                          onClick={handleCreateSegment}
+                          disabled={!segmentForm.name.trim()}
+                        >
+                          Create Segment
+                        </Button>
+                      </div>
+                    )}
+                  </div>
+                )}
                 <div className="p-3 bg-blue-50 border border-blue-200 rounded-md">
                   <p className="text-sm text-blue-800">
                     System will enforce daily limits and auto-pause if deliverability risks are detected.
@@ -328,7 +500,10 @@ export default function CampaignsPage() {
                     <CardTitle className="text-xl">{campaign.name}</CardTitle>
                     <p className="text-sm text-slate-600 mt-1">{campaign.subject}</p>
                   </div>
-                  {getStatusBadge(campaign.status)}
+                  <div className="flex items-center gap-2">
+                    {campaign.content_risk_level && getRiskBadge(campaign.content_risk_level)}
+                    {getStatusBadge(campaign.status)}
+                  </div>
                 </div>
               </CardHeader>
               <CardContent className="space-y-4">
@@ -356,14 +531,14 @@ export default function CampaignsPage() {
                   </div>
                 </div>
 
-                {campaign.status === 'draft' && (
+                {(campaign.status === 'draft' || campaign.status === 'paused') && (
                   <Button
                     data-testid={`send-campaign-button-${campaign.id}`}
                     onClick={() => handleSendCampaign(campaign.id)}
                     className="w-full bg-slate-900 hover:bg-slate-800"
                   >
                     <Send className="w-4 h-4 mr-2" />
-                    Send Campaign
+                    {campaign.status === 'paused' ? 'Resume Sending' : 'Send Campaign'}
                   </Button>
                 )}
               </CardContent>
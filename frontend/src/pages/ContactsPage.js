@@ -8,12 +8,17 @@ import { Label } from '../components/ui/label';
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from '../components/ui/table';
 import { Badge } from '../components/ui/badge';
 import { toast } from 'sonner';
-import { Plus, Users, Mail } from 'lucide-react';
+import { Plus, Users, Mail, Search } from 'lucide-react';
+
+const PAGE_SIZE = 50;
 
 export default function ContactsPage() {
   const [contacts, setContacts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [dialogOpen, setDialogOpen] = useState(false);
+  const [searchQuery, setSearchQuery] = useState('');
   const [formData, setFormData] = useState({
     email: '',
     first_name: '',
@@ -21,14 +26,20 @@ export default function ContactsPage() {
     company: ''
   });
 
-  useEffect(() => {
-    loadContacts();
-  }, []);
+  // Pages come from the indexed server-side search; the cursor resumes after the last row shown
+  const fetchPage = async (query, after) => {
+    const params = { page_size: PAGE_SIZE };
+    if (query) params.q = query;
+    if (after) params.after = after;
+    const res = await api.get('/contacts/search', { params });
+    return res.data;
+  };
 
-  const loadContacts = async () => {
+  const loadContacts = async (query = searchQuery.trim()) => {
     try {
-      const res = await api.get('/contacts');
-      setContacts(res.data);
+      const page = await fetchPage(query);
+      setContacts(page.contacts);
+      setNextCursor(page.next_cursor);
     } catch (error) {
       console.error('Error loading contacts:', error);
     } finally {
@@ -36,6 +47,25 @@ export default function ContactsPage() {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(searchQuery.trim(), nextCursor);
+      setContacts((prev) => [...prev, ...page.contacts]);
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      console.error('Error loading contacts:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  useEffect(() => {
+    // Debounce typeahead; an empty query pages through all contacts
+    const timer = setTimeout(() => loadContacts(searchQuery.trim()), searchQuery ? 200 : 0);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
   const handleAddContact = async (e) => {
     e.preventDefault();
     try {
@@ -58,7 +88,9 @@ export default function ContactsPage() {
       <div className="flex items-center justify-between">
         <div>
           <h1 className="text-3xl font-bold text-slate-900 mb-2">Contacts</h1>
-          <p className="text-slate-600">{contacts.length} contacts in your list</p>
+          <p className="text-slate-600">
+            {contacts.length}{nextCursor ? '+' : ''} {searchQuery.trim() ? 'matching contacts' : 'contacts in your list'}
+          </p>
         </div>
         <Dialog open={dialogOpen} onOpenChange={setDialogOpen}>
           <DialogTrigger asChild>
@@ -131,7 +163,26 @@ export default function ContactsPage() {
         </Dialog>
       </div>
 
-      {contacts.length === 0 ? (
+      {(contacts.length > 0 || searchQuery) && (
+        <div className="relative max-w-sm">
+          <Search className="w-4 h-4 text-slate-400 absolute left-3 top-1/2 -translate-y-1/2" />
+          <Input
+            data-testid="contact-search-input"
+            placeholder="Search by email, name or company"
+            value={searchQuery}
+            onChange={(e) => setSearchQuery(e.target.value)}
+            className="pl-9"
+          />
+        </div>
+      )}
+
+      {contacts.length === 0 && searchQuery.trim() ? (
+        <Card>
+          <CardContent className="py-12">
+            <div className="text-center text-slate-600">No contacts match "{searchQuery.trim()}"</div>
+          </CardContent>
+        </Card>
+      ) : contacts.length === 0 ? (
         <Card>
           <CardContent className="py-12">
             <div className="text-center">
@@ -179,6 +230,18 @@ export default function ContactsPage() {
                 ))}
               </TableBody>
             </Table>
+            {nextCursor && (
+              <div className="p-4 text-center border-t">
+                <Button
+                  data-testid="load-more-contacts-button"
+                  variant="outline"
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </Button>
+              </div>
+            )}
           </CardContent>
         </Card>
       )}
@@ -107,6 +107,7 @@ export default function SendingAccountsPage({ user }) {
   const [selectedAccount, setSelectedAccount] = useState(null);
   const [deleteConfirmId, setDeleteConfirmId] = useState(null);
   const [verifyingId, setVerifyingId] = useState(null);
+  const [verifyingAll, setVerifyingAll] = useState(false);
   const [warmupStats, setWarmupStats] = useState(null);
   const [loadingStats, setLoadingStats] = useState(false);
 
@@ -150,15 +151,35 @@ export default function SendingAccountsPage({ user }) {
     }
   };
 
+  const handleVerifyAll = async () => {
+    setVerifyingAll(true);
+    try {
+      const response = await api.post('/sending-accounts/verify-all');
+      const { verified, failed } = response.data;
+      if (failed > 0) {
+        toast.error(`${verified} verified, ${failed} failed`);
+      } else {
+        toast.success(`${verified} accounts verified`);
+      }
+      fetchAccounts();
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Verification failed');
+    } finally {
+      setVerifyingAll(false);
+    }
+  };
+
+  // Mutations return the updated account, so patch local state instead of refetching
+  const applyAccountUpdate = (account) => {
+    setAccounts((prev) => prev.map((a) => (a.id === account.id ? account : a)));
+    setSelectedAccount((prev) => (prev?.id === account.id ? account : prev));
+  };
+
   const handlePause = async (accountId) => {
     try {
-      await api.post(`/sending-accounts/${accountId}/pause`);
+      const response = await api.post(`/sending-accounts/${accountId}/pause`);
       toast.success('Account paused');
-      fetchAccounts();
-      if (selectedAccount?.id === accountId) {
-        const updated = await api.get(`/sending-accounts/${accountId}`);
-        setSelectedAccount(updated.data);
-      }
+      applyAccountUpdate(response.data.account);
     } catch (error) {
       toast.error('Failed to pause account');
     }
@@ -166,13 +187,9 @@ export default function SendingAccountsPage({ user }) {
 
   const handleResume = async (accountId) => {
     try {
-      await api.post(`/sending-accounts/${accountId}/resume`);
+      const response = await api.post(`/sending-accounts/${accountId}/resume`);
       toast.success('Account resumed');
-      fetchAccounts();
-      if (selectedAccount?.id === accountId) {
-        const updated = await api.get(`/sending-accounts/${accountId}`);
-        setSelectedAccount(updated.data);
-      }
+      applyAccountUpdate(response.data.account);
     } catch (error) {
       toast.error('Failed to resume account');
     }
@@ -195,12 +212,10 @@ export default function SendingAccountsPage({ user }) {
 
   const handleStartWarmup = async (accountId) => {
     try {
-      await api.post(`/sending-accounts/${accountId}/warmup/start`);
+      const response = await api.post(`/sending-accounts/${accountId}/warmup/start`);
       toast.success('Warmup started');
-      fetchAccounts();
+      applyAccountUpdate(response.data.account);
       if (selectedAccount?.id === accountId) {
-        const updated = await api.get(`/sending-accounts/${accountId}`);
-        setSelectedAccount(updated.data);
         fetchWarmupStats(accountId);
       }
     } catch (error) {
@@ -210,13 +225,9 @@ export default function SendingAccountsPage({ user }) {
 
   const handlePauseWarmup = async (accountId) => {
     try {
-      await api.post(`/sending-accounts/${accountId}/warmup/pause`);
+      const response = await api.post(`/sending-accounts/${accountId}/warmup/pause`);
       toast.success('Warmup paused');
-      fetchAccounts();
-      if (selectedAccount?.id === accountId) {
-        const updated = await api.get(`/sending-accounts/${accountId}`);
-        setSelectedAccount(updated.data);
-      }
+      applyAccountUpdate(response.data.account);
     } catch (error) {
       toast.error('Failed to pause warmup');
     }
@@ -355,10 +366,22 @@ export default function SendingAccountsPage({ user }) {
         <CardHeader className="border-b">
           <div className="flex items-center justify-between">
             <CardTitle className="text-lg">All Sending Accounts</CardTitle>
-            <Button variant="outline" size="sm" onClick={fetchAccounts} className="gap-2">
-              <RefreshCw className="w-4 h-4" />
-              Refresh
-            </Button>
+            <div className="flex items-center gap-2">
+              <Button
+                variant="outline"
+                size="sm"
+                onClick={handleVerifyAll}
+                disabled={verifyingAll || accounts.length === 0}
+                className="gap-2"
+              >
+                <CheckCircle2 className="w-4 h-4" />
+                {verifyingAll ? 'Verifying...' : 'Verify All'}
+              </Button>
+              <Button variant="outline" size="sm" onClick={fetchAccounts} className="gap-2">
+                <RefreshCw className="w-4 h-4" />
+                Refresh
+              </Button>
+            </div>
           </div>
         </CardHeader>
         <CardContent className="p-0">
@@ -520,6 +543,7 @@ export default function SendingAccountsPage({ user }) {
         onDelete={(id) => setDeleteConfirmId(id)}
         onStartWarmup={handleStartWarmup}
         onPauseWarmup={handlePauseWarmup}
+        onAccountUpdated={applyAccountUpdate}
         onRefresh={() => {
           if (selectedAccount) {
             fetchWarmupStats(selectedAccount.id);
@@ -799,6 +823,7 @@ function AccountDetailSheet({
   onDelete,
   onStartWarmup,
   onPauseWarmup,
+  onAccountUpdated,
   onRefresh,
   verifyingId 
 }) {
@@ -835,8 +860,9 @@ function AccountDetailSheet({
     if (!account) return;
     setSavingSettings(true);
     try {
-      await api.patch(`/sending-accounts/${account.id}/warmup/settings`, warmupSettings);
+      const response = await api.patch(`/sending-accounts/${account.id}/warmup/settings`, warmupSettings);
       toast.success('Warmup settings updated');
+      onAccountUpdated(response.data.account);
       setEditingSettings(false);
     } catch (error) {
       toast.error('Failed to update settings');
@@ -1,9 +1,19 @@
+import { useState, useEffect } from 'react';
+import { api } from '../App';
 import { Card, CardHeader, CardTitle, CardContent } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { Badge } from '../components/ui/badge';
 import { TrendingUp, Check, Lock } from 'lucide-react';
 
 export default function UpgradePage({ user }) {
+  const [usage, setUsage] = useState(null);
+
+  useEffect(() => {
+    api.get('/usage')
+      .then((res) => setUsage(res.data))
+      .catch((error) => console.error('Error loading usage:', error));
+  }, []);
+
   const plans = [
     {
       name: 'Free',
@@ -40,6 +50,13 @@ export default function UpgradePage({ user }) {
         <Badge className="mt-3 bg-green-100 text-green-800">
           Current: {user?.plan || 'Free'} Plan
         </Badge>
+        {usage && (
+          <p data-testid="plan-usage" className="mt-3 text-sm text-slate-600">
+            {usage.usage.domains} / {usage.limits.max_domains} domains used
+            {' · '}{usage.usage.sending_accounts} sending accounts
+            {' · '}{usage.usage.contacts} contacts
+          </p>
+        )}
       </div>
 
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6">
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Synthetic Tenant Data Generator
+===============================
+Populates a database with N synthetic tenants for performance testing:
+users, domains, contacts, segments, campaigns, suppression entries, sending
+accounts and sending-account warmup logs.
+
+Documents are built from the server's own models (User, Domain, Contact,
+Segment, Campaign, SuppressedEmail, SendingAccount, SendingAccountWarmupLog),
+so they have exactly the fields and defaults the API writes: uuid ids,
+isoformat datetimes, stored search_keys on contacts and a bcrypt password
+hash on users. All users share one password (hashed once; bcrypt per user
+would dominate the run).
+
+Per-tenant counts take a distribution:
+    500          every tenant gets 500
+    100-5000     uniform between 100 and 5000
+    pareto:2000  heavy-tailed with mean ~2000 (a few very large tenants)
+
+Tenants are split across worker processes; each generates its share and
+writes with unordered insert_many batches on its own connection. Runs are
+reproducible for a given --seed regardless of --workers (ids excepted).
+Indexes are created after loading, which is faster than maintaining them
+during the inserts.
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python generate_tenant_data.py --db perf_test --tenants 1000
+    python generate_tenant_data.py --db perf_test --tenants 10000 --contacts pareto:2000 --workers 8
+    python generate_tenant_data.py --db perf_test --tenants 50 --contacts 100000 --drop
+"""
+
+import sys
+import os
+import time
+import random
+import asyncio
+import argparse
+import logging
+import multiprocessing
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from pymongo import MongoClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_PASSWORD = "Synthetic@123"
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Priya", "Wei",
+               "Aarav", "Sofia", "Mateo", "Yuki", "Fatima", "Olumide", "Lukas", "Chloe", "Diego", "Amara"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee",
+              "Patel", "Chen", "Kim", "Nguyen", "Okafor", "Muller", "Rossi", "Dubois", "Tanaka", "Silva"]
+COMPANY_WORDS = ["Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Hooli", "Vandelay", "Soylent", "Cyberdyne",
+                 "Tyrell", "Wonka", "Aperture", "Massive", "Dynamic", "Blue", "Summit", "Vertex", "Nimbus", "Quantum"]
+COMPANY_SUFFIXES = ["Labs", "Systems", "Group", "Partners", "Holdings", "Software", "Analytics", "Logistics", "Health", "Capital"]
+TAGS = ["lead", "customer", "prospect", "newsletter", "vip", "webinar", "trial", "churned", "partner", "event"]
+SUBJECTS = ["Quick question about {company}", "Ideas for your team", "Following up", "Your onboarding, simplified",
+            "{first_name}, worth a chat?", "Monthly product update", "Invitation: customer roundtable"]
+BODY = ("Hi {first_name},\n\nI noticed {company} has been growing and wanted to share how teams like yours "
+        "handle outbound without hurting deliverability. Would a short call next week be useful?\n\nBest,\nAlex")
+
+PLAN_WEIGHTS = {"free": 60, "premium": 25, "pro": 12, "enterprise": 3}
+DOMAIN_MODE_WEIGHTS = {"cold_outreach": 60, "founder_outbound": 25, "newsletter": 15}
+CAMPAIGN_STATUS_WEIGHTS = {"completed": 70, "draft": 20, "paused": 5, "scheduled": 5}
+PROVIDER_WEIGHTS = {"gmail": 45, "outlook": 30, "smtp": 25}
+SUPPRESSION_REASON_WEIGHTS = {"hard_bounce": 60, "unsubscribe": 30, "spam_complaint": 10}
+
+# Order matters for --drop and the summary only
+COLLECTIONS = ["users", "domains", "contacts", "segments", "campaigns", "suppressed_emails",
+               "sending_accounts", "sending_account_warmup_logs"]
+
+
+class Distribution:
+    """Per-tenant count: constant 'N', uniform 'A-B' or heavy-tailed 'pareto:MEAN'"""
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        try:
+            if spec.startswith("pareto:"):
+                self.kind, self.mean = "pareto", float(spec.split(":", 1)[1])
+            elif "-" in spec:
+                low, high = spec.split("-", 1)
+                self.kind, self.low, self.high = "uniform", int(low), int(high)
+                if self.low > self.high:
+                    raise ValueError
+            else:
+                self.kind, self.value = "constant", int(spec)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid distribution '{spec}' (use N, A-B or pareto:MEAN)")
+
+    def sample(self, rng: random.Random) -> int:
+        if self.kind == "constant":
+            return self.value
+        if self.kind == "uniform":
+            return rng.randint(self.low, self.high)
+        # Shape 2 gives mean = 2 * scale; cap so a single tenant can't dwarf the run
+        alpha = 2.0
+        scale = self.mean * (alpha - 1) / alpha
+        return int(min(scale * rng.paretovariate(alpha), self.mean * 100))
+
+    def __repr__(self):
+        return self.spec
+
+
+def weighted(rng: random.Random, weights: Dict[str, int]) -> str:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def isoformat_dates(doc: dict, *fields: str) -> dict:
+    """Store datetimes as isoformat strings, as the API does"""
+    for field in fields:
+        if isinstance(doc.get(field), datetime):
+            doc[field] = doc[field].isoformat()
+    return doc
+
+
+class TenantGenerator:
+    """Builds every document for one tenant from the server models"""
+
+    def __init__(self, models, args, run_id: str, password_hash: str):
+        self.m = models
+        self.args = args
+        self.run_id = run_id
+        self.password_hash = password_hash
+        self.now = datetime.now(timezone.utc)
+
+    def _past(self, rng: random.Random, max_days: int) -> datetime:
+        return self.now - timedelta(days=rng.uniform(0, max_days))
+
+    def generate(self, tenant_index: int) -> Dict[str, List[dict]]:
+        m, args = self.m, self.args
+        rng = random.Random(args.seed * 1_000_003 + tenant_index)
+        docs: Dict[str, List[dict]] = {name: [] for name in COLLECTIONS}
+        tenant_created = self._past(rng, args.history_days)
+        tenant_key = f"{self.run_id}-t{tenant_index}"
+
+        user = m.User.model_construct(
+            email=f"owner@{tenant_key}.example.com",
+            full_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            plan=weighted(rng, PLAN_WEIGHTS),
+            created_at=tenant_created
+        ).model_dump()
+        user['password'] = self.password_hash
+        docs["users"].append(isoformat_dates(user, 'created_at'))
+        user_id = user['id']
+
+        domain_ids = []
+        for i in range(max(1, args.domains.sample(rng))):
+            warmup_day = rng.randint(0, 30)
+            domain = m.Domain.model_construct(
+                user_id=user_id,
+                domain=f"mail{i}.{tenant_key}.example.com",
+                mode=weighted(rng, DOMAIN_MODE_WEIGHTS),
+                health_score=rng.randint(60, 100),
+                warmup_day=warmup_day,
+                warmup_completed=warmup_day >= 15,
+                daily_limit=20 + warmup_day * 5,
+                sent_today=rng.randint(0, 20),
+                spf_valid=rng.random() < 0.8,
+                dkim_valid=rng.random() < 0.7,
+                dmarc_valid=rng.random() < 0.6,
+                created_at=tenant_created + timedelta(days=rng.uniform(0, 3))
+            ).model_dump()
+            domain_ids.append(domain['id'])
+            docs["domains"].append(isoformat_dates(domain, 'created_at', 'last_reset'))
+
+        for i in range(args.contacts.sample(rng)):
+            first_name = rng.choice(FIRST_NAMES)
+            last_name = rng.choice(LAST_NAMES)
+            company = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}"
+            contact = m.Contact.model_construct(
+                user_id=user_id,
+                email=f"{first_name.lower()}.{last_name.lower()}{i}@{company.split()[0].lower()}{i % 997}.example.com",
+                first_name=first_name,
+                last_name=last_name,
+                company=company,
+                tags=rng.sample(TAGS, rng.randint(0, 3)),
+                is_suppressed=rng.random() < args.suppressed_ratio,
+                created_at=self._past(rng, args.history_days)
+            )
+            contact_doc = contact.model_dump()
+            contact_doc['search_keys'] = m.contact_search_keys(contact)
+            docs["contacts"].append(isoformat_dates(contact_doc, 'created_at'))
+
+            if contact_doc['is_suppressed']:
+                suppressed = m.SuppressedEmail.model_construct(
+                    user_id=user_id,
+                    email=contact_doc['email'],
+                    reason=weighted(rng, SUPPRESSION_REASON_WEIGHTS),
+                    source="synthetic",
+                    created_at=self._past(rng, args.history_days)
+                ).model_dump()
+                docs["suppressed_emails"].append(isoformat_dates(suppressed, 'created_at'))
+
+        segment_ids = []
+        for i in range(args.segments.sample(rng)):
+            segment = m.Segment.model_construct(
+                user_id=user_id,
+                name=f"Segment {i + 1}",
+                tags=rng.sample(TAGS, rng.randint(1, 2)),
+                tag_match=rng.choice(["any", "all"]),
+                created_at=self._past(rng, args.history_days)
+            ).model_dump()
+            segment_ids.append(segment['id'])
+            docs["segments"].append(isoformat_dates(segment, 'created_at'))
+
+        for i in range(args.campaigns.sample(rng)):
+            status = weighted(rng, CAMPAIGN_STATUS_WEIGHTS)
+            sent = rng.randint(50, 5000) if status in ("completed", "paused") else 0
+            bounced = int(sent * rng.uniform(0, 0.06))
+            spam = int(sent * rng.uniform(0, 0.004))
+            company = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}"
+            fields = {"first_name": "{{first_name}}", "company": company}
+            use_segment = segment_ids and rng.random() < 0.5
+            campaign = m.Campaign.model_construct(
+                user_id=user_id,
+                domain_id=rng.choice(domain_ids),
+                name=f"Campaign {i + 1}",
+                subject=rng.choice(SUBJECTS).format(**fields),
+                body=BODY.format(**fields),
+                recipients=[] if use_segment else [f"recipient{j}@{tenant_key}.example.com" for j in range(rng.randint(1, 5))],
+                segment_id=rng.choice(segment_ids) if use_segment else None,
+                status=status,
+                sent_count=sent,
+                delivered_count=sent - bounced - spam,
+                bounce_count=bounced,
+                spam_count=spam,
+                reply_count=int(sent * rng.uniform(0, 0.05)),
+                created_at=self._past(rng, args.history_days),
+                scheduled_at=self.now + timedelta(days=rng.uniform(1, 14)) if status == "scheduled" else None
+            ).model_dump()
+            docs["campaigns"].append(isoformat_dates(campaign, 'created_at', 'scheduled_at', 'content_scored_at'))
+
+        for i in range(args.sending_accounts.sample(rng)):
+            provider = weighted(rng, PROVIDER_WEIGHTS)
+            warmup_day = rng.randint(0, 40)
+            status = "completed" if warmup_day >= 30 else rng.choice(["active", "active", "active", "paused", "inactive"])
+            created_at = self.now - timedelta(days=warmup_day + rng.uniform(0, 5))
+            account_kwargs = {}
+            if provider == "smtp":
+                account_kwargs = {"smtp_host": "smtp.example.com", "smtp_port": 587, "smtp_username": f"sender{i}"}
+            account = m.SendingAccount.model_construct(
+                user_id=user_id,
+                email=f"sender{i}@{tenant_key}.example.com",
+                provider=provider,
+                warmup_enabled=status != "inactive",
+                warmup_day=warmup_day,
+                warmup_completed=status == "completed",
+                warmup_status=status,
+                is_verified=rng.random() < 0.9,
+                is_paused=status == "paused",
+                pause_reason="Paused by user" if status == "paused" else None,
+                created_at=created_at,
+                updated_at=created_at,
+                **account_kwargs
+            )
+
+            # One warmup log per day the account has been warming up
+            total_sent = total_bounces = total_spam = total_replies = total_opens = 0
+            volume = account.warmup_daily_volume
+            for day in range(1, warmup_day + 1):
+                volume = min(volume + account.warmup_ramp_up, account.daily_send_limit)
+                bounces = int(volume * rng.uniform(0, 0.02))
+                spam_flags = 1 if rng.random() < 0.01 else 0
+                delivered = volume - bounces
+                replies = int(delivered * account.warmup_reply_rate / 100 * rng.uniform(0.8, 1.2))
+                opens = int(delivered * rng.uniform(0.4, 0.7))
+                log = m.SendingAccountWarmupLog.model_construct(
+                    sending_account_id=account.id,
+                    day=day,
+                    emails_sent=volume,
+                    emails_delivered=delivered,
+                    replies_received=replies,
+                    spam_flags=spam_flags,
+                    bounce_count=bounces,
+                    open_count=opens,
+                    date=created_at + timedelta(days=day)
+                ).model_dump()
+                docs["sending_account_warmup_logs"].append(isoformat_dates(log, 'date'))
+                total_sent += volume
+                total_bounces += bounces
+                total_spam += spam_flags
+                total_replies += replies
+                total_opens += opens
+
+            account_doc = account.model_dump()
+            account_doc.update({
+                "total_emails_sent": total_sent,
+                "total_bounces": total_bounces,
+                "total_spam_complaints": total_spam,
+                "total_replies": total_replies,
+                "total_opens": total_opens,
+                "bounce_rate": round(total_bounces / total_sent * 100, 2) if total_sent else 0.0,
+                "spam_rate": round(total_spam / total_sent * 100, 2) if total_sent else 0.0,
+                "last_activity": created_at + timedelta(days=warmup_day) if warmup_day else None,
+            })
+            docs["sending_accounts"].append(isoformat_dates(account_doc, 'created_at', 'updated_at', 'last_activity'))
+
+        return docs
+
+
+def load_models():
+    """The server module reads its DB settings at import; it only needs them to be present"""
+    import server
+    return server
+
+
+def worker(task) -> Dict[str, int]:
+    """Generate and insert a range of tenants; returns documents written per collection"""
+    start, end, args, run_id, password_hash = task
+    generator = TenantGenerator(load_models(), args, run_id, password_hash)
+    client = MongoClient(args.mongo_url)
+    db = client[args.db]
+    buffers: Dict[str, List[dict]] = {name: [] for name in COLLECTIONS}
+    written = {name: 0 for name in COLLECTIONS}
+
+    def flush(name: str):
+        if buffers[name]:
+            db[name].insert_many(buffers[name], ordered=False)
+            written[name] += len(buffers[name])
+            buffers[name] = []
+
+    try:
+        for tenant_index in range(start, end):
+            for name, docs in generator.generate(tenant_index).items():
+                buffers[name].extend(docs)
+                if len(buffers[name]) >= args.batch_size:
+                    flush(name)
+        for name in COLLECTIONS:
+            flush(name)
+    finally:
+        client.close()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic tenants for performance testing")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.environ.get("DB_NAME", "perf_test"), help="Target database")
+    parser.add_argument("--tenants", type=int, required=True)
+    parser.add_argument("--domains", type=Distribution, default=Distribution("1-3"), help="Domains per tenant")
+    parser.add_argument("--contacts", type=Distribution, default=Distribution("pareto:2000"), help="Contacts per tenant")
+    parser.add_argument("--segments", type=Distribution, default=Distribution("0-5"), help="Segments per tenant")
+    parser.add_argument("--campaigns", type=Distribution, default=Distribution("0-50"), help="Campaigns per tenant")
+    parser.add_argument("--sending-accounts", type=Distribution, default=Distribution("1-5"), help="Sending accounts per tenant")
+    parser.add_argument("--suppressed-ratio", type=float, default=0.02, help="Share of contacts that are suppressed")
+    parser.add_argument("--history-days", type=int, default=365, help="Spread created_at over this many past days")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Password shared by every generated user")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--batch-size", type=int, default=5000, help="Documents per insert_many")
+    parser.add_argument("--drop", action="store_true", help="Drop the generated collections first")
+    parser.add_argument("--skip-indexes", action="store_true", help="Don't create the server's indexes afterwards")
+    args = parser.parse_args()
+
+    if args.tenants < 1:
+        parser.error("--tenants must be at least 1")
+    if not 0 <= args.suppressed_ratio <= 1:
+        parser.error("--suppressed-ratio must be between 0 and 1")
+
+    # Workers import the server models; point its settings at the target database
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db
+    os.environ["ENABLE_SCHEDULER"] = "false"
+    server = load_models()
+
+    if args.drop:
+        client = MongoClient(args.mongo_url)
+        try:
+            for name in COLLECTIONS:
+                client[args.db].drop_collection(name)
+        finally:
+            client.close()
+        logger.info(f"Dropped generated collections in {args.db}")
+
+    run_id = f"s{args.seed}-{int(time.time()):x}"
+    password_hash = server.hash_password(args.password)
+
+    # Small slices keep workers busy when a few tenants are much larger than the rest
+    slice_size = max(1, min(100, args.tenants // (args.workers * 8) or 1))
+    tasks = [
+        (start, min(start + slice_size, args.tenants), args, run_id, password_hash)
+        for start in range(0, args.tenants, slice_size)
+    ]
+    logger.info(
+        f"Generating {args.tenants} tenants into {args.db} with {args.workers} workers "
+        f"(domains={args.domains}, contacts={args.contacts}, segments={args.segments}, "
+        f"campaigns={args.campaigns}, sending_accounts={args.sending_accounts})"
+    )
+
+    started = time.perf_counter()
+    totals = {name: 0 for name in COLLECTIONS}
+    with multiprocessing.Pool(args.workers) as pool:
+        for done, written in enumerate(pool.imap_unordered(worker, tasks), 1):
+            for name, count in written.items():
+                totals[name] += count
+            if done % max(1, len(tasks) // 20) == 0 or done == len(tasks):
+                elapsed = time.perf_counter() - started
+                documents = sum(totals.values())
+                logger.info(f"{done}/{len(tasks)} slices, {documents:,} documents ({documents / elapsed:,.0f}/s)")
+
+    elapsed = time.perf_counter() - started
+    for name in COLLECTIONS:
+        logger.info(f"  {name}: {totals[name]:,}")
+    logger.info(f"Inserted {sum(totals.values()):,} documents in {elapsed:.1f}s")
+
+    if not args.skip_indexes:
+        index_started = time.perf_counter()
+        asyncio.run(server.create_indexes())
+        logger.info(f"Indexes created in {time.perf_counter() - index_started:.1f}s")
+
+    logger.info(f"Generated users log in with password '{args.password}'")
+
+
+if __name__ == "__main__":
+    main()
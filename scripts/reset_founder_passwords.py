@@ -25,6 +25,7 @@ from pymongo import MongoClient
 import bcrypt
 import logging
 import getpass
+import uuid
 
 # Configure logging
 logging.basicConfig(
@@ -123,7 +124,9 @@ def reset_founder_password(db, founder_email: str, new_password_hash: str) -> bo
                     "password": new_password_hash,
                     "password_changed_at": datetime.now(timezone.utc).isoformat(),
                     "password_reset_required": True  # Force password change on next login
-                }
+                },
+                # Revokes every access and refresh token issued before the reset
+                "$inc": {"token_version": 1}
             }
         )
         
@@ -132,11 +135,11 @@ def reset_founder_password(db, founder_email: str, new_password_hash: str) -> bo
             
             # Invalidate all existing sessions for security
             session_result = db.sessions.delete_many({"user_id": user["id"]})
-            logger.info(f"🔒 Invalidated {session_result.deleted_count} active sessions for {founder_email}")
+            logger.info(f"🔒 Invalidated {session_result.deleted_count} active sessions and revoked issued tokens for {founder_email}")
             
             # Log security audit event
             audit_log = {
-                "id": str(__import__('uuid').uuid4()),
+                "id": str(uuid.uuid4()),
                 "user_id": user["id"],
                 "event_type": "admin_password_reset",
                 "email": founder_email,
@@ -160,25 +163,37 @@ def reset_founder_password(db, founder_email: str, new_password_hash: str) -> bo
         return False
 
 
-def send_password_reset_notification(email: str, full_name: str):
+def send_password_reset_notification(db, email: str, full_name: str):
     """
-    Send email notification about password reset
+    Queue an email notification about the password reset
     
-    Note: This is a placeholder. In production, integrate with your email service.
-    """
-    logger.info(f"📧 Email notification would be sent to: {email}")
-    logger.info(f"   Subject: Your WarmUp Master Password Has Been Reset")
-    logger.info(f"   Message: Your password has been reset by an administrator.")
-    logger.info(f"           Please log in with your temporary password and change it immediately.")
+    The message is written to the email_outbox collection; the backend's
+    outbox worker delivers it over SMTP with retries.
     
-    # TODO: Integrate with actual email service (SendGrid, AWS SES, etc.)
-    # Example:
-    # email_service.send(
-    #     to=email,
-    #     subject="Your WarmUp Master Password Has Been Reset",
-    #     template="password_reset_notification",
-    #     data={"full_name": full_name, "login_url": "https://app.warmupmaster.com/auth"}
-    # )
+    Args:
+        db: MongoDB database connection
+        email: Email of founder account
+        full_name: Display name used in the greeting
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    db.email_outbox.insert_one({
+        "id": str(uuid.uuid4()),
+        "to": email,
+        "subject": "Your WarmUp Master Password Has Been Reset",
+        "body": (
+            f"Hi {full_name},\n\n"
+            "Your password has been reset by an administrator.\n"
+            "Please log in with your temporary password and change it immediately.\n"
+        ),
+        "kind": "notification",
+        "status": "pending",
+        "attempts": 0,
+        "last_error": None,
+        "next_attempt_at": now,
+        "created_at": now,
+        "sent_at": None
+    })
+    logger.info(f"📧 Email notification queued for: {email}")
 
 
 def main():
@@ -240,7 +255,7 @@ def main():
         
         if reset_founder_password(db, email, new_password_hash):
             success_count += 1
-            send_password_reset_notification(email, full_name)
+            send_password_reset_notification(db, email, full_name)
         else:
             failed_count += 1
     
@@ -256,7 +271,7 @@ def main():
         logger.info("   1. New temporary password: Mainuser@123")
         logger.info("   2. Users MUST change this password on next login")
         logger.info("   3. All active sessions have been invalidated")
-        logger.info("   4. Email notifications have been sent")
+        logger.info("   4. Email notifications have been queued")
         logger.info("   5. All actions logged to security audit log")
     
     # Close database connection
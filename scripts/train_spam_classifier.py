@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Spam Classifier Training Script
+===============================
+Fits the local spam classifier used by the API's default /spam-score path.
+
+Training data:
+- Labelled examples: JSONL with subject, body, mode and label (1 = spam, 0 = ok)
+- Campaign outcome history: campaigns whose spam/bounce rates crossed the
+  thresholds below are labelled spam, clean campaigns with enough volume are
+  labelled ok, and everything in between is skipped as inconclusive
+
+The model is written to backend/models/spam_classifier, where the server
+loads it (memory-mapped) at startup. Override with SPAM_MODEL_PATH.
+
+Usage:
+    python train_spam_classifier.py --examples labelled.jsonl
+    python train_spam_classifier.py --from-campaigns
+    python train_spam_classifier.py --examples labelled.jsonl --from-campaigns
+"""
+
+import sys
+import os
+import json
+import argparse
+import logging
+from pathlib import Path
+from pymongo import MongoClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from spam_classifier import DEFAULT_N_FEATURES, train  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Outcome thresholds for labelling campaign history
+MIN_SENT_FOR_LABEL = 50
+SPAM_RATE_THRESHOLD = 0.003   # complaints above 0.3% mark content as spam
+BOUNCE_RATE_THRESHOLD = 0.05  # bounces above 5% usually mean the mail was filtered
+CLEAN_SPAM_RATE = 0.0005
+CLEAN_BOUNCE_RATE = 0.01
+
+
+def load_examples(path: str):
+    """Labelled examples from a JSONL file"""
+    examples = []
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+                examples.append((row["subject"], row["body"], row.get("mode", "cold_outreach"), int(row["label"])))
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Skipping line {line_no}: {e}")
+    logger.info(f"Loaded {len(examples)} labelled examples from {path}")
+    return examples
+
+
+def campaign_label(campaign: dict):
+    """1 = spam, 0 = ok, None = not enough signal"""
+    sent = campaign.get("sent_count", 0)
+    if sent < MIN_SENT_FOR_LABEL:
+        return None
+    spam_rate = campaign.get("spam_count", 0) / sent
+    bounce_rate = campaign.get("bounce_count", 0) / sent
+    if spam_rate >= SPAM_RATE_THRESHOLD or bounce_rate >= BOUNCE_RATE_THRESHOLD:
+        return 1
+    if spam_rate <= CLEAN_SPAM_RATE and bounce_rate <= CLEAN_BOUNCE_RATE:
+        return 0
+    return None
+
+
+def load_campaign_history(db):
+    """Examples labelled from campaign bounce and spam outcomes"""
+    domain_modes = {
+        d["id"]: d.get("mode", "cold_outreach")
+        for d in db.domains.find({}, {"_id": 0, "id": 1, "mode": 1})
+    }
+
+    examples = []
+    skipped = 0
+    cursor = db.campaigns.find(
+        {"sent_count": {"$gte": MIN_SENT_FOR_LABEL}},
+        {"_id": 0, "domain_id": 1, "subject": 1, "body": 1, "sent_count": 1, "bounce_count": 1, "spam_count": 1}
+    ).batch_size(1000)
+    for campaign in cursor:
+        label = campaign_label(campaign)
+        if label is None:
+            skipped += 1
+            continue
+        mode = domain_modes.get(campaign.get("domain_id"), "cold_outreach")
+        examples.append((campaign.get("subject", ""), campaign.get("body", ""), mode, label))
+
+    logger.info(f"Labelled {len(examples)} campaigns from outcome history ({skipped} inconclusive)")
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local spam classifier")
+    parser.add_argument("--examples", help="JSONL file of labelled examples")
+    parser.add_argument("--from-campaigns", action="store_true", help="Label campaign history by bounce/spam outcomes")
+    parser.add_argument("--output", default=os.environ.get("SPAM_MODEL_PATH", str(BACKEND_DIR / "models" / "spam_classifier")))
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--n-features", type=int, default=DEFAULT_N_FEATURES)
+    args = parser.parse_args()
+
+    if not args.examples and not args.from_campaigns:
+        parser.error("Provide --examples and/or --from-campaigns")
+
+    examples = []
+    if args.examples:
+        examples.extend(load_examples(args.examples))
+
+    if args.from_campaigns:
+        client = MongoClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+        try:
+            examples.extend(load_campaign_history(client[os.environ.get("DB_NAME", "test_database")]))
+        finally:
+            client.close()
+
+    if not examples:
+        logger.error("No training examples found")
+        sys.exit(1)
+
+    n_spam = sum(label for *_, label in examples)
+    logger.info(f"Training on {len(examples)} examples ({n_spam} spam, {len(examples) - n_spam} ok)")
+    model = train(examples, n_features=args.n_features, epochs=args.epochs)
+
+    correct = sum((model.predict_proba(s, b, m) >= 0.5) == bool(label) for s, b, m, label in examples)
+    logger.info(f"Training accuracy: {correct / len(examples):.1%}")
+
+    model.save(Path(args.output))
+    logger.info(f"Model written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def loop():
+    # The server's Motor client binds to the first loop it runs on, so every test shares one
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    asyncio.set_event_loop(None)
+    loop.close()
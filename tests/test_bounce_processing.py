@@ -0,0 +1,172 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from bounce_processing import (  # noqa: E402
+    ACCOUNT_HEADER,
+    CAMPAIGN_HEADER,
+    MaildirSource,
+    classify_bounce,
+    parse_report,
+)
+
+ORIGINAL_HEADERS = (
+    "From: sender@warm.example\r\n"
+    "To: reader@inbox.example\r\n"
+    "Subject: Hello\r\n"
+    f"{CAMPAIGN_HEADER}: campaign-1\r\n"
+    f"{ACCOUNT_HEADER}: account-1\r\n"
+)
+
+
+def dsn(recipient_blocks, original=ORIGINAL_HEADERS):
+    """A multipart/report DSN with one delivery-status block per recipient"""
+    blocks = "\r\n".join(
+        f"Final-Recipient: rfc822; {rcpt}\r\nAction: {action}\r\nStatus: {status}\r\n"
+        for rcpt, action, status in recipient_blocks
+    )
+    parts = [
+        'Content-Type: text/plain\r\n\r\nDelivery failed.\r\n',
+        "Content-Type: message/delivery-status\r\n\r\n"
+        "Reporting-MTA: dns; mx.inbox.example\r\n\r\n"
+        f"{blocks}",
+    ]
+    if original is not None:
+        parts.append(f"Content-Type: text/rfc822-headers\r\n\r\n{original}")
+    body = "".join(f"--BOUNDARY\r\n{part}\r\n" for part in parts)
+    return (
+        "From: MAILER-DAEMON@inbox.example\r\n"
+        "To: bounces@warm.example\r\n"
+        "Subject: Undelivered Mail\r\n"
+        "MIME-Version: 1.0\r\n"
+        'Content-Type: multipart/report; report-type=delivery-status; boundary="BOUNDARY"\r\n'
+        "\r\n"
+        f"{body}--BOUNDARY--\r\n"
+    ).encode()
+
+
+def arf(feedback_fields, original=ORIGINAL_HEADERS):
+    """A multipart/report ARF complaint quoting the original message"""
+    return (
+        "From: fbl@isp.example\r\n"
+        "To: abuse@warm.example\r\n"
+        "Subject: Complaint\r\n"
+        "MIME-Version: 1.0\r\n"
+        'Content-Type: multipart/report; report-type=feedback-report; boundary="BOUNDARY"\r\n'
+        "\r\n"
+        "--BOUNDARY\r\n"
+        "Content-Type: text/plain\r\n\r\nThis is an abuse report.\r\n"
+        "--BOUNDARY\r\n"
+        "Content-Type: message/feedback-report\r\n\r\n"
+        f"{feedback_fields}\r\n"
+        "--BOUNDARY\r\n"
+        "Content-Type: message/rfc822\r\n\r\n"
+        f"{original}\r\nBody of the original message.\r\n"
+        "--BOUNDARY--\r\n"
+    ).encode()
+
+
+@pytest.mark.parametrize("action, status, expected", [
+    ("failed", "5.1.1", "hard_bounce"),
+    ("failed", "5.7.1", "hard_bounce"),
+    ("failed", "5.2.2", "soft_bounce"),  # mailbox full is worth retrying
+    ("failed", "4.4.7", "soft_bounce"),
+    ("delayed", "4.2.0", "soft_bounce"),
+    ("failed", "", "hard_bounce"),
+    ("Failed", "5.1.1", "hard_bounce"),
+    ("delivered", "2.0.0", None),
+    ("relayed", "2.0.0", None),
+    ("expanded", "2.0.0", None),
+])
+def test_classify_bounce(action, status, expected):
+    assert classify_bounce(action, status) == expected
+
+
+def test_dsn_reports_each_failed_recipient():
+    reports = parse_report(dsn([
+        ("gone@inbox.example", "failed", "5.1.1"),
+        ("Full@Inbox.example", "failed", "5.2.2 (mailbox full)"),
+        ("fine@inbox.example", "delivered", "2.0.0"),
+    ]))
+
+    assert [(r.recipient, r.kind, r.status) for r in reports] == [
+        ("gone@inbox.example", "hard_bounce", "5.1.1"),
+        ("full@inbox.example", "soft_bounce", "5.2.2"),
+    ]
+
+
+def test_dsn_without_action_counts_as_failed():
+    raw = dsn([("gone@inbox.example", "failed", "5.1.1")]).replace(b"Action: failed\r\n", b"")
+
+    reports = parse_report(raw)
+
+    assert [(r.recipient, r.kind) for r in reports] == [("gone@inbox.example", "hard_bounce")]
+
+
+def test_dsn_is_attributed_through_quoted_headers():
+    reports = parse_report(dsn([("gone@inbox.example", "failed", "5.1.1")]))
+
+    assert reports[0].campaign_id == "campaign-1"
+    assert reports[0].sending_account_id == "account-1"
+
+
+def test_dsn_without_original_headers_is_unattributed():
+    reports = parse_report(dsn([("gone@inbox.example", "failed", "5.1.1")], original=None))
+
+    assert reports[0].campaign_id is None
+    assert reports[0].sending_account_id is None
+
+
+def test_arf_complaint_uses_original_rcpt_to():
+    reports = parse_report(arf(
+        "Feedback-Type: abuse\r\n"
+        "User-Agent: FBL/1.0\r\n"
+        "Version: 1\r\n"
+        "Original-Rcpt-To: <Reader@Inbox.example>\r\n"
+    ))
+
+    assert len(reports) == 1
+    assert reports[0].kind == "spam_complaint"
+    assert reports[0].recipient == "reader@inbox.example"
+    assert reports[0].campaign_id == "campaign-1"
+    assert reports[0].sending_account_id == "account-1"
+
+
+def test_arf_complaint_falls_back_to_original_to():
+    reports = parse_report(arf("Feedback-Type: abuse\r\nUser-Agent: FBL/1.0\r\nVersion: 1\r\n"))
+
+    assert [(r.kind, r.recipient) for r in reports] == [("spam_complaint", "reader@inbox.example")]
+
+
+def test_arf_other_feedback_types_are_ignored():
+    reports = parse_report(arf(
+        "Feedback-Type: not-spam\r\n"
+        "User-Agent: FBL/1.0\r\n"
+        "Version: 1\r\n"
+        "Original-Rcpt-To: reader@inbox.example\r\n"
+    ))
+
+    assert reports == []
+
+
+def test_non_report_messages_are_skipped():
+    raw = b"From: a@example.com\r\nTo: b@example.com\r\nSubject: Hi\r\n\r\nJust a reply.\r\n"
+
+    assert parse_report(raw) == []
+
+
+def test_maildir_source_fetches_and_acks(tmp_path):
+    source = MaildirSource(str(tmp_path / "bounces"))
+    for recipient in ("one@inbox.example", "two@inbox.example", "three@inbox.example"):
+        source.mailbox.add(dsn([(recipient, "failed", "5.1.1")]))
+
+    batch = source.fetch(limit=2)
+    assert len(batch) == 2
+    source.ack([key for key, _ in batch])
+
+    remaining = source.fetch(limit=10)
+    assert len(remaining) == 1
+    assert parse_report(remaining[0][1])[0].kind == "hard_bounce"
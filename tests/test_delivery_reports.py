@@ -0,0 +1,93 @@
+"""
+Attribution of parsed bounce and complaint reports to tenants, against a live
+MongoDB (MONGO_URL, default localhost). Skipped when MongoDB is unreachable.
+"""
+
+import os
+import sys
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "warmup_test")
+os.environ.setdefault("ENABLE_SCHEDULER", "false")
+
+try:
+    MongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=1000).admin.command("ping")
+except PyMongoError:
+    pytest.skip("MongoDB is not reachable", allow_module_level=True)
+
+import server  # noqa: E402
+from bounce_processing import DeliveryReport  # noqa: E402
+
+TEST_DB = "warmup_test_delivery_reports"
+
+
+@pytest.fixture
+def run(loop, monkeypatch):
+    monkeypatch.setattr(server, "db", server.client[TEST_DB])
+    loop.run_until_complete(server.client.drop_database(TEST_DB))
+    return loop.run_until_complete
+
+
+async def seed_campaign(campaign_id, user_id, recipients, status="completed"):
+    await server.db.campaigns.insert_one({
+        "id": campaign_id, "user_id": user_id, "domain_id": f"domain-{user_id}",
+        "recipients": recipients, "status": status, "bounce_count": 0, "spam_count": 0
+    })
+
+
+async def seed_contact(user_id, email):
+    await server.db.contacts.insert_one({"id": f"{user_id}-{email}", "user_id": user_id, "email": email})
+
+
+async def suppressed_for(email):
+    rows = await server.db.suppressed_emails.find({"email": email}, {"_id": 0}).to_list(None)
+    return sorted((row["user_id"], row["reason"]) for row in rows)
+
+
+def test_header_attributed_report_suppresses_for_campaign_owner_only(run):
+    run(seed_campaign("campaign-a", "tenant-a", ["reader@inbox.example"]))
+    run(seed_contact("tenant-a", "reader@inbox.example"))
+    run(seed_contact("tenant-b", "reader@inbox.example"))
+
+    stats = run(server.apply_delivery_reports([
+        DeliveryReport(kind="hard_bounce", recipient="reader@inbox.example", status="5.1.1", campaign_id="campaign-a")
+    ]))
+
+    assert stats["hard_bounce"] == 1 and stats["unattributed"] == 0
+    assert run(suppressed_for("reader@inbox.example")) == [("tenant-a", "hard_bounce")]
+    campaign = run(server.db.campaigns.find_one({"id": "campaign-a"}))
+    assert campaign["bounce_count"] == 1
+    contact_b = run(server.db.contacts.find_one({"user_id": "tenant-b"}))
+    assert not contact_b.get("is_suppressed")
+
+
+def test_unattributed_report_falls_back_to_tenants_that_mailed_the_recipient(run):
+    run(seed_campaign("campaign-a", "tenant-a", ["reader@inbox.example"]))
+    run(seed_campaign("campaign-c", "tenant-c", ["reader@inbox.example"], status="draft"))
+    run(seed_contact("tenant-b", "reader@inbox.example"))
+
+    stats = run(server.apply_delivery_reports([
+        DeliveryReport(kind="spam_complaint", recipient="reader@inbox.example")
+    ]))
+
+    assert stats["unattributed"] == 0
+    # tenant-b only holds the contact and tenant-c never sent; neither is touched
+    assert run(suppressed_for("reader@inbox.example")) == [("tenant-a", "spam_complaint")]
+
+
+def test_report_nobody_sent_is_unattributed(run):
+    run(seed_contact("tenant-b", "stranger@inbox.example"))
+
+    stats = run(server.apply_delivery_reports([
+        DeliveryReport(kind="hard_bounce", recipient="stranger@inbox.example", status="5.1.1"),
+        DeliveryReport(kind="soft_bounce", recipient="stranger@inbox.example", status="5.2.2"),
+    ]))
+
+    assert stats == {"hard_bounce": 1, "soft_bounce": 1, "spam_complaint": 0, "unattributed": 1}
+    assert run(suppressed_for("stranger@inbox.example")) == []
@@ -0,0 +1,138 @@
+"""
+Outbox delivery against a live MongoDB (MONGO_URL, default localhost) with a
+recording stand-in for the SMTP pool. Skipped when MongoDB is unreachable.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "warmup_test")
+os.environ.setdefault("ENABLE_SCHEDULER", "false")
+
+try:
+    MongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=1000).admin.command("ping")
+except PyMongoError:
+    pytest.skip("MongoDB is not reachable", allow_module_level=True)
+
+import server  # noqa: E402
+
+TEST_DB = "warmup_test_outbox"
+
+
+class SinkPool:
+    """Stands in for SMTPConnectionPool: records messages, fails the scripted recipients"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = []
+
+    def send_batch(self, messages):
+        errors = []
+        for message in messages:
+            if message["To"] in self.failing:
+                errors.append("451 Try again later")
+            else:
+                self.sent.append(message)
+                errors.append(None)
+        return errors
+
+
+@pytest.fixture
+def run(loop, monkeypatch):
+    monkeypatch.setattr(server, "db", server.client[TEST_DB])
+    loop.run_until_complete(server.client.drop_database(TEST_DB))
+    return loop.run_until_complete
+
+
+def use_pool(monkeypatch, pool):
+    monkeypatch.setattr(server, "outbox_smtp_pool", pool)
+    return pool
+
+
+async def outbox_doc(email_id):
+    return await server.db.email_outbox.find_one({"id": email_id}, {"_id": 0})
+
+
+def test_due_email_is_sent_once(run, monkeypatch):
+    pool = use_pool(monkeypatch, SinkPool())
+    email = run(server.enqueue_email("reader@example.com", "Reset your password", "Link inside", kind="password_reset"))
+
+    assert run(server.deliver_outbox_batch()) == 1
+    assert run(server.deliver_outbox_batch()) == 0
+
+    doc = run(outbox_doc(email.id))
+    assert doc["status"] == "sent"
+    assert doc["attempts"] == 1
+    assert "lease" not in doc and "lease_expires_at" not in doc
+    assert [m["Subject"] for m in pool.sent] == ["Reset your password"]
+
+
+def test_failed_send_is_retried_with_backoff(run, monkeypatch):
+    use_pool(monkeypatch, SinkPool(failing={"reader@example.com"}))
+    email = run(server.enqueue_email("reader@example.com", "Hello", "Body"))
+
+    before = datetime.now(timezone.utc)
+    assert run(server.deliver_outbox_batch()) == 1
+
+    doc = run(outbox_doc(email.id))
+    assert doc["status"] == "pending"
+    assert doc["attempts"] == 1
+    assert doc["last_error"] == "451 Try again later"
+    assert datetime.fromisoformat(doc["next_attempt_at"]) >= before + timedelta(seconds=60)
+    # Not due again until the backoff has elapsed
+    assert run(server.deliver_outbox_batch()) == 0
+
+    pool = use_pool(monkeypatch, SinkPool())
+    run(server.db.email_outbox.update_one(
+        {"id": email.id}, {"$set": {"next_attempt_at": before.isoformat()}}
+    ))
+    assert run(server.deliver_outbox_batch()) == 1
+
+    doc = run(outbox_doc(email.id))
+    assert doc["status"] == "sent"
+    assert doc["attempts"] == 2
+    assert len(pool.sent) == 1
+
+
+def test_email_fails_after_max_attempts(run, monkeypatch):
+    use_pool(monkeypatch, SinkPool(failing={"reader@example.com"}))
+    email = run(server.enqueue_email("reader@example.com", "Hello", "Body"))
+    run(server.db.email_outbox.update_one(
+        {"id": email.id}, {"$set": {"attempts": server.OUTBOX_MAX_ATTEMPTS - 1}}
+    ))
+
+    assert run(server.deliver_outbox_batch()) == 1
+
+    doc = run(outbox_doc(email.id))
+    assert doc["status"] == "failed"
+    assert doc["attempts"] == server.OUTBOX_MAX_ATTEMPTS
+
+
+def test_expired_lease_is_reclaimed(run, monkeypatch):
+    pool = use_pool(monkeypatch, SinkPool())
+    stranded = run(server.enqueue_email("stranded@example.com", "Stranded", "Body"))
+    in_flight = run(server.enqueue_email("inflight@example.com", "In flight", "Body"))
+    now = datetime.now(timezone.utc)
+    # A worker died mid-send on the first; another worker still holds the second
+    run(server.db.email_outbox.update_one({"id": stranded.id}, {"$set": {
+        "status": "sending", "lease": "dead-worker",
+        "lease_expires_at": (now - timedelta(seconds=1)).isoformat()
+    }}))
+    run(server.db.email_outbox.update_one({"id": in_flight.id}, {"$set": {
+        "status": "sending", "lease": "live-worker",
+        "lease_expires_at": (now + timedelta(seconds=server.OUTBOX_LEASE_SECONDS)).isoformat()
+    }}))
+
+    assert run(server.deliver_outbox_batch()) == 1
+
+    assert run(outbox_doc(stranded.id))["status"] == "sent"
+    assert run(outbox_doc(in_flight.id))["lease"] == "live-worker"
+    assert [m["To"] for m in pool.sent] == ["stranded@example.com"]